@@ -0,0 +1,230 @@
+"""JSONL 질문 파일 일괄 실행기
+
+질문 파일을 한 줄씩 읽어 최대 --concurrency 개의 질문을 동시에 실행하고, 끝나는 대로
+답변과 소요 시간을 출력 JSONL에 한 줄씩 추가합니다. 중간에 중단되어도 같은 명령을 다시
+실행하면 출력 파일에 이미 성공으로 기록된 질문은 건너뛰고 이어서 실행합니다.
+
+입력 한 줄 예시:
+{"id": "q-001", "question": "건축법에서 경미한 사항의 변경에 대해 알려줘"}
+
+출력 한 줄 예시:
+{"id": "q-001", "question": "...", "answer": "...", "error": null, "elapsed": 12.3, ...}
+
+사용 예시:
+python batch_runner.py questions.jsonl answers.jsonl --concurrency 16
+python batch_runner.py questions.jsonl laws.jsonl --mode laws --timeout 120
+python batch_runner.py questions.jsonl answers.jsonl --retry-errors
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, Iterator, Set, Tuple
+
+from util_tool_call import SimpleToolCaller
+from util_law_search import afind_relevant_laws
+
+# 기본 동시 실행 질문 수
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+def read_questions(
+    path: str, id_field: str = "id", question_field: str = "question"
+) -> Iterator[Tuple[str, str]]:
+    """입력 JSONL에서 (질문 id, 질문)을 한 줄씩 읽습니다. id가 없으면 줄 번호를 사용합니다."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ {line_number}번째 줄을 읽을 수 없습니다: {e}")
+                continue
+            question = item.get(question_field)
+            if not question:
+                print(f"⚠️ {line_number}번째 줄에 {question_field} 항목이 없습니다.")
+                continue
+            yield str(item.get(id_field, line_number)), question
+
+
+def load_finished_ids(path: str, retry_errors: bool = False) -> Set[str]:
+    """출력 JSONL에 이미 기록된 질문 id를 읽습니다. (retry_errors=True이면 오류난 질문은 제외)
+
+    중단 시점에 마지막 줄이 잘렸을 수 있으므로 읽을 수 없는 줄은 무시합니다.
+    """
+    finished_ids = set()
+    if not os.path.exists(path):
+        return finished_ids
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if retry_errors and record.get("error"):
+                continue
+            finished_ids.add(str(record["id"]))
+    return finished_ids
+
+
+def open_output(path: str):
+    """출력 파일을 추가 모드로 엽니다. 마지막 줄이 잘려 있으면 줄바꿈을 먼저 넣습니다."""
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            ends_with_newline = f.read(1) == b"\n"
+        output = open(path, "a", encoding="utf-8")
+        if not ends_with_newline:
+            output.write("\n")
+        return output
+    return open(path, "a", encoding="utf-8")
+
+
+async def answer_question(
+    question: str, mode: str, caller: SimpleToolCaller, with_tools: bool
+) -> str:
+    """질문 하나를 실행합니다. mode="chat"이면 도구를 사용하는 대화, "laws"이면 법령 검색만 합니다."""
+    if mode == "laws":
+        return await afind_relevant_laws(question)
+    return await caller.achat([{"role": "user", "content": question}], with_tools)
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = None,
+    mode: str = "chat",
+    with_tools: bool = True,
+    timeout: float = None,
+    retry_errors: bool = False,
+    id_field: str = "id",
+    question_field: str = "question",
+) -> Dict[str, Any]:
+    """입력 파일의 질문들을 동시에 실행하고 결과를 출력 파일에 추가합니다. 실행 요약을 반환합니다."""
+    from main import TOOLS, ASYNC_TOOL_FUNCTIONS
+
+    concurrency = concurrency or BATCH_CONCURRENCY
+    caller = SimpleToolCaller(TOOLS, ASYNC_TOOL_FUNCTIONS)
+    finished_ids = load_finished_ids(output_path, retry_errors)
+    if finished_ids:
+        print(f"🔍 이어서 실행--> 이미 끝난 질문 {len(finished_ids)}개 건너뜀")
+
+    # 입력을 한꺼번에 읽지 않도록 크기가 제한된 큐로 작업자에게 넘김
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    summary = {"succeeded": 0, "failed": 0, "skipped": 0, "elapsed": []}
+    started_at = time.perf_counter()
+
+    with open_output(output_path) as output:
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                question_id, question = item
+                question_started_at = time.time()
+                error = None
+                answer = None
+                try:
+                    answer = await asyncio.wait_for(
+                        answer_question(question, mode, caller, with_tools), timeout
+                    )
+                except asyncio.TimeoutError:
+                    error = f"시간 초과 ({timeout}초)"
+                except Exception as e:
+                    error = str(e)
+                elapsed = time.time() - question_started_at
+
+                record = {
+                    "id": question_id,
+                    "question": question,
+                    "answer": answer,
+                    "error": error,
+                    "elapsed": round(elapsed, 3),
+                    "started_at": question_started_at,
+                    "finished_at": question_started_at + elapsed,
+                }
+                # 끝나는 대로 한 줄씩 기록 (중단되어도 여기까지의 결과는 남음)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+
+                summary["elapsed"].append(elapsed)
+                if error:
+                    summary["failed"] += 1
+                    print(f"❌ {question_id} ({elapsed:.2f}s): {error}")
+                else:
+                    summary["succeeded"] += 1
+                    print(f"✅ {question_id} ({elapsed:.2f}s)")
+                queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for question_id, question in read_questions(
+            input_path, id_field, question_field
+        ):
+            if question_id in finished_ids:
+                summary["skipped"] += 1
+                continue
+            finished_ids.add(question_id)
+            await queue.put((question_id, question))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    elapsed = sorted(summary.pop("elapsed"))
+    summary["total_time"] = time.perf_counter() - started_at
+    if elapsed:
+        summary["p50"] = elapsed[len(elapsed) // 2]
+        summary["p95"] = elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))]
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="JSONL 질문 파일 일괄 실행기")
+    parser.add_argument("input", help="질문 JSONL 파일")
+    parser.add_argument("output", help="결과 JSONL 파일 (있으면 이어서 실행)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"동시에 실행할 질문 수 (기본값: {BATCH_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["chat", "laws"],
+        default="chat",
+        help="chat: 도구를 사용하는 대화, laws: find_relevant_laws만 실행",
+    )
+    parser.add_argument("--no-tools", action="store_true", help="chat 모드에서 도구 사용 안 함")
+    parser.add_argument("--timeout", type=float, help="질문당 제한 시간(초)")
+    parser.add_argument(
+        "--retry-errors", action="store_true", help="오류로 기록된 질문도 다시 실행"
+    )
+    parser.add_argument("--id-field", default="id", help="질문 id 항목 이름")
+    parser.add_argument("--question-field", default="question", help="질문 항목 이름")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(
+        run_batch(
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            mode=args.mode,
+            with_tools=not args.no_tools,
+            timeout=args.timeout,
+            retry_errors=args.retry_errors,
+            id_field=args.id_field,
+            question_field=args.question_field,
+        )
+    )
+    print("🔍 일괄 실행 결과-->", summary)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
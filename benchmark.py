@@ -0,0 +1,1071 @@
+"""find_relevant_laws 오프라인 벤치마크
+
+실제 LLM 서버와 PostgreSQL 없이 법령 검색 파이프라인의 성능을 측정합니다.
+
+- OpenAI 호환 mock LLM 서버: 프롬프트 종류별로 정해진 규칙에 따라 답하며 응답 지연을 설정할 수 있습니다.
+- 시드 데이터베이스: document/collection/chunk 스키마를 SQLite 메모리 DB로 만들고
+  파이프라인이 보내는 검색 SQL(ParadeDB)을 같은 의미의 검색으로 바꿔 실행합니다.
+
+단계별 wall time, LLM 호출 수, SQL 쿼리 수, 토큰 수를 보고하고 저장된 기준값과 비교합니다.
+
+사용 예시:
+python benchmark.py                          # 측정 후 benchmark_baseline.json과 비교
+python benchmark.py --latency 0.5 --repeat 3
+python benchmark.py --save-baseline          # 현재 결과를 기준값으로 저장
+python benchmark.py --max-regression 20      # 기준값보다 20% 넘게 나빠지면 종료 코드 1
+python benchmark.py --search-sql 100         # 실제 PostgreSQL에서 검색 SQL 계획/실행 시간 비교
+python benchmark.py --llm-pool 200           # mock 서버로 LLM 호출당 커넥션 비용 비교 (풀 없음/공용 풀)
+LLM_STRUCTURED_OUTPUT=json_schema python benchmark.py  # 배치 판단을 JSON 스트리밍으로 받음
+CHUNK_PREFILTER=True python benchmark.py    # 충분성 검사 전 청크 사전 필터를 켜고 비교
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Tuple
+
+from context_packer import estimate_tokens
+from prompts import detect_prompt_type
+
+# 시드 데이터: (법령명, 시행령 여부)
+SEED_LAWS = [
+    ("건축법", False),
+    ("건축법 시행령", True),
+    ("국토의 계획 및 이용에 관한 법률", False),
+    ("국토의 계획 및 이용에 관한 법률 시행령", True),
+    ("주차장법", False),
+    ("주차장법 시행령", True),
+]
+
+# 질문과 법령 내용에 등장하는 주제 (mock LLM이 키워드로 인식하는 단어)
+SEED_TOPICS = [
+    "경미한 사항",
+    "용적률",
+    "건폐율",
+    "대지의 조경",
+    "건축허가",
+    "공개공지",
+    "부설주차장",
+    "높이 제한",
+]
+
+# 주제와 관계없는 조문
+SEED_GENERAL_TOPICS = ["목적", "정의", "적용 범위", "벌칙", "과태료"]
+
+SEED_SENTENCES = [
+    "{topic}에 관한 사항은 이 법에서 정하는 기준에 따른다.",
+    "허가권자는 {topic}에 관하여 필요하다고 인정하는 경우 건축위원회의 심의를 거쳐 기준을 완화하여 적용할 수 있다.",
+    "제1항에도 불구하고 {topic}이 다음 각 호의 어느 하나에 해당하는 경우에는 신고로 갈음할 수 있다.",
+    "1. 연면적의 합계가 {number}제곱미터 이하인 경우",
+    "2. 층수가 {floors}층 이하인 건축물로서 주요구조부의 변경이 없는 경우",
+    "{topic}의 산정 방법 및 절차 등에 필요한 사항은 국토교통부령으로 정한다.",
+    "특별자치시장ㆍ특별자치도지사 또는 시장ㆍ군수ㆍ구청장은 {topic}을 위반한 자에게 시정을 명할 수 있다.",
+]
+
+# 상위 법령에만 넣는 위임 문장 (mock LLM은 이 문장이 있으면 시행령 추가 검색을 요청)
+SEED_DELEGATION_SENTENCE = "그 밖에 {topic}에 필요한 사항은 대통령령으로 정하는 바에 따른다."
+
+DEFAULT_QUESTIONS = [
+    "건축법에서 경미한 사항의 변경에 대해 알려줘. 단, 관련된 법령의 이름이나 조항 번호를 포함하고 법령 내용을 인용하는 방식으로 설명해주세요.",
+    "전체 건축 관련 법규에서 용적률 완화에 관해서 알려주세요. 단, 관련된 법령의 이름이나 조항 번호를 포함하고 법령 내용을 인용하는 방식으로 설명해주세요.",
+    "국토의 계획 및 이용에 관한 법률에서 건폐율 기준은 어떻게 되나요?",
+]
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+
+# --search-sql에서 사용하는 (검색어, 법률명) 예시 (법률명이 None이면 법률명 조건 없는 SQL)
+SEARCH_SQL_SAMPLES = [
+    ("경미한 사항 변경", "건축법"),
+    ("용적률 완화", None),
+    ("건폐율 기준", "국토의계획및이용에관한법률"),
+    ("부설주차장 설치", "주차장법"),
+    ("대지의 조경", None),
+]
+
+# 비교할 때 값이 클수록 나쁜 지표
+_LOWER_IS_BETTER = (
+    "total_time",
+    "mean_question_time",
+    "llm_calls",
+    "sql_queries",
+    "prompt_tokens",
+    "completion_tokens",
+)
+
+
+def _article_heading(text: str) -> Tuple[str, str]:
+    """청크 첫 줄("법령명 제N조(주제)")에서 (법령명, 주제)를 꺼냅니다."""
+    match = re.match(r"\s*(.+?)\s+제\d+조(?:의\d+)?\((.+?)\)", text)
+    return (match.group(1), match.group(2)) if match else ("", "")
+
+
+def _law_names_in(text: str) -> List[str]:
+    """문장에 포함된 시드 법령명을 (긴 이름 우선으로) 찾습니다."""
+    found = []
+    for law_name, _ in sorted(SEED_LAWS, key=lambda law: -len(law[0])):
+        if law_name in text and not any(law_name in name for name in found):
+            found.append(law_name)
+    return found
+
+
+def _topics_in(text: str) -> List[str]:
+    """문장에 포함된 주제를 찾습니다."""
+    return [topic for topic in SEED_TOPICS + SEED_GENERAL_TOPICS if topic in text]
+
+
+def _split_numbered_laws(user_content: str) -> List[str]:
+    """batch 프롬프트의 "N번 법령:" 블록들을 순서대로 나눕니다. (JSON 출력 안내 문구는 제외)"""
+    contents = user_content.split("법령 내용들:\n", 1)[-1]
+    contents = contents.split("\n\n답변은 위의 답변 형식 대신", 1)[0]
+    return re.split(r"\n\n---\n\n", contents)
+
+
+def _mock_verdict(question: str, block: str) -> str:
+    """청크 주제가 질문 주제와 같으면 충분함, 질문 주제가 본문에만 있으면 부분적 충분함으로 판단합니다."""
+    question_topics = _topics_in(question)
+    _, topic = _article_heading(block.split("\n", 1)[-1])
+    if topic in question_topics:
+        return "충분함"
+    if any(question_topic in block for question_topic in question_topics):
+        return "부분적 충분함"
+    return "부족함"
+
+
+def _mock_follow_up_lines(prefix: str, block: str) -> List[str]:
+    """대통령령 위임 문장이 있으면 시행령 추가 검색을 요청하는 답변 줄들을 만듭니다."""
+    law_name, topic = _article_heading(block.split("\n", 1)[-1])
+    if "대통령령으로 정하는" in block and law_name:
+        return [
+            f"{prefix}추가 검색 필요",
+            f"- 검색 대상: {law_name} 시행령",
+            f"- 검색 키워드: {topic}",
+            "- 검색 이유: 대통령령에 위임된 세부 기준 확인",
+        ]
+    return [f"{prefix}추가 검색 불필요"]
+
+
+def _mock_judgment(prompt_type: str, question: str, index: int, block: str) -> Dict:
+    """JSON 출력 모드에서 법령 블록 하나에 대한 판단 항목을 만듭니다. (줄 단위 답변과 같은 규칙)"""
+    item = {"index": index}
+    if prompt_type in ("batch_law_sufficiency", "batch_law_relevance"):
+        item["verdict"] = _mock_verdict(question, block)
+    if prompt_type == "batch_law_sufficiency":
+        return item
+    law_name, topic = _article_heading(block.split("\n", 1)[-1])
+    item["needs_additional_search"] = bool(
+        "대통령령으로 정하는" in block and law_name and item.get("verdict") != "부족함"
+    )
+    if item["needs_additional_search"]:
+        item["search_target"] = f"{law_name} 시행령"
+        item["search_keywords"] = topic
+        item["search_reason"] = "대통령령에 위임된 세부 기준 확인"
+    return item
+
+
+def mock_llm_json_answer(prompt_type: str, messages: List[Dict]) -> List[str]:
+    """JSON 출력 모드의 배치 판단 답을 스트리밍으로 보낼 조각 단위(항목마다 하나)로 만듭니다."""
+    user_content = messages[-1].get("content") or ""
+    question = user_content.split("사용자 질문:", 1)[-1].split("\n")[0]
+    items = [
+        json.dumps(_mock_judgment(prompt_type, question, i, block), ensure_ascii=False)
+        for i, block in enumerate(_split_numbered_laws(user_content), 1)
+    ]
+    return ['{"results": [' + items[0]] + [", " + item for item in items[1:]] + ["]}"]
+
+
+def mock_llm_answer(prompt_type: str, messages: List[Dict]) -> str:
+    """프롬프트 종류별로 실제 모델이 낼 법한 형식의 답을 규칙에 따라 만듭니다."""
+    user_content = messages[-1].get("content") or ""
+
+    if prompt_type == "law_name_extraction":
+        query = user_content.split("문장:", 1)[-1].split("\n법률과 조항:")[0]
+        law_names = _law_names_in(query)
+        if not law_names:
+            return '법률과 조항:\n1. 법률명: "해당없음", 조항 번호: "해당없음"'
+        return "법률과 조항:\n" + "\n".join(
+            f'{i}. 법률명: "{law_name}", 조항 번호: "해당없음"'
+            for i, law_name in enumerate(law_names, 1)
+        )
+
+    if prompt_type == "keyword_extraction":
+        query = user_content.split("문장:", 1)[-1]
+        keywords = _topics_in(query) or query.split()[:2]
+        return "키워드: " + ", ".join(keywords)
+
+    if prompt_type == "batch_law_sufficiency":
+        question = user_content.split("사용자 질문:", 1)[-1].split("\n")[0]
+        return "\n".join(
+            f"{i}번 법령: {_mock_verdict(question, block)}"
+            for i, block in enumerate(_split_numbered_laws(user_content), 1)
+        )
+
+    if prompt_type == "batch_additional_search":
+        lines = []
+        for i, block in enumerate(_split_numbered_laws(user_content), 1):
+            lines += _mock_follow_up_lines(f"{i}번 법령: ", block)
+        return "\n".join(lines)
+
+    if prompt_type == "batch_law_relevance":
+        question = user_content.split("사용자 질문:", 1)[-1].split("\n")[0]
+        lines = []
+        for i, block in enumerate(_split_numbered_laws(user_content), 1):
+            verdict = _mock_verdict(question, block)
+            if verdict == "부족함":
+                lines.append(f"{i}번 법령: 부족함, 추가 검색 불필요")
+            else:
+                lines += _mock_follow_up_lines(f"{i}번 법령: {verdict}, ", block)
+        return "\n".join(lines)
+
+    return "질문하신 내용에 대한 답변입니다."
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # 동시 요청이 많아도 연결이 거부되지 않도록 listen backlog를 늘림
+    request_queue_size = 512
+
+
+class MockLLMServer:
+    """OpenAI 호환 /chat/completions, /models를 흉내 내는 로컬 HTTP 서버
+
+    응답마다 latency 초를 기다리고, 프롬프트 종류별 호출 수와 토큰 수(추정치)를 기록합니다.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._send_json({"data": [{"id": "mock-model", "object": "model"}]})
+
+            def _send_chunk(self, payload: bytes) -> None:
+                self.wfile.write(f"{len(payload):X}\r\n".encode() + payload + b"\r\n")
+                self.wfile.flush()
+
+            def _send_stream(self, request: Dict[str, Any]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for chunk in server.complete_stream(request):
+                        data = json.dumps(chunk, ensure_ascii=False)
+                        self._send_chunk(f"data: {data}\n\n".encode("utf-8"))
+                    self._send_chunk(b"data: [DONE]\n\n")
+                    self._send_chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 스트림을 끝까지 읽지 않고 닫은 경우 (취소, 제한 시간)
+                    self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                if request.get("stream"):
+                    self._send_stream(request)
+                else:
+                    self._send_json(server.complete(request))
+
+        self._httpd = _MockHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _answer(self, request: Dict[str, Any]) -> Tuple[List[str], Dict[str, int]]:
+        """요청에 대한 답을 (스트리밍 조각 목록, usage)로 만들고 호출 수와 토큰 수를 기록합니다.
+
+        response_format(json_schema) 또는 guided_json이 있는 배치 판단 요청에는 JSON으로 답합니다.
+        """
+        messages = request.get("messages", [])
+        prompt_type = detect_prompt_type(messages) or "other"
+        if (
+            request.get("response_format") or request.get("guided_json")
+        ) and prompt_type.startswith("batch_"):
+            pieces = mock_llm_json_answer(prompt_type, messages)
+        else:
+            pieces = mock_llm_answer(prompt_type, messages).splitlines(keepends=True)
+
+        prompt_tokens = sum(
+            estimate_tokens(message.get("content") or "") for message in messages
+        )
+        completion_tokens = estimate_tokens("".join(pieces))
+        with self._lock:
+            self.calls[prompt_type] += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return pieces or [""], usage
+
+    def complete_stream(self, request: Dict[str, Any]):
+        """stream=True 요청의 SSE 청크들을 만듭니다. (latency를 조각 수만큼 나눠 조각 사이에 기다림)"""
+        pieces, usage = self._answer(request)
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+        yield {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """chat/completions 요청 하나에 대한 응답 본문을 만듭니다."""
+        pieces, usage = self._answer(request)
+        content = "".join(pieces)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-llm", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+
+class SeededLawDatabase:
+    """document/collection/chunk 스키마에 시드 법령을 채운 SQLite 메모리 DB
+
+    DatabaseManager._fetch_all 자리에 fetch_all을 넣어 사용합니다. 파이프라인의 검색 SQL
+    (ParadeDB의 text @@@ 검색과 paradedb.score)은 키워드 등장 횟수로 점수를 매기는 검색으로,
+    id = ANY(%s) 조회는 IN 조회로 바꿔 실행하고 나머지 SQL은 SQLite에서 그대로 실행합니다.
+    """
+
+    def __init__(self, chunks_per_topic: int = 3, seed: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self.queries = 0
+        self.rows = 0
+        self._create_schema()
+        self._seed(chunks_per_topic, random.Random(seed))
+
+    def _create_schema(self) -> None:
+        self._db.executescript(
+            """
+            CREATE TABLE collection (id INTEGER PRIMARY KEY, usage TEXT, scenario TEXT);
+            CREATE TABLE document (
+                id INTEGER PRIMARY KEY, collection_id INTEGER, document_meta TEXT
+            );
+            CREATE TABLE chunk (
+                id INTEGER PRIMARY KEY, document_id INTEGER, keyword1 TEXT, text TEXT
+            );
+            """
+        )
+
+    def _seed(self, chunks_per_topic: int, rng: random.Random) -> None:
+        self._db.execute(
+            "INSERT INTO collection VALUES (1, 'rag', ?)",
+            (json.dumps({"law_no_ordin": "Y"}),),
+        )
+        chunk_id = 0
+        for document_id, (law_name, is_decree) in enumerate(SEED_LAWS, 1):
+            self._db.execute(
+                "INSERT INTO document VALUES (?, 1, ?)",
+                (document_id, json.dumps({"path": f"/data/law/{document_id}"})),
+            )
+            topics = SEED_GENERAL_TOPICS + [
+                topic for topic in SEED_TOPICS for _ in range(chunks_per_topic)
+            ]
+            for article_number, topic in enumerate(topics, 1):
+                sentences = rng.sample(SEED_SENTENCES, 4)
+                if not is_decree and rng.random() < 0.3:
+                    sentences.append(SEED_DELEGATION_SENTENCE)
+                body = "\n".join(
+                    f"{'①②③④⑤⑥'[i]} "
+                    + sentence.format(
+                        topic=topic,
+                        number=rng.choice([85, 100, 200, 300]),
+                        floors=rng.choice([2, 3, 5]),
+                    )
+                    for i, sentence in enumerate(sentences)
+                )
+                chunk_id += 1
+                self._db.execute(
+                    "INSERT INTO chunk VALUES (?, ?, ?, ?)",
+                    (
+                        chunk_id,
+                        document_id,
+                        law_name.replace(" ", ""),
+                        f"{law_name} 제{article_number}조({topic})\n{body}",
+                    ),
+                )
+        self._db.commit()
+        self.chunk_count = chunk_id
+
+    def _search(self, sql_query: str, params: tuple) -> List[Dict[str, Any]]:
+        """ParadeDBSearchBackend.build_search_sql의 검색 SQL을 키워드 등장 횟수 기반 검색으로 실행합니다."""
+        # 파라미터: (검색어, 법률명, k) 또는 (검색어, k)
+        keywords = params[0].split()
+        law_name = params[1] if len(params) == 3 else None
+        limit = params[-1]
+
+        where = "cl.usage = 'rag' AND json_extract(cl.scenario, '$.law_no_ordin') = 'Y'"
+        sqlite_params = []
+        if law_name:
+            where += " AND ch2.keyword1 = ?"
+            sqlite_params.append(law_name)
+        rows = self._db.execute(
+            f"""SELECT ch2.id, ch2.keyword1, ch2.text FROM document
+            JOIN collection cl ON document.collection_id = cl.id
+            JOIN chunk ch2 ON ch2.document_id = document.id WHERE {where}""",
+            sqlite_params,
+        ).fetchall()
+
+        scored = []
+        for row in rows:
+            score = float(sum(row["text"].count(keyword) for keyword in keywords))
+            if score > 0:
+                scored.append((score, row))
+        scored.sort(key=lambda item: (-item[0], item[1]["id"]))
+
+        include_text = "ch2.text" in sql_query
+        results = []
+        for score, row in scored[:limit]:
+            result = {"id": row["id"], "keyword1": row["keyword1"]}
+            if include_text:
+                result["text"] = row["text"]
+            result["similarity"] = score
+            results.append(result)
+        return results
+
+    def fetch_all(
+        self, sql_query: str, params: tuple = None, prepared: Tuple = None
+    ) -> Dict[str, Any]:
+        """DatabaseManager._fetch_all과 같은 형식({"results": [...]} 또는 {"error": ...})으로 결과를 반환합니다."""
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            with self._lock:
+                self.queries += 1
+                if "@@@" in sql_query:
+                    results = self._search(sql_query, params)
+                elif "= ANY(%s)" in sql_query:
+                    ids = list(params[0])
+                    placeholders = ", ".join("?" for _ in ids)
+                    sqlite_query = sql_query.replace("= ANY(%s)", f"IN ({placeholders})")
+                    results = [
+                        dict(row) for row in self._db.execute(sqlite_query, ids).fetchall()
+                    ]
+                else:
+                    sqlite_query = sql_query.replace("%s", "?").replace("ILIKE", "LIKE")
+                    results = [
+                        dict(row)
+                        for row in self._db.execute(sqlite_query, params or ()).fetchall()
+                    ]
+                self.rows += len(results)
+            return {"results": results}
+        except Exception as e:
+            print(f"데이터베이스 연결 오류: {e}")
+            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.queries = 0
+            self.rows = 0
+
+    def iter_chunks(self):
+        """시드 청크를 {"id", "keyword1", "text"}로 반환합니다. (SQLite 검색 파일 생성용)"""
+        with self._lock:
+            rows = self._db.execute("SELECT id, keyword1, text FROM chunk").fetchall()
+        return [dict(row) for row in rows]
+
+
+class StageTimer:
+    """파이프라인 단계 함수들을 감싸 호출 수, 누적 시간, wall time을 기록합니다.
+
+    동시에 실행된 호출들은 구간을 합쳐 wall time(실제로 그 단계가 진행 중이던 시간)을 계산합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervals = defaultdict(list)
+        self._patches = []
+
+    def _record(self, stage: str, start: float, end: float) -> None:
+        with self._lock:
+            self._intervals[stage].append((start, end))
+
+    def wrap(self, owner: Any, attribute: str, stage: str) -> None:
+        """owner(모듈 또는 클래스)의 함수를 시간 측정 함수로 바꿉니다."""
+        original = getattr(owner, attribute)
+        timer = self
+
+        if inspect.iscoroutinefunction(original):
+
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    timer._record(stage, start, time.perf_counter())
+
+        else:
+
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    timer._record(stage, start, time.perf_counter())
+
+        setattr(owner, attribute, wrapper)
+        self._patches.append((owner, attribute, original))
+
+    def restore(self) -> None:
+        """감쌌던 함수들을 원래대로 돌려놓습니다."""
+        for owner, attribute, original in reversed(self._patches):
+            setattr(owner, attribute, original)
+        self._patches.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._intervals.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """단계별 호출 수, 누적 시간(초), wall time(초)을 반환합니다."""
+        with self._lock:
+            intervals = {stage: sorted(v) for stage, v in self._intervals.items()}
+
+        stats = {}
+        for stage, stage_intervals in intervals.items():
+            wall_time = 0.0
+            current_start, current_end = stage_intervals[0]
+            for start, end in stage_intervals[1:]:
+                if start > current_end:
+                    wall_time += current_end - current_start
+                    current_start, current_end = start, end
+                else:
+                    current_end = max(current_end, end)
+            wall_time += current_end - current_start
+            stats[stage] = {
+                "calls": len(stage_intervals),
+                "total_time": sum(end - start for start, end in stage_intervals),
+                "wall_time": wall_time,
+            }
+        return stats
+
+
+def instrument_pipeline(timer: StageTimer) -> None:
+    """find_relevant_laws의 주요 단계들을 StageTimer로 감쌉니다."""
+    import util_law_search
+    from util_law_search import LawSearcher
+
+    timer.wrap(util_law_search, "aextract_law_names", "extract_law_names")
+    timer.wrap(util_law_search, "aextract_keywords", "extract_keywords")
+    timer.wrap(LawSearcher, "asearch_laws", "search_laws")
+    timer.wrap(LawSearcher, "aget_law_contents_by_ids", "fetch_law_contents")
+    timer.wrap(util_law_search, "acheck_law_sufficiency", "check_law_sufficiency")
+    timer.wrap(
+        util_law_search,
+        "acheck_additional_search_needed",
+        "check_additional_search_needed",
+    )
+    timer.wrap(
+        util_law_search,
+        "aperform_batch_additional_searches",
+        "perform_batch_additional_searches",
+    )
+    timer.wrap(util_law_search, "pack_law_contexts", "pack_law_contexts")
+
+
+def run_benchmark(
+    questions: List[str],
+    latency: float = 0.2,
+    db_latency: float = 0.0,
+    chunks_per_topic: int = 3,
+    repeat: int = 1,
+    verbose: bool = False,
+    search_backend: str = "paradedb",
+    keyword_extractor: str = "llm",
+) -> Dict[str, Any]:
+    """mock LLM 서버와 시드 DB로 find_relevant_laws를 실행하고 지표를 반환합니다.
+
+    search_backend="sqlite"이면 시드 청크로 SQLite FTS5 검색 파일을 만들어 검색과 내용 조회에 사용합니다.
+    keyword_extractor="local"이면 시드 청크로 어휘 사전을 만들어 로컬 키워드 추출기를 사용합니다.
+    """
+    server = MockLLMServer(latency=latency).start()
+    os.environ["USE_OPENAI"] = "False"
+    os.environ["LLM_BASE_URL"] = server.base_url
+    os.environ["LLM_MODEL"] = "mock-model"
+
+    import util_law_search
+    from db_utils import db_manager
+    from law_name_index import law_name_index
+    from keyword_extractor import keyword_extractor as local_keyword_extractor
+    from search_backends import SQLiteFTSSearchBackend
+    from util_law_search import find_relevant_laws
+
+    database = SeededLawDatabase(chunks_per_topic=chunks_per_topic, latency=db_latency)
+    db_manager._fetch_all = database.fetch_all
+
+    original_search_backend = util_law_search.search_backend
+    fts_dir = None
+    if search_backend == "sqlite":
+        fts_dir = tempfile.TemporaryDirectory()
+        fts_path = os.path.join(fts_dir.name, "laws.db")
+        SQLiteFTSSearchBackend.build(fts_path, database.iter_chunks())
+        util_law_search.search_backend = SQLiteFTSSearchBackend(fts_path)
+    # 법률명 사전은 이번 실행의 검색 백엔드에서 다시 읽음
+    law_name_index.reset()
+    local_keyword_extractor_enabled = local_keyword_extractor.enabled
+    local_keyword_extractor.enabled = keyword_extractor == "local"
+    if local_keyword_extractor.enabled:
+        local_keyword_extractor.build(chunk["text"] for chunk in database.iter_chunks())
+
+    timer = StageTimer()
+    instrument_pipeline(timer)
+
+    question_times = []
+    answer_lengths = []
+    started_at = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for question in questions:
+                output = io.StringIO()
+                with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                    question_started_at = time.perf_counter()
+                    answer = find_relevant_laws(question)
+                    question_times.append(time.perf_counter() - question_started_at)
+                answer_lengths.append(len(answer))
+        total_time = time.perf_counter() - started_at
+    finally:
+        timer.restore()
+        del db_manager._fetch_all
+        util_law_search.search_backend = original_search_backend
+        if fts_dir is not None:
+            fts_dir.cleanup()
+        law_name_index.reset()
+        local_keyword_extractor.enabled = local_keyword_extractor_enabled
+        local_keyword_extractor.reset()
+        server.stop()
+
+    return {
+        "settings": {
+            "questions": len(questions),
+            "repeat": repeat,
+            "latency": latency,
+            "db_latency": db_latency,
+            "seed_chunks": database.chunk_count,
+            "search_backend": search_backend,
+            "keyword_extractor": keyword_extractor,
+        },
+        "total_time": total_time,
+        "mean_question_time": sum(question_times) / len(question_times),
+        "max_question_time": max(question_times),
+        "llm_calls": sum(server.calls.values()),
+        "llm_calls_by_prompt_type": dict(server.calls),
+        "sql_queries": database.queries,
+        "sql_rows": database.rows,
+        "prompt_tokens": server.prompt_tokens,
+        "completion_tokens": server.completion_tokens,
+        "answer_chars": sum(answer_lengths),
+        "stages": timer.stats(),
+    }
+
+
+def compare_with_baseline(
+    result: Dict[str, Any], baseline: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """현재 결과와 기준값의 지표별 차이(%)를 계산합니다."""
+    rows = []
+    metrics = [(name, result.get(name), baseline.get(name)) for name in _LOWER_IS_BETTER]
+    for stage, stage_stats in result["stages"].items():
+        baseline_stage = baseline.get("stages", {}).get(stage, {})
+        metrics.append(
+            (f"stage:{stage}", stage_stats["wall_time"], baseline_stage.get("wall_time"))
+        )
+
+    for name, current, previous in metrics:
+        if previous is None or current is None:
+            change = None
+        elif previous == 0:
+            change = 0.0 if current == 0 else float("inf")
+        else:
+            change = (current - previous) / previous * 100
+        rows.append(
+            {"metric": name, "baseline": previous, "current": current, "change": change}
+        )
+    return rows
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def print_report(result: Dict[str, Any], comparison: List[Dict[str, Any]] = None) -> None:
+    settings = result["settings"]
+    print("=" * 80)
+    print(
+        f"🔍 벤치마크 결과--> 질문 {settings['questions']}개 × {settings['repeat']}회, "
+        f"LLM 지연 {settings['latency']}s, DB 지연 {settings['db_latency']}s, "
+        f"시드 청크 {settings['seed_chunks']}개, 검색 백엔드 {settings['search_backend']}, "
+        f"키워드 추출 {settings['keyword_extractor']}"
+    )
+    print(f"전체 시간: {result['total_time']:.3f}s")
+    print(
+        f"질문당 시간: 평균 {result['mean_question_time']:.3f}s, "
+        f"최대 {result['max_question_time']:.3f}s"
+    )
+    print(f"LLM 호출: {result['llm_calls']}회 {result['llm_calls_by_prompt_type']}")
+    print(f"SQL 쿼리: {result['sql_queries']}회 ({result['sql_rows']}행)")
+    print(
+        f"토큰(추정): prompt {result['prompt_tokens']}, "
+        f"completion {result['completion_tokens']}"
+    )
+    print("-" * 80)
+    print(f"{'단계':<44}{'호출':>8}{'누적(s)':>12}{'wall(s)':>12}")
+    for stage, stage_stats in result["stages"].items():
+        print(
+            f"{stage:<44}{stage_stats['calls']:>8}"
+            f"{stage_stats['total_time']:>12.3f}{stage_stats['wall_time']:>12.3f}"
+        )
+
+    if comparison:
+        print("-" * 80)
+        print(f"{'기준값 비교':<44}{'기준값':>14}{'현재':>14}{'변화':>12}")
+        for row in comparison:
+            change = "-" if row["change"] is None else f"{row['change']:+.1f}%"
+            print(
+                f"{row['metric']:<44}{_format_value(row['baseline']):>14}"
+                f"{_format_value(row['current']):>14}{change:>12}"
+            )
+    print("=" * 80)
+
+
+def _client_bound_sql(sql_query: str) -> str:
+    """$n 자리표시자 SQL을 psycopg2가 값을 문자열에 직접 넣는(매번 새로 계획되는) SQL로 바꿉니다."""
+    return re.sub(r"\$\d+", "%s", sql_query.replace("%", "%%"))
+
+
+def _explain(cursor, sql_query: str, params: tuple) -> Tuple[float, float]:
+    """EXPLAIN ANALYZE로 (계획 시간, 실행 시간)(ms)을 구합니다."""
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql_query, params)
+    plan = cursor.fetchone()[0][0]
+    return plan["Planning Time"], plan["Execution Time"]
+
+
+def run_search_sql_benchmark(
+    iterations: int = 50, samples: List[Tuple[str, str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """실제 PostgreSQL(ParadeDB)에서 법령 검색 SQL의 계획/실행 시간을 비교합니다. (POSTGRES_* 환경변수 필요)
+
+    - literal: 값을 SQL 문자열에 넣어 보내므로 매번 파싱/계획 (이전 방식)
+    - prepared: 커넥션별로 한 번 PREPARE 한 뒤 EXECUTE (현재 방식)
+    """
+    from db_utils import db_manager
+    from search_backends import ParadeDBSearchBackend
+
+    samples = samples or SEARCH_SQL_SAMPLES
+    timings = {
+        style: {"planning_ms": [], "execution_ms": [], "wall_ms": []}
+        for style in ("literal", "prepared")
+    }
+
+    with db_manager.connection() as db:
+        with db.cursor() as cursor:
+            for i in range(iterations):
+                keyword, law_name = samples[i % len(samples)]
+                name, sql_query, param_types = ParadeDBSearchBackend.build_search_sql(
+                    law_name is not None, include_content=True
+                )
+                params = (keyword, law_name, 40) if law_name else (keyword, 40)
+                literal_sql = _client_bound_sql(sql_query)
+                execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})"
+
+                # 이전 방식: 값이 들어간 SQL 문자열
+                start = time.perf_counter()
+                cursor.execute(literal_sql, params)
+                cursor.fetchall()
+                timings["literal"]["wall_ms"].append((time.perf_counter() - start) * 1000)
+                planning, execution = _explain(cursor, literal_sql, params)
+                timings["literal"]["planning_ms"].append(planning)
+                timings["literal"]["execution_ms"].append(execution)
+
+                # 현재 방식: prepared statement (첫 실행에만 PREPARE)
+                start = time.perf_counter()
+                db_manager._execute_prepared_statement(
+                    db, cursor, name, sql_query, param_types, params
+                )
+                cursor.fetchall()
+                timings["prepared"]["wall_ms"].append((time.perf_counter() - start) * 1000)
+                planning, execution = _explain(cursor, execute_sql, params)
+                timings["prepared"]["planning_ms"].append(planning)
+                timings["prepared"]["execution_ms"].append(execution)
+        db.rollback()
+
+    summary = {}
+    for style, style_timings in timings.items():
+        summary[style] = {}
+        for metric, values in style_timings.items():
+            values = sorted(values)
+            summary[style][f"{metric}_mean"] = sum(values) / len(values)
+            summary[style][f"{metric}_p50"] = values[len(values) // 2]
+    return summary
+
+
+def print_search_sql_report(summary: Dict[str, Dict[str, float]], iterations: int) -> None:
+    print("=" * 80)
+    print(f"🔍 검색 SQL 비교--> {iterations}회 (단위: ms)")
+    print(f"{'지표':<24}{'literal':>14}{'prepared':>14}{'변화':>12}")
+    for metric in summary["literal"]:
+        before = summary["literal"][metric]
+        after = summary["prepared"][metric]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{metric:<24}{before:>14.3f}{after:>14.3f}{change:>12}")
+    print("=" * 80)
+
+
+def run_llm_pool_benchmark(iterations: int = 200) -> Dict[str, Dict[str, float]]:
+    """지연 없는 mock LLM 서버에 작은 요청을 순서대로 보내 호출당 시간(ms)을 비교합니다.
+
+    - unpooled: 호출마다 requests.post (매번 새 TCP 연결, 이전 방식)
+    - pooled: 공용 LLMClient의 keep-alive 커넥션 풀
+    - async_pooled: 이벤트 루프의 AsyncLLMClient (httpx 커넥션 풀)
+    """
+    import asyncio
+    import requests
+    from util_tool_call import LLMClient, AsyncLLMClient
+
+    server = MockLLMServer().start()
+    url = f"{server.base_url}/chat/completions"
+    headers = {"Authorization": "Bearer EMPTY", "Content-Type": "application/json"}
+    data = {
+        "model": "mock-model",
+        "messages": [{"role": "user", "content": "안녕하세요"}],
+        "temperature": 0.7,
+    }
+    timings = {"unpooled": [], "pooled": [], "async_pooled": []}
+
+    async def run_async(client: AsyncLLMClient) -> None:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = await client.post(url, headers=headers, json=data)
+            response.json()
+            timings["async_pooled"].append((time.perf_counter() - start) * 1000)
+        await client.aclose()
+
+    client = LLMClient(pool_size=1)
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            requests.post(url, headers=headers, json=data, timeout=10).json()
+            timings["unpooled"].append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            client.post(url, headers=headers, json=data).json()
+            timings["pooled"].append((time.perf_counter() - start) * 1000)
+
+        asyncio.run(run_async(AsyncLLMClient(pool_size=1)))
+    finally:
+        client.close()
+        server.stop()
+
+    summary = {}
+    for style, values in timings.items():
+        values = sorted(values)
+        summary[style] = {
+            "mean": sum(values) / len(values),
+            "p50": values[len(values) // 2],
+            "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+        }
+    return summary
+
+
+def print_llm_pool_report(summary: Dict[str, Dict[str, float]], iterations: int) -> None:
+    print("=" * 80)
+    print(f"🔍 LLM 커넥션 풀 비교--> {iterations}회 (호출당 ms, mock 서버 지연 0)")
+    print(f"{'방식':<24}{'mean':>12}{'p50':>12}{'p99':>12}{'변화(mean)':>14}")
+    before = summary["unpooled"]["mean"]
+    for style, stats in summary.items():
+        change = f"{(stats['mean'] - before) / before * 100:+.1f}%" if before else "-"
+        print(
+            f"{style:<24}{stats['mean']:>12.3f}{stats['p50']:>12.3f}"
+            f"{stats['p99']:>12.3f}{change:>14}"
+        )
+    print("=" * 80)
+
+
+def load_questions(path: str) -> List[str]:
+    """한 줄에 질문 하나씩 적힌 파일을 읽습니다. (빈 줄 무시)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="find_relevant_laws 오프라인 벤치마크")
+    parser.add_argument("--latency", type=float, default=0.2, help="LLM 응답 지연(초)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="SQL 쿼리 지연(초)")
+    parser.add_argument(
+        "--chunks-per-topic", type=int, default=3, help="법령별 주제당 시드 청크 수"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="질문 목록 반복 횟수")
+    parser.add_argument("--questions", help="질문 파일 (한 줄에 하나)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="기준값 파일")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="현재 결과를 기준값으로 저장"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="기준값보다 이 비율(%%) 넘게 나빠진 지표가 있으면 종료 코드 1",
+    )
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 로그 출력")
+    parser.add_argument(
+        "--search-backend",
+        choices=["paradedb", "sqlite"],
+        default="paradedb",
+        help="paradedb: 시드 DB의 검색 SQL, sqlite: 시드 청크로 만든 SQLite FTS5 검색",
+    )
+    parser.add_argument(
+        "--keyword-extractor",
+        choices=["llm", "local"],
+        default="llm",
+        help="llm: keyword_extraction 프롬프트, local: 시드 청크 어휘 사전 기반 로컬 추출기",
+    )
+    parser.add_argument(
+        "--search-sql",
+        type=int,
+        metavar="N",
+        help="mock 대신 실제 PostgreSQL에서 검색 SQL(literal/prepared)을 N회씩 비교",
+    )
+    parser.add_argument(
+        "--llm-pool",
+        type=int,
+        metavar="N",
+        help="mock LLM 서버로 풀 없는 호출과 커넥션 풀 호출의 호출당 시간을 N회씩 비교",
+    )
+    args = parser.parse_args(argv)
+
+    if args.llm_pool:
+        print_llm_pool_report(run_llm_pool_benchmark(args.llm_pool), args.llm_pool)
+        return 0
+
+    if args.search_sql:
+        print_search_sql_report(run_search_sql_benchmark(args.search_sql), args.search_sql)
+        return 0
+
+    questions = load_questions(args.questions) if args.questions else DEFAULT_QUESTIONS
+    result = run_benchmark(
+        questions,
+        latency=args.latency,
+        db_latency=args.db_latency,
+        chunks_per_topic=args.chunks_per_topic,
+        repeat=args.repeat,
+        verbose=args.verbose,
+        search_backend=args.search_backend,
+        keyword_extractor=args.keyword_extractor,
+    )
+
+    comparison = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != result["settings"]:
+            print(f"⚠️ 기준값과 측정 설정이 다릅니다: {baseline.get('settings')}")
+        comparison = compare_with_baseline(result, baseline)
+
+    print_report(result, comparison)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"기준값 저장: {args.baseline}")
+
+    if comparison and args.max_regression is not None:
+        regressions = [
+            row
+            for row in comparison
+            if row["change"] is not None
+            and row["change"] > args.max_regression
+            # 수 밀리초 수준의 흔들림은 무시
+            and abs(row["current"] - row["baseline"]) >= 0.01
+        ]
+        if regressions:
+            print(
+                "⚠️ 기준값보다 나빠진 지표:",
+                ", ".join(row["metric"] for row in regressions),
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
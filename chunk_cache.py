@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from dotenv import load_dotenv
+from db_utils import db_manager
+
+# .env 파일 로드
+load_dotenv()
+
+
+class ChunkTextCache:
+    """chunk id → 법령 내용(text)을 보관하는 메모리 캐시 (바이트 상한 + LRU)
+
+    코퍼스 버전 토큰이 바뀌면 캐시 전체를 비웁니다. 버전은 호출자가 set_corpus_version()으로
+    직접 알려주거나, version_loader를 지정하면 version_check_interval 초마다 다시 읽어 확인합니다.
+
+    환경변수:
+    - CHUNK_CACHE: "True"이면 캐시 사용 (기본값: 사용 안 함)
+    - CHUNK_CACHE_MAX_BYTES: 캐시 최대 크기 (기본값: 32MB, UTF-8 기준)
+    - CHUNK_CACHE_VERSION_SQL: 코퍼스 버전을 조회하는 SQL (예: "SELECT max(updated_at) FROM chunk")
+    - CHUNK_CACHE_VERSION_INTERVAL: 버전 확인 주기(초) (기본값: 60)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        max_bytes: int = None,
+        version_loader: Callable[[], Any] = None,
+        version_check_interval: float = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("CHUNK_CACHE") == "True"
+        self.enabled = enabled
+        self.max_bytes = max_bytes or int(
+            os.getenv("CHUNK_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+        )
+        self.version_loader = version_loader
+        self.version_check_interval = version_check_interval or float(
+            os.getenv("CHUNK_CACHE_VERSION_INTERVAL", "60")
+        )
+
+        self._lock = threading.Lock()
+        self._texts = OrderedDict()  # chunk id -> (text, 바이트 크기)
+        self._bytes = 0
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def set_corpus_version(self, version: Any) -> None:
+        """코퍼스 버전을 설정합니다. 이전 버전과 다르면 캐시를 비웁니다."""
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self.invalidations += 1
+                self._texts.clear()
+                self._bytes = 0
+                self._version = version
+
+    def _refresh_version(self) -> None:
+        """version_loader가 있으면 주기적으로 코퍼스 버전을 확인합니다."""
+        if self.version_loader is None:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        try:
+            self.set_corpus_version(self.version_loader())
+        except Exception as e:
+            print(f"코퍼스 버전 확인 오류: {e}")
+
+    def get_many(self, ids: List[int]) -> Tuple[Dict[int, str], List[int]]:
+        """캐시에 있는 내용(id → text)과 캐시에 없는 id 목록을 반환합니다."""
+        self._refresh_version()
+        found = {}
+        missing = []
+        with self._lock:
+            for id in ids:
+                entry = self._texts.get(id)
+                if entry is None:
+                    missing.append(id)
+                else:
+                    self._texts.move_to_end(id)
+                    found[id] = entry[0]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def get(self, id: int) -> Optional[str]:
+        """캐시된 내용을 반환합니다. 없으면 None을 반환합니다."""
+        found, _ = self.get_many([id])
+        return found.get(id)
+
+    def put_many(self, texts: Dict[int, str]) -> None:
+        """내용을 저장하고 크기 상한을 넘으면 가장 오래 사용되지 않은 항목부터 지웁니다."""
+        with self._lock:
+            for id, text in texts.items():
+                size = len(text.encode("utf-8"))
+                if size > self.max_bytes:
+                    continue
+                if id in self._texts:
+                    self._bytes -= self._texts.pop(id)[1]
+                self._texts[id] = (text, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes and self._texts:
+                _, (_, size) = self._texts.popitem(last=False)
+                self._bytes -= size
+
+    def put(self, id: int, text: str) -> None:
+        """내용 하나를 저장합니다."""
+        self.put_many({id: text})
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 항목 수, 크기, 적중/미스 횟수를 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._texts),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "corpus_version": self._version,
+            }
+
+    def clear(self) -> None:
+        """캐시를 비웁니다."""
+        with self._lock:
+            self._texts.clear()
+            self._bytes = 0
+
+
+def _load_corpus_version_from_db() -> Any:
+    """CHUNK_CACHE_VERSION_SQL을 실행하여 코퍼스 버전을 읽습니다."""
+    result = db_manager.execute_query_single(os.getenv("CHUNK_CACHE_VERSION_SQL"))
+    if "error" in result:
+        raise Exception(result["error"])
+    return list(result["result"].values())[0]
+
+
+# 전역 인스턴스 생성 (CHUNK_CACHE=True일 때만 동작)
+chunk_cache = ChunkTextCache(
+    version_loader=(
+        _load_corpus_version_from_db if os.getenv("CHUNK_CACHE_VERSION_SQL") else None
+    )
+)
@@ -0,0 +1,76 @@
+import os
+from typing import List, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# "True"이면 사전 필터를 사용 (기본값: 사용 안 함, 검색 결과 전체를 충분성 검사에 보냄)
+# 청크를 제외하면 충분성 판단이 달라질 수 있으므로, 아래 기준값을 데이터에 맞게 조정한 뒤 켬
+CHUNK_PREFILTER = os.getenv("CHUNK_PREFILTER", "False") == "True"
+
+# 검색 키워드 중 청크에 등장하는 단어의 비율이 이 값 미만이면 어휘 겹침이 낮은 것으로 봄
+CHUNK_PREFILTER_MIN_OVERLAP = float(os.getenv("CHUNK_PREFILTER_MIN_OVERLAP", "0.5"))
+
+# 검색 점수가 1위 점수의 이 비율 미만이면 점수가 낮은 것으로 봄
+CHUNK_PREFILTER_MIN_SCORE_RATIO = float(
+    os.getenv("CHUNK_PREFILTER_MIN_SCORE_RATIO", "0.5")
+)
+
+# 검색 순위가 이 값 이내인 청크는 항상 남김
+CHUNK_PREFILTER_MIN_KEEP = int(os.getenv("CHUNK_PREFILTER_MIN_KEEP", "5"))
+
+
+def keyword_terms(keywords: List[str]) -> List[str]:
+    """검색 키워드들을 중복 없는 단어 목록으로 나눕니다. ("경미한 사항" → "경미한", "사항")"""
+    terms = []
+    for keyword in keywords:
+        for term in keyword.split():
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def term_overlap(text: str, terms: List[str]) -> float:
+    """단어 중 청크 내용에 포함된 단어의 비율을 반환합니다. (조사가 붙어도 포함으로 봄)"""
+    if not terms:
+        return 1.0
+    return sum(1 for term in terms if term in text) / len(terms)
+
+
+def prefilter_law_chunks(
+    law_chunks: List,
+    keywords: List[str],
+    min_overlap: float = None,
+    min_score_ratio: float = None,
+    min_keep: int = None,
+) -> Tuple[List, int]:
+    """충분성 검사(LLM) 전에 검색 키워드와 거의 관계없는 청크를 걸러냅니다.
+
+    검색 순위가 min_keep 밖이면서 키워드 겹침 비율(min_overlap)과 1위 대비 검색 점수 비율
+    (min_score_ratio)이 모두 낮은 청크만 제외합니다. law_chunks는 점수 순이며 .text와 .score를
+    가져야 합니다. (남은 청크 목록, 제외한 청크 수)를 점수 순서 그대로 반환합니다.
+    """
+    if not CHUNK_PREFILTER:
+        return law_chunks, 0
+
+    min_overlap = CHUNK_PREFILTER_MIN_OVERLAP if min_overlap is None else min_overlap
+    min_score_ratio = (
+        CHUNK_PREFILTER_MIN_SCORE_RATIO if min_score_ratio is None else min_score_ratio
+    )
+    min_keep = CHUNK_PREFILTER_MIN_KEEP if min_keep is None else min_keep
+
+    terms = keyword_terms(keywords)
+    top_score = max((chunk.score or 0 for chunk in law_chunks), default=0)
+
+    kept = []
+    for rank, chunk in enumerate(law_chunks):
+        if rank < min_keep:
+            kept.append(chunk)
+            continue
+        # 점수를 비교할 수 없으면 점수는 충분한 것으로 봄
+        score_ratio = (chunk.score or 0) / top_score if top_score > 0 else 1.0
+        if term_overlap(chunk.text, terms) >= min_overlap or score_ratio >= min_score_ratio:
+            kept.append(chunk)
+
+    return kept, len(law_chunks) - len(kept)
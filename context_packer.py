@@ -0,0 +1,227 @@
+import os
+import re
+import hashlib
+from typing import List, Dict, Any, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 최종 답변 LLM 호출에 넣을 법령 내용의 최대 토큰 수
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+
+# 이 값 이상 겹치면(문자 shingle 자카드 유사도) 거의 같은 청크로 보고 제외
+CONTEXT_NEAR_DUPLICATE_THRESHOLD = float(
+    os.getenv("CONTEXT_NEAR_DUPLICATE_THRESHOLD", "0.9")
+)
+
+# 충분성 검사/추가 검색 필요성 확인 프롬프트 하나에 넣을 법령 내용의 최대 토큰 수와 청크 수
+LAW_BATCH_MAX_TOKENS = int(os.getenv("LAW_BATCH_MAX_TOKENS", "6000"))
+LAW_BATCH_MAX_ITEMS = int(os.getenv("LAW_BATCH_MAX_ITEMS", "10"))
+
+# 충분성 판단 결과별 우선순위 (높을수록 먼저 포함)
+VERDICT_PRIORITY = {"충분함": 2, "부분적 충분함": 1}
+
+# 한글, 한자, 가나 등 글자 하나가 대략 토큰 하나 이상이 되는 문자
+_WIDE_CHAR_PATTERN = re.compile(
+    r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u9fff\uac00-\ud7a3]"
+)
+_SHINGLE_SIZE = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 텍스트의 토큰 수를 보수적으로(조금 많게) 추정합니다.
+
+    한글/한자는 글자당 1토큰, 그 밖의 문자는 공백을 제외하고 3글자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    wide_chars = len(_WIDE_CHAR_PATTERN.findall(text))
+    other_chars = len(re.sub(r"\s", "", text)) - wide_chars
+    return wide_chars + (other_chars + 2) // 3
+
+
+def _normalize(text: str) -> str:
+    """중복 비교를 위해 공백을 정리합니다."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _shingles(text: str) -> set:
+    """근사 중복 비교에 쓰는 문자 n-gram 집합을 만듭니다."""
+    compact = text.replace(" ", "")
+    if len(compact) <= _SHINGLE_SIZE:
+        return {compact}
+    return {
+        compact[i : i + _SHINGLE_SIZE] for i in range(len(compact) - _SHINGLE_SIZE + 1)
+    }
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _preview(text: str) -> str:
+    """보고용으로 청크의 첫 줄을 짧게 잘라 반환합니다."""
+    return text.strip().split("\n")[0][:60]
+
+
+def pack_law_contexts(
+    chunks: List[Any],
+    token_budget: int = None,
+    near_duplicate_threshold: float = None,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """수집한 법령 청크들을 우선순위대로 정렬하고 중복을 제거한 뒤 토큰 예산 안에서 고릅니다.
+
+    chunks의 각 항목은 text, score(검색 점수), verdict(충분성 판단) 속성을 가진 LawChunk입니다.
+    우선순위는 충분성 판단 → 검색 점수 → 수집 순서 순입니다.
+
+    반환값: (포함된 청크 목록, 보고서)
+
+    사용 예시:
+    packed, report = pack_law_contexts(chunks, token_budget=8000)
+    combined = "\\n\\n".join(chunk.text for chunk in packed)
+    print(report["dropped"])
+    """
+    token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+    if near_duplicate_threshold is None:
+        near_duplicate_threshold = CONTEXT_NEAR_DUPLICATE_THRESHOLD
+
+    # 우선순위 정렬 (같으면 수집 순서 유지)
+    ranked = sorted(
+        enumerate(chunks),
+        key=lambda item: (
+            -VERDICT_PRIORITY.get(item[1].verdict, 0),
+            -(item[1].score or 0),
+            item[0],
+        ),
+    )
+
+    packed = []
+    dropped = []
+    seen_hashes = set()
+    kept_shingles = []
+    used_tokens = 0
+    separator_tokens = estimate_tokens("\n\n")
+
+    for _, chunk in ranked:
+        text = chunk.text
+        normalized = _normalize(text)
+        tokens = estimate_tokens(text)
+
+        # 완전히 같은 내용
+        text_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if text_hash in seen_hashes:
+            dropped.append(
+                {"reason": "duplicate", "preview": _preview(text), "tokens": tokens}
+            )
+            continue
+        seen_hashes.add(text_hash)
+
+        # 거의 같은 내용
+        shingles = _shingles(normalized)
+        if any(
+            _jaccard(shingles, kept) >= near_duplicate_threshold
+            for kept in kept_shingles
+        ):
+            dropped.append(
+                {"reason": "near_duplicate", "preview": _preview(text), "tokens": tokens}
+            )
+            continue
+
+        # 토큰 예산 확인 (넘치는 청크는 건너뛰고 더 작은 청크로 계속 채움)
+        needed = tokens + (separator_tokens if packed else 0)
+        if used_tokens + needed > token_budget:
+            dropped.append(
+                {"reason": "budget", "preview": _preview(text), "tokens": tokens}
+            )
+            continue
+
+        kept_shingles.append(shingles)
+        packed.append(chunk)
+        used_tokens += needed
+
+    report = {
+        "budget": token_budget,
+        "used_tokens": used_tokens,
+        "kept": len(packed),
+        "dropped": dropped,
+    }
+    return packed, report
+
+
+# 배치 프롬프트에서 청크마다 붙는 구분자와 번호 ("\n\n---\n\n10번 법령:\n")
+_BATCH_ITEM_OVERHEAD_TOKENS = estimate_tokens("\n\n---\n\n10번 법령:\n")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """텍스트를 추정 토큰 수가 max_tokens 이하가 되도록 뒤에서부터 자릅니다."""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    suffix = "\n...(이하 생략)"
+    max_tokens -= estimate_tokens(suffix)
+    end = len(text)
+    while end > 0 and tokens > max_tokens:
+        # 넘친 비율만큼 줄이되 최소 한 글자씩 줄임
+        end = min(end - 1, int(end * max_tokens / tokens))
+        tokens = estimate_tokens(text[:end])
+    return text[:end] + suffix
+
+
+def _greedy_batches(
+    token_counts: List[int], max_tokens: int, max_items: int
+) -> List[Tuple[int, int]]:
+    """순서를 유지하며 한도 안에서 최대한 채운 배치들의 (시작, 끝) 위치를 반환합니다."""
+    ranges = []
+    start = 0
+    used_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if i > start and (i - start >= max_items or used_tokens + tokens > max_tokens):
+            ranges.append((start, i))
+            start = i
+            used_tokens = 0
+        used_tokens += tokens
+    if start < len(token_counts):
+        ranges.append((start, len(token_counts)))
+    return ranges
+
+
+def build_token_batches(
+    chunks: List[Any], max_tokens: int = None, max_items: int = None
+) -> List[List[Any]]:
+    """법령 청크들을 추정 토큰 수 기준으로 배치로 나눕니다. (검색 순서 유지)
+
+    배치마다 법령 내용이 max_tokens, 청크 수가 max_items를 넘지 않게 하되, 배치 수는 그대로 두고
+    배치 크기를 최대한 고르게 맞춥니다. (동시에 보낸 배치들의 prefill 시간이 비슷해지도록)
+    혼자서 max_tokens를 넘는 청크는 단독 배치가 되며, 프롬프트에는 truncate_to_tokens로 잘라 넣습니다.
+
+    사용 예시:
+    for batch in build_token_batches(law_chunks):
+        texts = [chunk.text for chunk in batch]
+    """
+    max_tokens = max_tokens or LAW_BATCH_MAX_TOKENS
+    max_items = max_items or LAW_BATCH_MAX_ITEMS
+    if not chunks:
+        return []
+
+    token_counts = [
+        min(estimate_tokens(chunk.text), max_tokens) + _BATCH_ITEM_OVERHEAD_TOKENS
+        for chunk in chunks
+    ]
+    ranges = _greedy_batches(token_counts, max_tokens, max_items)
+
+    # 같은 배치 수로 한도를 평균 크기 근처까지 낮춰서 다시 나눔 (배치 수가 늘어나면 처음 결과 사용)
+    batch_count = len(ranges)
+    if batch_count > 1:
+        # 평균에 가장 큰 청크 하나만큼 여유를 두면 배치 수가 늘어나지 않음
+        balanced_tokens = -(-sum(token_counts) // batch_count) + max(token_counts)
+        balanced_items = -(-len(chunks) // batch_count)
+        balanced = _greedy_batches(
+            token_counts, min(max_tokens, balanced_tokens), balanced_items
+        )
+        if len(balanced) == batch_count:
+            ranges = balanced
+
+    return [chunks[start:end] for start, end in ranges]
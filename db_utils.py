@@ -1,10 +1,206 @@
 import psycopg2
-from typing import List, Dict, Any
+import psycopg2.extensions
+from typing import List, Dict, Any, Callable, Iterator, Tuple
+from contextlib import contextmanager
+from collections import deque
+import itertools
+import threading
+import weakref
+import time
 import os
+from tracing import tracer
+
+
+class PoolTimeoutError(Exception):
+    """커넥션 풀에서 제한 시간 안에 커넥션을 얻지 못한 경우 발생하는 예외"""
+
+
+class ConnectionPool:
+    """스레드 안전한 psycopg2 커넥션 풀
+
+    - 최대 max_size개까지 커넥션을 열고, 모두 사용 중이면 timeout 초 동안 반납을 기다립니다.
+    - max_idle_time 초 이상 사용되지 않은 커넥션은 min_size개만 남기고 닫습니다.
+    - health_check_interval 초 이상 쉬었던 커넥션은 꺼내기 전에 "SELECT 1"로 상태를 확인합니다.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle_time: float = 300,
+        health_check_interval: float = 30,
+        timeout: float = 30,
+    ):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+
+        self._idle = deque()  # (커넥션, 마지막 반납 시각)
+        self._size = 0  # 열려 있는 전체 커넥션 수 (사용 중 + 대기 중)
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _evict_idle(self) -> List:
+        """오래 쉬고 있는 커넥션을 min_size개만 남기고 풀에서 꺼냅니다. (lock 안에서 호출)"""
+        now = time.monotonic()
+        evicted = []
+        # 가장 오래된 커넥션이 왼쪽에 있음
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle_time
+        ):
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            evicted.append(conn)
+        return evicted
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        """커넥션이 사용 가능한 상태인지 확인합니다."""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        """풀에서 커넥션을 꺼냅니다. 사용 후에는 반드시 putconn으로 반납해야 합니다."""
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise PoolTimeoutError("커넥션 풀이 닫혔습니다.")
+                evicted = self._evict_idle()
+
+                conn = None
+                while conn is None:
+                    if self._idle:
+                        # 가장 최근에 반납된 커넥션부터 사용 (LIFO)
+                        conn, last_used = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        last_used = None
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                f"{self.timeout:g}초 안에 DB 커넥션을 얻지 못했습니다. (최대 {self.max_size}개 사용 중)"
+                            )
+                        self._condition.wait(remaining)
+
+            for evicted_conn in evicted:
+                self._close_quietly(evicted_conn)
+
+            # 새 커넥션 생성 (lock 밖에서 연결)
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+
+            if self._is_healthy(conn, last_used):
+                return conn
+
+            # 끊어진 커넥션은 버리고 다시 시도
+            self._close_quietly(conn)
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """커넥션을 풀에 반납합니다. discard=True이면 닫고 버립니다."""
+        if not discard and not conn.closed:
+            try:
+                # 열려 있는 트랜잭션이 있으면 정리 후 반납
+                if (
+                    conn.get_transaction_status()
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._condition.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """with 문으로 커넥션을 빌려 쓰고 자동으로 반납합니다."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # 연결 자체에 문제가 있으면 풀에 돌려놓지 않음
+            self.putconn(conn, discard=True)
+            raise
+        except BaseException:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        """대기 중인 커넥션을 모두 닫고 풀을 닫습니다."""
+        with self._condition:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """풀 상태(전체, 대기 중, 사용 중 커넥션 수)를 반환합니다."""
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            }
 
 
 class DatabaseManager:
-    """데이터베이스 연결 및 쿼리 실행을 관리하는 클래스"""
+    """데이터베이스 연결 및 쿼리 실행을 관리하는 클래스
+
+    커넥션은 스레드 안전한 풀(ConnectionPool)에서 빌려 쓰고 반납합니다.
+
+    환경변수:
+    - POSTGRES_POOL_MIN: 유휴 상태로도 유지할 최소 커넥션 수 (기본값: 1)
+    - POSTGRES_POOL_MAX: 최대 커넥션 수 (기본값: 10)
+    - POSTGRES_POOL_MAX_IDLE: 유휴 커넥션을 닫기까지의 시간(초) (기본값: 300)
+    - POSTGRES_POOL_HEALTH_CHECK: 이 시간(초) 이상 쉰 커넥션은 사용 전 상태 확인 (기본값: 30)
+    - POSTGRES_POOL_TIMEOUT: 커넥션을 얻기 위해 기다리는 최대 시간(초) (기본값: 30)
+    """
 
     def __init__(self):
         self.host = os.getenv("POSTGRES_HOST")
@@ -13,6 +209,13 @@ class DatabaseManager:
         self.user = os.getenv("POSTGRES_USER")
         self.password = os.getenv("POSTGRES_PASS")
 
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._cursor_counter = itertools.count()
+        # 커넥션(세션)별로 PREPARE 해 둔 statement 이름 (커넥션이 닫혀 버려지면 함께 사라짐)
+        self._prepared_statements = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+
     def _get_connection(self):
         """데이터베이스 연결을 반환합니다."""
         return psycopg2.connect(
@@ -23,6 +226,119 @@ class DatabaseManager:
             password=self.password,
         )
 
+    @property
+    def pool(self) -> ConnectionPool:
+        """커넥션 풀을 반환합니다. (처음 사용할 때 생성)"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self._get_connection,
+                        min_size=int(os.getenv("POSTGRES_POOL_MIN", "1")),
+                        max_size=int(os.getenv("POSTGRES_POOL_MAX", "10")),
+                        max_idle_time=float(os.getenv("POSTGRES_POOL_MAX_IDLE", "300")),
+                        health_check_interval=float(
+                            os.getenv("POSTGRES_POOL_HEALTH_CHECK", "30")
+                        ),
+                        timeout=float(os.getenv("POSTGRES_POOL_TIMEOUT", "30")),
+                    )
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        """풀에서 커넥션을 빌려 with 블록 안에서 사용합니다.
+
+        사용 예시:
+        with db_manager.connection() as db:
+            with db.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        """
+        with self.pool.connection() as db:
+            yield db
+
+    def close(self) -> None:
+        """커넥션 풀을 닫습니다."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    def _execute_prepared_statement(
+        self,
+        db,
+        cursor,
+        name: str,
+        sql_query: str,
+        param_types: Tuple[str, ...],
+        params: tuple,
+    ) -> None:
+        """커넥션에 statement가 없으면 PREPARE 하고, EXECUTE 합니다."""
+        with self._prepared_lock:
+            prepared_names = self._prepared_statements.setdefault(db, set())
+        if name not in prepared_names:
+            # PREPARE는 트랜잭션을 롤백해도 세션이 끝날 때까지 유지됨
+            cursor.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {sql_query}")
+            prepared_names.add(name)
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+
+    def _fetch_all(
+        self, sql_query: str, params: tuple = None, prepared: Tuple = None
+    ) -> Dict[str, Any]:
+        """SELECT 쿼리를 실행하고 결과를 List of Dict 형태로 반환합니다.
+
+        prepared=(statement 이름, 파라미터 타입들)을 주면 sql_query($1, $2 ... 사용)를
+        서버 사이드 prepared statement로 실행합니다.
+        """
+        with tracer.span("db.query", **{"db.statement": sql_query}) as span:
+            try:
+                with self.connection() as db:
+                    with db.cursor() as cursor:
+                        if prepared:
+                            name, param_types = prepared
+                            span.set_attribute("db.prepared_statement", name)
+                            self._execute_prepared_statement(
+                                db, cursor, name, sql_query, param_types, params
+                            )
+                        else:
+                            cursor.execute(sql_query, params)
+                        results = cursor.fetchall()
+
+                        # 컬럼명 가져오기
+                        column_names = [desc[0] for desc in cursor.description]
+
+                # List of Dict 형태로 변환
+                results_dict_list = []
+                for row in results:
+                    row_dict = dict(zip(column_names, row))
+                    results_dict_list.append(row_dict)
+
+                span.set_attribute("db.row_count", len(results_dict_list))
+                return {"results": results_dict_list}
+
+            except Exception as e:
+                print(f"데이터베이스 연결 오류: {e}")
+                span.set_error(str(e))
+                return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+
+    def _execute_write(self, sql_query: str, params: tuple = None) -> Dict[str, Any]:
+        """INSERT/UPDATE/DELETE 쿼리를 실행하고 커밋합니다."""
+        with tracer.span("db.query", **{"db.statement": sql_query}) as span:
+            try:
+                with self.connection() as db:
+                    with db.cursor() as cursor:
+                        cursor.execute(sql_query, params)
+                        affected_rows = cursor.rowcount
+                    db.commit()
+
+                span.set_attribute("db.row_count", affected_rows)
+                return {"affected_rows": affected_rows}
+
+            except Exception as e:
+                print(f"데이터베이스 연결 오류: {e}")
+                span.set_error(str(e))
+                return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+
     def execute_query(self, sql_query: str) -> Dict[str, Any]:
         """임의의 SQL 쿼리를 실행하고 결과를 List of Dict 형태로 반환합니다.
 
@@ -34,29 +350,47 @@ class DatabaseManager:
                 print(f"ID: {user['id']}, Name: {user['name']}, Email: {user['email']}")
         """
         # print("🔍 SQL QUERY-->", sql_query)
-        try:
-            db = self._get_connection()
-            cursor = db.cursor()
-            cursor.execute(sql_query)
-            results = cursor.fetchall()
-
-            # 컬럼명 가져오기
-            column_names = [desc[0] for desc in cursor.description]
+        return self._fetch_all(sql_query)
 
-            # List of Dict 형태로 변환
-            results_dict_list = []
-            for row in results:
-                row_dict = dict(zip(column_names, row))
-                results_dict_list.append(row_dict)
+    def iter_query(
+        self, sql_query: str, params: tuple = None, batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """서버 사이드(named) 커서로 결과를 batch_size 행씩 가져오며 한 행씩 Dict로 반환합니다.
 
-            cursor.close()
-            db.close()
-
-            return {"results": results_dict_list}
+        결과 전체를 메모리에 올리지 않으므로 큰 결과 집합을 처리할 때 사용합니다.
+        오류는 {"error": ...}로 반환하지 않고 예외로 전달됩니다.
 
+        사용 예시:
+        db_manager = DatabaseManager()
+        for row in db_manager.iter_query("SELECT id, text FROM chunk", batch_size=500):
+            print(row["id"])
+        """
+        cursor_name = f"iter_query_{threading.get_ident()}_{next(self._cursor_counter)}"
+        # 제너레이터이므로 현재 구간으로 설정하지 않고, 순회가 끝나거나 멈출 때 닫음
+        span = tracer.start_span("db.iter_query", **{"db.statement": sql_query})
+        row_count = 0
+        try:
+            with self.connection() as db:
+                with db.cursor(name=cursor_name) as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(sql_query, params)
+
+                    column_names = None
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        if column_names is None:
+                            column_names = [desc[0] for desc in cursor.description]
+                        for row in rows:
+                            row_count += 1
+                            yield dict(zip(column_names, row))
         except Exception as e:
-            print(f"데이터베이스 연결 오류: {e}")
-            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+            span.set_error(str(e))
+            raise
+        finally:
+            span.set_attribute("db.row_count", row_count)
+            tracer.end_span(span)
 
     def execute_query_single(self, sql_query: str) -> Dict[str, Any]:
         """단일 결과를 반환하는 SQL 쿼리를 실행합니다.
@@ -114,29 +448,31 @@ class DatabaseManager:
         """
         # print("🔍 SQL QUERY-->", sql_query)
         # print("🔍 PARAMS-->", params)
-        try:
-            db = self._get_connection()
-            cursor = db.cursor()
-            cursor.execute(sql_query, params)
-            results = cursor.fetchall()
-
-            # 컬럼명 가져오기
-            column_names = [desc[0] for desc in cursor.description]
-
-            # List of Dict 형태로 변환
-            results_dict_list = []
-            for row in results:
-                row_dict = dict(zip(column_names, row))
-                results_dict_list.append(row_dict)
-
-            cursor.close()
-            db.close()
+        return self._fetch_all(sql_query, params)
+
+    def execute_prepared(
+        self,
+        name: str,
+        sql_query: str,
+        params: tuple,
+        param_types: Tuple[str, ...],
+    ) -> Dict[str, Any]:
+        """같은 SQL을 자주 실행할 때 서버 사이드 prepared statement로 실행합니다.
 
-            return {"results": results_dict_list}
+        풀의 커넥션마다 처음 한 번만 PREPARE 하고 이후에는 EXECUTE만 하므로
+        쿼리 파싱/계획 비용을 줄이고, 값은 항상 파라미터로 전달됩니다.
+        sql_query에는 $1, $2 ... 자리표시자를 사용하고 끝에 세미콜론을 붙이지 않습니다.
 
-        except Exception as e:
-            print(f"데이터베이스 연결 오류: {e}")
-            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+        사용 예시:
+        db_manager = DatabaseManager()
+        result = db_manager.execute_prepared(
+            "users_by_city",
+            "SELECT id, name FROM users WHERE city = $1 LIMIT $2",
+            ("서울", 10),
+            ("text", "integer"),
+        )
+        """
+        return self._fetch_all(sql_query, params, prepared=(name, param_types))
 
     def execute_insert(self, sql_query: str, params: tuple = None) -> Dict[str, Any]:
         """INSERT 쿼리를 실행합니다.
@@ -154,26 +490,7 @@ class DatabaseManager:
         if params:
             print("🔍 PARAMS-->", params)
 
-        try:
-            db = self._get_connection()
-            cursor = db.cursor()
-
-            if params:
-                cursor.execute(sql_query, params)
-            else:
-                cursor.execute(sql_query)
-
-            affected_rows = cursor.rowcount
-            db.commit()
-
-            cursor.close()
-            db.close()
-
-            return {"affected_rows": affected_rows}
-
-        except Exception as e:
-            print(f"데이터베이스 연결 오류: {e}")
-            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+        return self._execute_write(sql_query, params)
 
     def execute_update(self, sql_query: str, params: tuple = None) -> Dict[str, Any]:
         """UPDATE 쿼리를 실행합니다.
@@ -191,26 +508,7 @@ class DatabaseManager:
         if params:
             print("🔍 PARAMS-->", params)
 
-        try:
-            db = self._get_connection()
-            cursor = db.cursor()
-
-            if params:
-                cursor.execute(sql_query, params)
-            else:
-                cursor.execute(sql_query)
-
-            affected_rows = cursor.rowcount
-            db.commit()
-
-            cursor.close()
-            db.close()
-
-            return {"affected_rows": affected_rows}
-
-        except Exception as e:
-            print(f"데이터베이스 연결 오류: {e}")
-            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+        return self._execute_write(sql_query, params)
 
     def execute_delete(self, sql_query: str, params: tuple = None) -> Dict[str, Any]:
         """DELETE 쿼리를 실행합니다.
@@ -228,26 +526,7 @@ class DatabaseManager:
         if params:
             print("🔍 PARAMS-->", params)
 
-        try:
-            db = self._get_connection()
-            cursor = db.cursor()
-
-            if params:
-                cursor.execute(sql_query, params)
-            else:
-                cursor.execute(sql_query)
-
-            affected_rows = cursor.rowcount
-            db.commit()
-
-            cursor.close()
-            db.close()
-
-            return {"affected_rows": affected_rows}
-
-        except Exception as e:
-            print(f"데이터베이스 연결 오류: {e}")
-            return {"error": f"데이터베이스 연결 오류: {str(e)}"}
+        return self._execute_write(sql_query, params)
 
 
 # 전역 인스턴스 생성 (편의를 위해)
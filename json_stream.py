@@ -0,0 +1,105 @@
+import json
+from typing import List, Any
+
+
+class JSONArrayItemStream:
+    """스트리밍으로 받는 JSON 응답에서 지정한 배열의 항목을 완성되는 대로 꺼내는 증분 파서
+
+    {"results": [{...}, {...}]}처럼 최상위 객체의 key 배열에 담긴 항목(객체/배열)을
+    닫는 괄호가 도착하는 즉시 json.loads로 변환해 돌려줍니다. 최상위가 바로 배열이어도 됩니다.
+    JSON 앞의 <think>...</think> 블록이나 ```json 같은 머리말은 건너뜁니다.
+
+    사용 예시:
+    stream = JSONArrayItemStream("results")
+    for token in tokens:
+        for item in stream.feed(token):
+            print(item["index"], item["verdict"])
+    """
+
+    def __init__(self, key: str = "results"):
+        self.key = key
+        self.text = ""  # 지금까지 받은 전체 응답
+        self.items = 0  # 꺼낸 항목 수
+        self._position = 0  # 다음에 읽을 위치
+        self._started = False  # 최상위 JSON 값을 찾았는지
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key = None  # 최상위 객체에서 마지막으로 읽은 key
+        self._array_depth = None  # 대상 배열 안의 깊이 (배열을 찾기 전에는 None)
+        self._item_start = -1
+        self.done = False  # 대상 배열이 닫혔는지
+
+    def _find_start(self) -> bool:
+        """<think> 블록을 건너뛰고 최상위 JSON 값이 시작하는 위치를 찾습니다."""
+        think_start = self.text.find("<think>", self._position)
+        candidates = [
+            self.text.find(character, self._position) for character in "{["
+        ]
+        brace = min((i for i in candidates if i >= 0), default=-1)
+        if think_start >= 0 and (brace < 0 or think_start < brace):
+            think_end = self.text.find("</think>", think_start)
+            if think_end < 0:
+                return False
+            self._position = think_end + len("</think>")
+            return self._find_start()
+        if brace < 0:
+            # 조각 끝에 걸친 "<think" 태그는 다음 조각과 함께 다시 확인
+            self._position = max(self._position, len(self.text) - len("<think>") + 1)
+            return False
+        self._position = brace
+        self._started = True
+        return True
+
+    def feed(self, text: str) -> List[Any]:
+        """응답 조각을 더하고, 이번 조각으로 완성된 항목들을 순서대로 반환합니다."""
+        self.text += text
+        if self.done or (not self._started and not self._find_start()):
+            return []
+
+        items = []
+        text = self.text
+        position = self._position
+        while position < len(text) and not self.done:
+            character = text[position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif character == "\\":
+                    self._escape = True
+                elif character == '"':
+                    self._in_string = False
+                    # 최상위 객체의 key 문자열이면 기억해 둠
+                    if self._depth == 1 and self._array_depth is None:
+                        self._last_key = text[self._string_start + 1 : position]
+            elif character == '"':
+                self._in_string = True
+                self._string_start = position
+            elif character in "{[":
+                if self._array_depth is None and (
+                    (self._depth == 0 and character == "[")
+                    or (self._depth == 1 and character == "[" and self._last_key == self.key)
+                ):
+                    self._array_depth = self._depth + 1
+                elif self._depth == self._array_depth:
+                    self._item_start = position
+                self._depth += 1
+            elif character in "}]":
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._depth == self._array_depth and self._item_start >= 0:
+                        try:
+                            items.append(json.loads(text[self._item_start : position + 1]))
+                            self.items += 1
+                        except json.JSONDecodeError:
+                            pass
+                        self._item_start = -1
+                    elif self._depth < self._array_depth:
+                        self.done = True
+                elif self._depth == 0:
+                    # 대상 배열이 없는 JSON이 끝남
+                    self.done = True
+            position += 1
+        self._position = position
+        return items
@@ -0,0 +1,353 @@
+"""한국어 법령 질문용 로컬 키워드 추출기
+
+keyword_extraction 프롬프트(LLM 호출) 대신 법령 청크에서 만든 어휘 사전으로 질문의 명사를 찾습니다.
+
+- 질문을 어절로 나누고 조사를 뗀 형태 중 사전에 있는 가장 짧은 형태를 키워드로 사용 ("사항의" → "사항")
+- 사전에 없는 어절은 사전 단어들로 나눌 수 있으면 나눔 ("건축허가신청" → "건축허가", "신청")
+- 불용어("대해", "설명" 등)는 버리고 동의어 사전으로 검색어를 늘림 ("건물" → "건물", "건축물")
+
+환경변수:
+- KEYWORD_EXTRACTOR: "llm" 또는 "local" (기본값: llm, local에서 키워드를 못 찾으면 LLM 사용)
+- KEYWORD_VOCAB_PATH: 어휘 사전 파일 (기본값: keyword_vocab.json, 없으면 검색 백엔드의 청크로 만듦)
+- KEYWORD_VOCAB_MIN_DF: 사전에 넣을 최소 문서 빈도 (기본값: 2)
+- KEYWORD_SYNONYMS_PATH: 동의어 사전 JSON 파일 ({"단어": ["동의어", ...]}, 기본 동의어에 추가)
+- KEYWORD_VOCAB_RETRY_SECONDS: 어휘 사전 로드에 실패한 뒤 다시 시도하기까지의 시간(초) (기본값: 60)
+
+사용 예시:
+python keyword_extractor.py build-vocab keyword_vocab.json
+python keyword_extractor.py extract "건축물의 용적률 완화 기준을 알려줘"
+python keyword_extractor.py agreement questions.txt --output agreement.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Any, Iterable
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 어절 끝에서 뗄 조사 (긴 것부터 확인)
+JOSA = sorted(
+    "에서는 에게서 으로서 으로써 으로는 으로의 에서의 이라는 에서 에게 에는 으로 로서 로써 로는 "
+    "부터 까지 이나 이란 과의 와의 에의 이며 이고 의 에 은 는 이 가 을 를 과 와 로 도 만 란".split(),
+    key=len,
+    reverse=True,
+)
+
+# 질문에 자주 나오지만 검색에는 쓸모없는 단어
+STOPWORDS = set(
+    "관련 관련된 관한 관하여 대해 대하여 대한 경우 내용 설명 방법 무엇 어떻게 어떤 어느 "
+    "알려 알려줘 알려주세요 궁금 궁금합니다 질문 법령 법규 법률 법 조항 조문 이름 번호 포함 인용 "
+    "방식 전체 해당 다음 각 호 이하 이상 및 또는 등 그 이 것 수 때 단 현재 "
+    "대통령령 국토교통부령 시행령 시행규칙".split()
+)
+
+# 기본 동의어 (질문의 일상 표현 → 법령 용어)
+DEFAULT_SYNONYMS = {
+    "건물": ["건축물"],
+    "아파트": ["공동주택"],
+    "부지": ["대지", "토지"],
+    "벌금": ["벌칙", "과태료"],
+    "처벌": ["벌칙"],
+    "주차": ["주차장"],
+    "허락": ["허가"],
+}
+
+# 한 질문에서 뽑을 최대 키워드 수 (동의어 제외)
+MAX_KEYWORDS = 10
+
+_HANGUL_WORD = re.compile(r"[가-힣A-Za-z0-9]+")
+
+
+def _stem_candidates(word: str) -> List[str]:
+    """어절과 조사를 뗀 형태들을 반환합니다. (두 글자 미만은 제외)"""
+    candidates = [word]
+    for josa in JOSA:
+        if word.endswith(josa) and len(word) - len(josa) >= 2:
+            candidates.append(word[: -len(josa)])
+    return candidates
+
+
+def parse_keyword_result(text: str) -> List[str]:
+    """keyword_extraction 프롬프트의 응답("키워드: a, b")을 키워드 목록으로 바꿉니다."""
+    text = text.strip()
+    # 맨 앞에 키워드: 가 있으면 제거
+    if text.startswith("키워드:"):
+        text = text[len("키워드:") :]
+    return [keyword.strip() for keyword in text.split(",") if keyword.strip()]
+
+
+def format_keyword_result(keywords: List[str]) -> str:
+    """키워드 목록을 keyword_extraction 프롬프트의 응답 형식으로 만듭니다."""
+    return "키워드: " + ", ".join(keywords)
+
+
+class LocalKeywordExtractor:
+    """청크 어휘 사전 기반 키워드 추출기 (LLM 호출 없음)
+
+    어휘 사전은 처음 사용할 때 KEYWORD_VOCAB_PATH 파일 또는 검색 백엔드의 청크에서 한 번 만듭니다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        vocab_path: str = None,
+        min_df: int = None,
+        synonyms: Dict[str, List[str]] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("KEYWORD_EXTRACTOR", "llm").lower() == "local"
+        self.enabled = enabled
+        self.vocab_path = vocab_path or os.getenv("KEYWORD_VOCAB_PATH", "keyword_vocab.json")
+        self.min_df = min_df or int(os.getenv("KEYWORD_VOCAB_MIN_DF", "2"))
+        self.retry_seconds = float(os.getenv("KEYWORD_VOCAB_RETRY_SECONDS", "60"))
+        self.synonyms = dict(DEFAULT_SYNONYMS)
+        synonyms_path = os.getenv("KEYWORD_SYNONYMS_PATH")
+        if synonyms_path:
+            with open(synonyms_path, encoding="utf-8") as f:
+                self.synonyms.update(json.load(f))
+        if synonyms:
+            self.synonyms.update(synonyms)
+
+        self._lock = threading.Lock()
+        # 어휘 사전 로드는 한 번에 하나만 (동시에 들어온 첫 요청들은 기다렸다가 결과를 사용)
+        self._load_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """어휘 사전을 비웁니다. 다음 사용 시 다시 읽습니다."""
+        self.vocabulary: Dict[str, int] = {}
+        self.documents = 0
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        # 로드에 실패했을 때 다시 시도할 수 있는 시각 (time.monotonic 기준)
+        self._retry_at = 0.0
+
+    def build(self, texts: Iterable[str]) -> None:
+        """청크 내용들로 어휘 사전(단어 → 문서 빈도)을 만듭니다."""
+        document_frequency = Counter()
+        documents = 0
+        for text in texts:
+            documents += 1
+            words = set()
+            for word in _HANGUL_WORD.findall(text):
+                words.update(_stem_candidates(word))
+            document_frequency.update(words)
+
+        vocabulary = {
+            word: count
+            for word, count in document_frequency.items()
+            if count >= self.min_df and len(word) >= 2
+        }
+        with self._lock:
+            self.vocabulary = vocabulary
+            self.documents = documents
+            self.loaded = True
+
+    def save(self, path: str) -> None:
+        """어휘 사전을 JSON 파일로 저장합니다."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"documents": self.documents, "df": self.vocabulary},
+                f,
+                ensure_ascii=False,
+            )
+
+    def load(self, backend=None) -> None:
+        """어휘 사전 파일을 읽거나, 없으면 검색 백엔드의 청크로 만듭니다. (이미 있으면 생략)
+
+        동시에 호출해도 사전은 한 번만 만듭니다. 만들지 못하면 로드하지 않은 상태로 두고
+        (그동안은 LLM 추출 사용) retry_seconds가 지난 뒤 호출될 때 다시 시도합니다.
+        """
+        with self._load_lock:
+            if self.loaded or time.monotonic() < self._retry_at:
+                return
+            try:
+                if os.path.exists(self.vocab_path):
+                    with open(self.vocab_path, encoding="utf-8") as f:
+                        data = json.load(f)
+                    with self._lock:
+                        self.vocabulary = data["df"]
+                        self.documents = data["documents"]
+                        self.loaded = True
+                else:
+                    if backend is None:
+                        from search_backends import search_backend as backend
+                    self.build(backend.iter_texts())
+            except Exception as e:
+                print(f"어휘 사전 로드 오류: {e}")
+                self._retry_at = time.monotonic() + self.retry_seconds
+                return
+            print(
+                f"🔍 어휘 사전 로드--> {len(self.vocabulary)}개 단어 ({self.documents}개 청크)"
+            )
+
+    def _segment(self, word: str) -> List[str]:
+        """사전에 없는 어절을 사전 단어들로 나눕니다. (왼쪽부터 가장 긴 단어, 나눌 수 없으면 빈 목록)"""
+        for stem in reversed(_stem_candidates(word)):
+            segments = []
+            start = 0
+            while start < len(stem):
+                end = next(
+                    (
+                        end
+                        for end in range(len(stem), start + 1, -1)
+                        if stem[start:end] in self.vocabulary
+                    ),
+                    None,
+                )
+                if end is None:
+                    break
+                segments.append(stem[start:end])
+                start = end
+            if start == len(stem) and len(segments) > 1:
+                return segments
+        return []
+
+    def extract(self, text: str) -> List[str]:
+        """질문에서 검색 키워드를 등장 순서대로 추출합니다. (동의어는 원래 단어 바로 뒤에 추가)"""
+        keywords = []
+        for word in _HANGUL_WORD.findall(text):
+            # 조사를 뗀 형태 중 사전(또는 동의어 사전)에 있는 가장 짧은 형태
+            stems = [
+                c
+                for c in _stem_candidates(word)
+                if c in self.vocabulary or c in self.synonyms
+            ]
+            found = [min(stems, key=len)] if stems else self._segment(word)
+            for stem in found:
+                if stem in STOPWORDS or stem in keywords:
+                    continue
+                keywords.append(stem)
+        keywords = keywords[:MAX_KEYWORDS]
+
+        expanded = []
+        for keyword in keywords:
+            for term in [keyword] + self.synonyms.get(keyword, []):
+                if term not in expanded:
+                    expanded.append(term)
+
+        with self._lock:
+            if expanded:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return expanded
+
+    def stats(self) -> Dict[str, Any]:
+        """사전 크기와 추출 성공/실패(LLM 사용) 횟수를 반환합니다."""
+        with self._lock:
+            return {
+                "vocabulary": len(self.vocabulary),
+                "documents": self.documents,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def keyword_agreement(llm_keywords: List[str], local_keywords: List[str]) -> Dict[str, float]:
+    """두 키워드 목록의 일치도를 단어 단위로 계산합니다. (LLM 결과를 정답으로 보고 precision/recall)"""
+    llm_words = {word for keyword in llm_keywords for word in keyword.split()}
+    local_words = {word for keyword in local_keywords for word in keyword.split()}
+    common = llm_words & local_words
+    union = llm_words | local_words
+    return {
+        "precision": len(common) / len(local_words) if local_words else 0.0,
+        "recall": len(common) / len(llm_words) if llm_words else 0.0,
+        "jaccard": len(common) / len(union) if union else 1.0,
+    }
+
+
+async def ameasure_agreement(
+    questions: List[str], extractor: "LocalKeywordExtractor" = None, output_path: str = None
+) -> Dict[str, Any]:
+    """질문들에 대해 LLM 추출 결과와 로컬 추출 결과를 비교하여 평균 일치도를 반환합니다."""
+    from util_tool_call import SimpleToolCaller
+    from prompts import generate_prompt
+
+    extractor = extractor or keyword_extractor
+    extractor.load()
+    caller = SimpleToolCaller()
+
+    async def llm_keywords(question: str) -> List[str]:
+        result = await caller.achat(
+            generate_prompt("keyword_extraction", query=question), with_tools=False
+        )
+        return parse_keyword_result(result)
+
+    llm_results = await asyncio.gather(*[llm_keywords(q) for q in questions])
+
+    records = []
+    for question, llm_result in zip(questions, llm_results):
+        local_result = extractor.extract(question)
+        records.append(
+            {
+                "question": question,
+                "llm": llm_result,
+                "local": local_result,
+                **keyword_agreement(llm_result, local_result),
+            }
+        )
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    summary = {"questions": len(records)}
+    for metric in ("precision", "recall", "jaccard"):
+        summary[metric] = (
+            sum(record[metric] for record in records) / len(records) if records else 0.0
+        )
+    return summary
+
+
+# 전역 인스턴스 생성 (KEYWORD_EXTRACTOR=local일 때만 LLM 대신 사용)
+keyword_extractor = LocalKeywordExtractor()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="로컬 키워드 추출기 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build-vocab", help="어휘 사전 만들기")
+    build_parser.add_argument("path", help="만들 어휘 사전 파일 경로")
+    build_parser.add_argument("--jsonl", help="청크 JSONL 파일 (없으면 검색 백엔드에서 읽음)")
+    extract_parser = subparsers.add_parser("extract", help="질문에서 키워드 추출")
+    extract_parser.add_argument("question")
+    agreement_parser = subparsers.add_parser("agreement", help="LLM 추출 결과와 일치도 측정")
+    agreement_parser.add_argument("questions", help="질문 파일 (한 줄에 하나)")
+    agreement_parser.add_argument("--output", help="질문별 비교 결과 JSONL 파일")
+    args = parser.parse_args(argv)
+
+    if args.command == "build-vocab":
+        if args.jsonl:
+            from search_backends import iter_jsonl_chunks
+
+            texts = (chunk["text"] for chunk in iter_jsonl_chunks(args.jsonl))
+        else:
+            from search_backends import search_backend
+
+            texts = search_backend.iter_texts()
+        keyword_extractor.build(texts)
+        keyword_extractor.save(args.path)
+        print(f"🔍 어휘 사전 생성--> {args.path} ({len(keyword_extractor.vocabulary)}개 단어)")
+    elif args.command == "extract":
+        keyword_extractor.load()
+        print("🔍 추출한 키워드-->", keyword_extractor.extract(args.question))
+    elif args.command == "agreement":
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        summary = asyncio.run(ameasure_agreement(questions, output_path=args.output))
+        print("🔍 키워드 일치도-->", summary)
+
+
+if __name__ == "__main__":
+    main()
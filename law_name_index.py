@@ -0,0 +1,212 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Iterable, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 법률명 바로 뒤에 오는 조항 번호 (예: "제18조의14", "제32조 제3항", "별표 1", "별지 제16호")
+_ARTICLE_PATTERN = re.compile(
+    r"\s*(?:의\s*)?"
+    r"(?:(?P<article>제\s*\d+\s*조(?:\s*의\s*\d+)?)(?:\s*(?P<paragraph>제\s*\d+\s*항))?"
+    r"|(?P<appendix>별표|별지|부칙)\s*(?:제\s*)?(?P<appendix_number>\d+)?(?P<item>\s*호)?)"
+)
+
+# 법률명 앞에 이 문자가 붙어 있으면 더 긴 단어의 일부로 보고 무시 (예: "국민법"의 "민법")
+_WORD_CHARACTER = re.compile(r"[가-힣A-Za-z0-9]")
+
+
+def normalize_law_name(text: str) -> str:
+    """법률명을 검색 SQL의 keyword1과 같은 형식(공백 제거)으로 바꿉니다."""
+    return re.sub(r"\s+", "", text)
+
+
+def _format_article(match: re.Match) -> str:
+    """조항 번호를 LLM 추출 결과와 같은 형식(공백 제거, "별지16호")으로 바꿉니다."""
+    if match.group("article"):
+        article = normalize_law_name(match.group("article"))
+        if match.group("paragraph"):
+            article += " " + normalize_law_name(match.group("paragraph"))
+        return article
+    article = match.group("appendix") + (match.group("appendix_number") or "")
+    if match.group("appendix_number") and match.group("item"):
+        article += "호"
+    return article
+
+
+class LawNameIndex:
+    """알려진 법률명(keyword1)으로 만든 Aho-Corasick 자동자
+
+    질문의 공백을 제거한 뒤 한 번 훑어서 법률명을 찾고(겹치면 더 앞에서 시작하는 것,
+    같은 위치면 더 긴 것 우선), 바로 뒤의 조항 번호(제N조, 별표N 등)도 함께 꺼냅니다.
+    법률명 목록은 처음 사용할 때 검색 백엔드에서 한 번 읽어옵니다.
+
+    환경변수:
+    - LAW_NAME_INDEX: "False"이면 사용 안 함 (기본값: 사용, 찾지 못하면 LLM으로 추출)
+    - LAW_NAME_INDEX_RETRY_SECONDS: 목록 읽기에 실패한 뒤 다시 시도하기까지의 시간(초) (기본값: 60)
+    """
+
+    def __init__(self, enabled: bool = None, retry_seconds: float = None):
+        if enabled is None:
+            enabled = os.getenv("LAW_NAME_INDEX", "True") == "True"
+        self.enabled = enabled
+        self.retry_seconds = (
+            retry_seconds
+            if retry_seconds is not None
+            else float(os.getenv("LAW_NAME_INDEX_RETRY_SECONDS", "60"))
+        )
+        self._lock = threading.Lock()
+        # 법률명 목록 읽기와 자동자 생성은 한 번에 하나만 (동시에 들어온 첫 요청들은 기다렸다가 결과를 사용)
+        self._load_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """자동자를 비웁니다. 다음 사용 시 법률명 목록을 다시 읽습니다."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 상태에서 끝나는 가장 긴 법률명의 길이 (0이면 없음)
+        self._output: List[int] = [0]
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+        # 목록 읽기에 실패했을 때 다시 시도할 수 있는 시각 (time.monotonic 기준)
+        self._retry_at = 0.0
+
+    def build(self, law_names: Iterable[str]) -> None:
+        """법률명 목록으로 자동자를 만듭니다."""
+        goto: List[Dict[str, int]] = [{}]
+        output = [0]
+        size = 0
+        for law_name in law_names:
+            law_name = normalize_law_name(law_name or "")
+            # 한 글자 이름은 오탐이 많으므로 제외
+            if len(law_name) < 2:
+                continue
+            state = 0
+            for character in law_name:
+                next_state = goto[state].get(character)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][character] = next_state
+                    goto.append({})
+                    output.append(0)
+                state = next_state
+            if not output[state]:
+                size += 1
+            output[state] = len(law_name)
+
+        # 실패 링크는 너비 우선으로 계산 (자기 자신이 끝이 아니면 실패 링크의 결과를 물려받음)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and character not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(character, 0)
+                if not output[next_state]:
+                    output[next_state] = output[fail[next_state]]
+                queue.append(next_state)
+
+        with self._lock:
+            self._goto, self._fail, self._output = goto, fail, output
+            self.size = size
+            self.loaded = True
+
+    def load(self, backend) -> None:
+        """검색 백엔드에서 법률명 목록을 읽어 자동자를 만듭니다. (이미 만들었으면 생략)
+
+        동시에 호출해도 목록은 한 번만 읽습니다. 읽기에 실패하면 만들지 않은 상태로 두고
+        (그동안은 LLM 추출 사용) retry_seconds가 지난 뒤 호출될 때 다시 시도합니다.
+        """
+        with self._load_lock:
+            if self.loaded or time.monotonic() < self._retry_at:
+                return
+            try:
+                result = backend.law_names()
+            except Exception as e:
+                result = {"error": str(e)}
+            if "error" in result:
+                print(f"법률명 목록 로드 오류: {result['error']}")
+                self._retry_at = time.monotonic() + self.retry_seconds
+                return
+            self.build(row["keyword1"] for row in result["results"])
+            print(f"🔍 법률명 사전 로드--> {self.size}개")
+
+    def _scan(self, normalized: str) -> List[Tuple[int, int]]:
+        """공백을 제거한 문장에서 (시작, 끝) 위치의 법률명 후보를 모두 찾습니다."""
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for end, character in enumerate(normalized, 1):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if output[state]:
+                matches.append((end - output[state], end))
+        return matches
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """문장에 포함된 법률명과 바로 뒤의 조항 번호를 등장 순서대로 반환합니다.
+
+        반환 형식은 LawSearcher.parse_law_results와 같습니다. (법률명은 문장에 쓰인 그대로)
+        """
+        # 공백 제거 전 위치를 기억해 두고 공백 없는 문장에서 검색
+        positions = [i for i, character in enumerate(text) if not character.isspace()]
+        normalized = "".join(text[i] for i in positions)
+
+        # 앞에서 시작하는 것 우선, 같은 위치면 긴 것 우선으로 겹치지 않게 선택
+        results = []
+        covered_until = 0
+        for start, end in sorted(self._scan(normalized), key=lambda m: (m[0], -m[1])):
+            if start < covered_until:
+                continue
+            original_start = positions[start]
+            original_end = positions[end - 1] + 1
+            if original_start > 0 and _WORD_CHARACTER.match(text[original_start - 1]):
+                continue
+            covered_until = end
+
+            article_match = _ARTICLE_PATTERN.match(text, original_end)
+            results.append(
+                {
+                    "법률명": text[original_start:original_end],
+                    "조항 번호": (
+                        _format_article(article_match) if article_match else "조항 번호 없음"
+                    ),
+                }
+            )
+
+        with self._lock:
+            if results:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return results
+
+    def format_result(self, results: List[Dict[str, Any]]) -> str:
+        """찾은 법률명을 law_name_extraction 프롬프트의 응답 형식으로 만듭니다."""
+        return "법률과 조항:\n" + "\n".join(
+            f'{i}. 법률명: "{law["법률명"]}", 조항 번호: "{law["조항 번호"]}"'
+            for i, law in enumerate(results, 1)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """사전에 있는 법률명 수와 매칭 성공/실패(LLM 사용) 횟수를 반환합니다."""
+        with self._lock:
+            return {
+                "law_names": self.size,
+                "states": len(self._goto),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 전역 인스턴스 생성 (LAW_NAME_INDEX=False이면 항상 LLM으로 추출)
+law_name_index = LawNameIndex()
@@ -0,0 +1,310 @@
+import json
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# SQLite 캐시 적중 시 사용 시각(accessed_at)을 모아 두었다가 한 번에 기록하는 개수
+_ACCESS_FLUSH_SIZE = 100
+
+# 기본으로 캐시하는 프롬프트 종류 (입력이 같으면 답도 같아야 하는 보조 프롬프트)
+DEFAULT_CACHED_PROMPT_TYPES = [
+    "law_name_extraction",
+    "keyword_extraction",
+    "batch_law_sufficiency",
+    "batch_additional_search",
+    "batch_law_relevance",
+]
+
+
+class LLMResponseCache:
+    """LLM 응답을 요청 내용의 해시로 저장하는 2단계 캐시 (메모리 LRU + SQLite)
+
+    키는 model, messages, tools, temperature를 정규화한 JSON의 SHA-256 해시입니다.
+    메모리에서 찾지 못하면 SQLite에서 찾고, 찾은 값은 메모리로 올립니다.
+    SQLite 작업은 메모리 캐시와 다른 lock을 사용하며, 비동기 코드에서는 aget/aset으로
+    이벤트 루프를 막지 않도록 스레드에서 실행합니다. SQLite 적중 시의 사용 시각은 매번
+    커밋하지 않고 모아 두었다가 다음 쓰기(또는 _ACCESS_FLUSH_SIZE개가 쌓였을 때)에 기록합니다.
+
+    환경변수:
+    - LLM_CACHE: "True"이면 캐시 사용 (기본값: 사용 안 함)
+    - LLM_CACHE_PROMPT_TYPES: 캐시할 프롬프트 종류 (쉼표 구분, 기본값: 보조 프롬프트 5종)
+    - LLM_CACHE_TTL: 캐시 유효 시간(초) (기본값: 86400)
+    - LLM_CACHE_MEMORY_MAX_BYTES: 메모리 캐시 최대 크기(응답 JSON의 UTF-8 바이트 수) (기본값: 64MB)
+    - LLM_CACHE_DB_PATH: SQLite 캐시 파일 경로 (비어 있으면 메모리 캐시만 사용)
+    - LLM_CACHE_DB_MAX_BYTES: SQLite 캐시 최대 크기(응답 JSON의 UTF-8 바이트 수) (기본값: 512MB)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        prompt_types: List[str] = None,
+        ttl: float = None,
+        memory_max_bytes: int = None,
+        db_path: str = None,
+        db_max_bytes: int = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE") == "True"
+        if prompt_types is None:
+            env_prompt_types = os.getenv("LLM_CACHE_PROMPT_TYPES")
+            prompt_types = (
+                [t.strip() for t in env_prompt_types.split(",") if t.strip()]
+                if env_prompt_types
+                else DEFAULT_CACHED_PROMPT_TYPES
+            )
+        self.enabled = enabled
+        self.prompt_types = set(prompt_types)
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "86400"))
+        self.memory_max_bytes = memory_max_bytes or int(
+            os.getenv("LLM_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+        )
+        self.db_path = (
+            db_path if db_path is not None else os.getenv("LLM_CACHE_DB_PATH", "")
+        )
+        self.db_max_bytes = db_max_bytes or int(
+            os.getenv("LLM_CACHE_DB_MAX_BYTES", str(512 * 1024 * 1024))
+        )
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (만료 시각, 응답 JSON 문자열, UTF-8 바이트 수)
+        self._memory_bytes = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._pending_access = {}  # key -> 아직 기록하지 않은 사용 시각
+        self._stats = {}
+
+        if self.enabled and self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            # 캐시는 잃어도 다시 만들 수 있으므로 커밋마다 fsync하지 않음 (WAL + synchronous=NORMAL)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    prompt_type TEXT,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+            )
+            self._db.commit()
+
+    def is_enabled_for(self, prompt_type: Optional[str]) -> bool:
+        """해당 프롬프트 종류의 응답을 캐시하는지 여부를 반환합니다."""
+        return self.enabled and prompt_type in self.prompt_types
+
+    @staticmethod
+    def make_key(
+        model: str, messages: List[Dict], tools: List[Dict], temperature: float
+    ) -> str:
+        """요청 내용으로 캐시 키(SHA-256)를 만듭니다."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "tools": tools,
+                "temperature": temperature,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, prompt_type: str, tier: str) -> None:
+        """프롬프트 종류별 적중(memory/disk)/미스 횟수를 기록합니다. (lock 안에서 호출)"""
+        stats = self._stats.setdefault(
+            prompt_type, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+        stats[tier] += 1
+
+    def _memory_put(self, key: str, expires_at: float, value: str) -> None:
+        """메모리 캐시에 저장하고 크기 제한을 넘으면 오래된 항목부터 지웁니다. (lock 안에서 호출)"""
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+        # 크기는 문자 수가 아니라 UTF-8 바이트 수로 계산 (한글은 글자당 3바이트)
+        size = len(value.encode("utf-8"))
+        self._memory[key] = (expires_at, value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _memory_get(self, key: str, prompt_type: str, now: float) -> Optional[str]:
+        """메모리 캐시에서 응답 JSON 문자열을 찾습니다. (적중하면 통계에 기록)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._record(prompt_type, "memory_hits")
+                return value
+            del self._memory[key]
+            self._memory_bytes -= size
+            return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        """SQLite 캐시에서 (만료 시각, 응답 JSON 문자열)을 찾습니다. (블로킹 I/O)"""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at > now:
+                # 사용 시각은 모아서 기록 (읽을 때마다 커밋하지 않음)
+                self._pending_access[key] = now
+                if len(self._pending_access) >= _ACCESS_FLUSH_SIZE:
+                    self._flush_access()
+                    self._db.commit()
+                return expires_at, value
+            self._pending_access.pop(key, None)
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+
+    def _flush_access(self) -> None:
+        """모아 둔 사용 시각을 SQLite에 기록합니다. (_db_lock 안에서 호출, 커밋은 호출한 쪽에서)"""
+        if self._pending_access:
+            self._db.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+
+    def _finish_get(
+        self, key: str, prompt_type: str, disk_entry: Optional[Tuple[float, str]]
+    ) -> Optional[Dict]:
+        """SQLite 조회 결과를 메모리로 올리고 통계를 기록합니다."""
+        with self._lock:
+            if disk_entry is None:
+                self._record(prompt_type, "misses")
+                return None
+            expires_at, value = disk_entry
+            self._memory_put(key, expires_at, value)
+            self._record(prompt_type, "disk_hits")
+        return json.loads(value)
+
+    def get(self, key: str, prompt_type: str = None) -> Optional[Dict]:
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        now = time.time()
+        value = self._memory_get(key, prompt_type, now)
+        if value is not None:
+            return json.loads(value)
+        disk_entry = self._disk_get(key, now) if self._db is not None else None
+        return self._finish_get(key, prompt_type, disk_entry)
+
+    async def aget(self, key: str, prompt_type: str = None) -> Optional[Dict]:
+        """get의 비동기 버전입니다. SQLite 조회는 스레드에서 실행합니다."""
+        now = time.time()
+        value = self._memory_get(key, prompt_type, now)
+        if value is not None:
+            return json.loads(value)
+        disk_entry = None
+        if self._db is not None:
+            disk_entry = await asyncio.to_thread(self._disk_get, key, now)
+        return self._finish_get(key, prompt_type, disk_entry)
+
+    def _disk_set(
+        self, key: str, prompt_type: str, value: str, expires_at: float, now: float
+    ) -> None:
+        """SQLite 캐시에 저장하고 모아 둔 사용 시각도 함께 기록합니다. (블로킹 I/O)"""
+        with self._db_lock:
+            self._flush_access()
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, prompt_type, value, len(value.encode("utf-8")), expires_at, now),
+            )
+            self._evict_db(now)
+            self._db.commit()
+
+    def set(self, key: str, response: Dict, prompt_type: str = None) -> None:
+        """응답을 메모리와 SQLite에 저장합니다."""
+        now = time.time()
+        expires_at = now + self.ttl
+        value = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            self._memory_put(key, expires_at, value)
+        if self._db is not None:
+            self._disk_set(key, prompt_type, value, expires_at, now)
+
+    async def aset(self, key: str, response: Dict, prompt_type: str = None) -> None:
+        """set의 비동기 버전입니다. SQLite 저장은 스레드에서 실행합니다."""
+        now = time.time()
+        expires_at = now + self.ttl
+        value = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            self._memory_put(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(
+                self._disk_set, key, prompt_type, value, expires_at, now
+            )
+
+    def _evict_db(self, now: float) -> None:
+        """만료된 항목을 지우고, 크기 제한을 넘으면 가장 오래 사용되지 않은 항목부터 지웁니다. (_db_lock 안에서 호출)"""
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+        if total_bytes <= self.db_max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted_keys = []
+        for key, size in rows:
+            if total_bytes <= self.db_max_bytes:
+                break
+            evicted_keys.append((key,))
+            total_bytes -= size
+        self._db.executemany("DELETE FROM llm_cache WHERE key = ?", evicted_keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """프롬프트 종류별 적중/미스 횟수와 전체 적중률을 반환합니다."""
+        with self._lock:
+            by_prompt_type = {k: dict(v) for k, v in self._stats.items()}
+            memory_entries = len(self._memory)
+            memory_bytes = self._memory_bytes
+
+        hits = sum(v["memory_hits"] + v["disk_hits"] for v in by_prompt_type.values())
+        misses = sum(v["misses"] for v in by_prompt_type.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "memory_entries": memory_entries,
+            "memory_bytes": memory_bytes,
+            "by_prompt_type": by_prompt_type,
+        }
+
+    def clear(self) -> None:
+        """모든 캐시 항목과 통계를 지웁니다."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._stats.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._pending_access.clear()
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+
+# 전역 인스턴스 생성 (LLM_CACHE=True일 때만 동작)
+llm_cache = LLMResponseCache()
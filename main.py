@@ -5,9 +5,9 @@ import inspect
 import os
 from dotenv import load_dotenv
 import psycopg2
-from util_tool_call import SimpleToolCaller
+from util_tool_call import SimpleToolCaller, warmup_llm_client
 from util_tools import get_weather, calculate_math, google_search
-from util_law_search import find_relevant_laws
+from util_law_search import find_relevant_laws, afind_relevant_laws
 
 # 도구 정의
 TOOLS = [
@@ -117,6 +117,12 @@ TOOL_FUNCTIONS = {
     "find_relevant_laws": find_relevant_laws,
 }
 
+# 비동기 도구 함수 매핑 (SimpleToolCaller.achat 사용 시)
+ASYNC_TOOL_FUNCTIONS = {
+    **TOOL_FUNCTIONS,
+    "find_relevant_laws": afind_relevant_laws,
+}
+
 
 def main():
     """메인 함수 - 예시 실행"""
@@ -126,6 +132,14 @@ def main():
     # SimpleToolCaller 인스턴스 생성
     caller = SimpleToolCaller(TOOLS, TOOL_FUNCTIONS)
 
+    # LLM 서버 커넥션 미리 열어두기 (선택)
+    if os.getenv("LLM_WARMUP") == "True":
+        warmup_llm_client(
+            caller.base_url,
+            caller.api_key,
+            connections=int(os.getenv("LLM_WARMUP_CONNECTIONS", "1")),
+        )
+
     # 예시 질문들
     test_questions = [
         # "서울의 날씨는 어때?",
@@ -137,17 +151,35 @@ def main():
         "전체 건축 관련 법규에서 용적률 완화에 관해서 알려주세요. 단, 관련된 법령의 이름이나 조항 번호를 포함하고 법령 내용을 인용하는 방식으로 설명해주세요.",
     ]
 
+    # "True"이면 답변을 생성되는 대로 출력 (기본값: 사용 안 함, 답변이 완성된 뒤 한 번에 출력)
+    stream = os.getenv("LLM_STREAM", "False") == "True"
+
     for question in test_questions:
         print(f"질문: {question}")
         try:
-            answer = caller.chat(
-                [
-                    {"role": "user", "content": question},
-                ],
-                with_tools=True,
-            )
-            print("=" * 120)
-            print(f"답변: {answer}")
+            if stream:
+                tokens = caller.chat(
+                    [
+                        {"role": "user", "content": question},
+                    ],
+                    with_tools=True,
+                    stream=True,
+                )
+                for i, token in enumerate(tokens):
+                    if i == 0:
+                        print("=" * 120)
+                        print("답변: ", end="", flush=True)
+                    print(token, end="", flush=True)
+                print()
+            else:
+                answer = caller.chat(
+                    [
+                        {"role": "user", "content": question},
+                    ],
+                    with_tools=True,
+                )
+                print("=" * 120)
+                print(f"답변: {answer}")
         except Exception as e:
             print(f"오류: {e}")
         print("-" * 120)
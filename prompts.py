@@ -103,6 +103,113 @@ BATCH_ADDITIONAL_SEARCH_PROMPT = """당신은 법령 내용을 분석하여 사
 ...
 """
 
+# 배치 법령 관련성 + 추가 검색 필요성 통합 판단 프롬프트 (충분성 검사와 추가 검색 필요성 판단을 한 번에)
+BATCH_LAW_RELEVANCE_PROMPT = """당신은 법령 내용을 분석하여 사용자의 질문에 답하기에 충분한지, 그리고 추가 검색이 필요한지 판단하는 전문가입니다.
+
+각 법령 내용에 대해 다음 두 가지를 판단해주세요.
+
+**1. 충분성 판단 (매우 엄격하게)**
+- "충분함": 해당 법령 내용이 질문에 대한 완전한 답변을 제공할 수 있는 경우
+- "부분적 충분함": 일부 답변은 가능하지만 추가 정보가 필요한 경우
+- "부족함": 해당 법령 내용이 질문에 답변하기에 부족하거나 관련이 없는 경우
+- 사용자 질문의 핵심 용어가 법령 텍스트에 정확히 포함되지 않으면 "부족함"으로 판단
+
+**2. 추가 검색 필요성 판단 ("충분함" 또는 "부분적 충분함"인 경우에만)**
+- 사용자의 질문에서 요구하는 구체적인 내용이 현재 법령에 명시되지 않은 경우
+- "대통령령으로 정한다", "시행령으로 정한다" 등의 표현이 있고, 그 내용이 사용자 질문과 직접 관련된 경우
+- 구체적인 수치, 기준, 절차, 정의 등이 다른 법령에 위임되어 있고, 그 내용이 사용자 질문과 관련된 경우
+- "별도로 정하는 바에 따른다", "관리규정에 따른다" 등의 표현이 있고, 그 내용이 사용자 질문과 직접 관련된 경우
+- "부족함"이면 항상 "추가 검색 불필요"
+
+**검색 대상 설정 규칙:**
+- "대통령령으로 정한다" 또는 "시행령으로 정한다"가 있는 경우: 현재 법령명에 "시행령"을 붙인 형태로 검색 (예: "건축법" → "건축법 시행령")
+- "시행규칙으로 정한다"가 있는 경우: 현재 법령명에 "시행규칙"을 붙인 형태로 검색
+- 구체적인 법령명이 언급된 경우: 해당 법령명을 그대로 사용
+
+답변 형식:
+1번 법령: [충분함/부분적 충분함/부족함], [추가 검색 필요/추가 검색 불필요]
+- 검색 대상: [검색할 법령/시행령/시행규칙명] (추가 검색이 필요한 경우만)
+- 검색 키워드: [검색에 사용할 키워드들] (추가 검색이 필요한 경우만)
+- 검색 이유: [왜 추가 검색이 필요한지, 사용자 질문과의 연관성] (추가 검색이 필요한 경우만)
+
+2번 법령: [충분함/부분적 충분함/부족함], [추가 검색 필요/추가 검색 불필요]
+...
+"""
+
+
+# 배치 판단 결과 항목의 필드 (JSON 출력 모드)
+_JUDGMENT_FIELDS = {
+    "index": {"type": "integer"},
+    "verdict": {"type": "string", "enum": ["충분함", "부분적 충분함", "부족함"]},
+    "needs_additional_search": {"type": "boolean"},
+    "search_target": {"type": "string"},
+    "search_keywords": {"type": "string"},
+    "search_reason": {"type": "string"},
+}
+
+# 프롬프트 종류별 항목 필드 (스트리밍 중 순서대로 생성되도록 index를 맨 앞에 둠)
+_JUDGMENT_FIELD_NAMES = {
+    "batch_law_sufficiency": ["index", "verdict"],
+    "batch_additional_search": [
+        "index",
+        "needs_additional_search",
+        "search_target",
+        "search_keywords",
+        "search_reason",
+    ],
+    "batch_law_relevance": [
+        "index",
+        "verdict",
+        "needs_additional_search",
+        "search_target",
+        "search_keywords",
+        "search_reason",
+    ],
+}
+
+# 배치 판단 프롬프트의 JSON 응답 스키마 (response_format의 json_schema / vLLM guided_json에 사용)
+BATCH_JUDGMENT_SCHEMAS = {
+    prompt_type: {
+        "name": prompt_type,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            name: _JUDGMENT_FIELDS[name] for name in field_names
+                        },
+                        # 추가 검색 정보(검색 대상/키워드/이유)는 필요한 경우에만 채움
+                        "required": [
+                            name for name in field_names if not name.startswith("search_")
+                        ],
+                    },
+                }
+            },
+            "required": ["results"],
+        },
+    }
+    for prompt_type, field_names in _JUDGMENT_FIELD_NAMES.items()
+}
+
+# JSON 출력 모드에서 사용자 메시지 끝에 붙이는 답변 형식 안내 (시스템 프롬프트는 그대로 둠)
+_JSON_OUTPUT_EXAMPLES = {
+    "batch_law_sufficiency": '{"results": [{"index": 1, "verdict": "충분함"}, {"index": 2, "verdict": "부족함"}]}',
+    "batch_additional_search": '{"results": [{"index": 1, "needs_additional_search": true, "search_target": "건축법 시행령", "search_keywords": "경미한 사항", "search_reason": "대통령령에 위임된 기준 확인"}, {"index": 2, "needs_additional_search": false}]}',
+    "batch_law_relevance": '{"results": [{"index": 1, "verdict": "부분적 충분함", "needs_additional_search": true, "search_target": "건축법 시행령", "search_keywords": "경미한 사항", "search_reason": "대통령령에 위임된 기준 확인"}, {"index": 2, "verdict": "부족함", "needs_additional_search": false}]}',
+}
+
+
+def json_output_instruction(prompt_type: str) -> str:
+    """배치 판단 프롬프트의 답변 형식을 JSON으로 바꾸는 안내 문구를 반환합니다."""
+    return f"""
+
+답변은 위의 답변 형식 대신 다음과 같은 JSON으로만 해주세요. results에는 법령 번호(index) 순서대로 모든 법령을 한 번씩 포함하세요.
+{_JSON_OUTPUT_EXAMPLES[prompt_type]}"""
+
+
 
 # 프롬프트 매핑
 PROMPT_MAPPING = {
@@ -110,11 +217,22 @@ PROMPT_MAPPING = {
     "keyword_extraction": KEYWORD_EXTRACTION_PROMPT,
     "batch_law_sufficiency": BATCH_LAW_SUFFICIENCY_PROMPT,
     "batch_additional_search": BATCH_ADDITIONAL_SEARCH_PROMPT,
+    "batch_law_relevance": BATCH_LAW_RELEVANCE_PROMPT,
     "system": SYSTEM_PROMPT,
     "law_expert": LAW_EXPERT_PROMPT,
 }
 
 
+def detect_prompt_type(messages: list) -> str:
+    """generate_prompt로 만든 메시지의 프롬프트 종류를 시스템 프롬프트로 판별합니다. (판별 불가 시 None)"""
+    if not messages or messages[0].get("role") != "system":
+        return None
+    for prompt_type, system_content in PROMPT_MAPPING.items():
+        if messages[0].get("content") == system_content:
+            return prompt_type
+    return None
+
+
 def generate_prompt(prompt_type: str, **kwargs) -> list:
     """통합 프롬프트 생성 함수"""
 
@@ -159,33 +277,15 @@ def generate_prompt(prompt_type: str, **kwargs) -> list:
             }
         ]
 
-    elif prompt_type == "batch_law_sufficiency":
-        law_contents = kwargs.get("law_contents", [])
-        user_question = kwargs.get("user_question", "")
-
-        # 각 법령에 번호를 부여하여 표시
-        numbered_contents = []
-        for i, content in enumerate(law_contents, 1):
-            numbered_contents.append(f"{i}번 법령:\n{content}")
-        combined_content = "\n\n---\n\n".join(numbered_contents)
-
-        return [
-            {
-                "role": "system",
-                "content": system_content,
-            },
-            {
-                "role": "user",
-                "content": f"""사용자 질문: {user_question}
-
-법령 내용들:
-{combined_content}""",
-            },
-        ]
-
-    elif prompt_type == "batch_additional_search":
+    elif prompt_type in (
+        "batch_law_sufficiency",
+        "batch_additional_search",
+        "batch_law_relevance",
+    ):
         law_contents = kwargs.get("law_contents", [])
         user_question = kwargs.get("user_question", "")
+        # json_output=True이면 BATCH_JUDGMENT_SCHEMAS 형식의 JSON으로 답하도록 안내
+        json_output = kwargs.get("json_output", False)
 
         # 각 법령에 번호를 부여하여 표시
         numbered_contents = []
@@ -203,7 +303,8 @@ def generate_prompt(prompt_type: str, **kwargs) -> list:
                 "content": f"""사용자 질문: {user_question}
 
 법령 내용들:
-{combined_content}""",
+{combined_content}"""
+                + (json_output_instruction(prompt_type) if json_output else ""),
             },
         ]
 
@@ -0,0 +1,309 @@
+"""법령 검색 백엔드
+
+LawSearcher는 키워드/법률명 추출까지만 하고, 실제 검색과 법령 내용 조회는 SearchBackend에 맡깁니다.
+
+- ParadeDBSearchBackend: PostgreSQL(ParadeDB)의 document/collection/chunk 테이블 (기본값)
+- SQLiteFTSSearchBackend: chunk를 내보내 만든 SQLite FTS5(BM25) 파일 (Postgres 없이 프로세스 안에서 검색)
+
+환경변수:
+- SEARCH_BACKEND: "paradedb" 또는 "sqlite" (기본값: paradedb)
+- SEARCH_SQLITE_PATH: SQLite 검색 파일 경로 (SEARCH_BACKEND=sqlite일 때 필요)
+
+SQLite 검색 파일 만들기:
+python search_backends.py export laws.db                  # PostgreSQL에서 내보내기
+python search_backends.py export laws.db --jsonl chunks.jsonl  # {"id", "keyword1", "text"} JSONL에서 만들기
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from db_utils import db_manager
+
+# .env 파일 로드
+load_dotenv()
+
+# 검색 대상 청크 조건 (RAG용 법령 컬렉션, 자치법규 제외)
+_CHUNK_SCOPE_SQL = """FROM document JOIN collection cl ON document.collection_id = cl.id JOIN chunk ch2 ON ch2.document_id = document.id WHERE cl.usage = 'rag' AND (cl.scenario->>'law_no_ordin' = 'Y')  AND (NOT document.collection_id = 4  AND document.document_meta->>'path' NOT ILIKE '/data/law/ordin/%')"""
+
+
+class SearchBackend:
+    """법령 검색 백엔드 인터페이스
+
+    search()의 결과 행은 id, keyword1(공백 없는 법률명), similarity(클수록 관련도 높음)를 가지며,
+    include_content=True이면 text도 함께 담습니다. 오류는 {"error": ...}로 반환합니다.
+    """
+
+    name = "base"
+
+    def search(
+        self,
+        keywords: List[str],
+        law_name: Optional[str] = None,
+        k: int = 40,
+        include_content: bool = False,
+    ) -> Dict[str, Any]:
+        """키워드로 청크를 검색하여 점수 순으로 최대 k개 반환합니다. law_name이 있으면 그 법령으로 제한합니다."""
+        raise NotImplementedError
+
+    def get_texts(self, ids: List[int]) -> Dict[str, Any]:
+        """chunk id들의 법령 내용을 {"results": [{"id", "text"}]}로 반환합니다. (순서 보장 안 함)"""
+        raise NotImplementedError
+
+    def law_names(self) -> Dict[str, Any]:
+        """검색 대상 청크의 법률명(keyword1) 목록을 {"results": [{"keyword1"}]}로 반환합니다."""
+        raise NotImplementedError
+
+    def iter_texts(self) -> Iterable[str]:
+        """검색 대상 청크의 법령 내용을 하나씩 반환합니다. (어휘 사전 생성용, 오류는 예외로 전달)"""
+        raise NotImplementedError
+
+
+class ParadeDBSearchBackend(SearchBackend):
+    """PostgreSQL(ParadeDB) BM25 검색 (text @@@ 검색어, paradedb.score)
+
+    검색 SQL은 커넥션마다 한 번 PREPARE 해 두고 파라미터만 바꿔 실행합니다.
+    """
+
+    name = "paradedb"
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+
+    @staticmethod
+    def build_search_sql(
+        with_law_name: bool, include_content: bool
+    ) -> Tuple[str, str, Tuple[str, ...]]:
+        """법령 검색 SQL을 (prepared statement 이름, SQL, 파라미터 타입들)로 반환합니다.
+
+        파라미터는 ($1 검색어, $2 법률명, $3 k) 또는 법률명이 없으면 ($1 검색어, $2 k)입니다.
+        """
+        # 법령 내용까지 함께 조회할지 여부에 따라 SELECT 컬럼 결정
+        if include_content:
+            select_columns = "ch2.id, ch2.keyword1, ch2.text, paradedb.score(ch2.id) AS similarity"
+            t1_columns = "ch2.id, ch2.keyword1, ch2.text"
+            result_columns = "id, keyword1, text, similarity"
+        else:
+            select_columns = "ch2.id, ch2.keyword1, paradedb.score(ch2.id) AS similarity"
+            t1_columns = "ch2.id, ch2.keyword1"
+            result_columns = "id, keyword1, similarity"
+        statement_suffix = "content" if include_content else "ids"
+
+        if not with_law_name:
+            sql_query = f"""SELECT {select_columns} {_CHUNK_SCOPE_SQL} AND ((text @@@ $1)) ORDER BY paradedb.score(ch2.id) DESC LIMIT $2"""
+            return f"search_laws_{statement_suffix}", sql_query, ("text", "integer")
+
+        sql_query = f"""WITH t1 AS (SELECT {t1_columns}, paradedb.score(ch2.id) AS similarity {_CHUNK_SCOPE_SQL} AND ((text @@@ $1)) OFFSET 0
+            ) SELECT {result_columns} FROM t1 WHERE keyword1 = $2 ORDER BY similarity DESC LIMIT $3"""
+        return (
+            f"search_laws_by_law_name_{statement_suffix}",
+            sql_query,
+            ("text", "text", "integer"),
+        )
+
+    def search(
+        self,
+        keywords: List[str],
+        law_name: Optional[str] = None,
+        k: int = 40,
+        include_content: bool = False,
+    ) -> Dict[str, Any]:
+        statement_name, sql_query, param_types = self.build_search_sql(
+            law_name is not None, include_content
+        )
+        if law_name is not None:
+            params = (" ".join(keywords), law_name, k)
+        else:
+            params = (" ".join(keywords), k)
+        return self.db.execute_prepared(statement_name, sql_query, params, param_types)
+
+    def get_texts(self, ids: List[int]) -> Dict[str, Any]:
+        return self.db.execute_query_with_params(
+            "SELECT id, text FROM chunk WHERE id = ANY(%s);", (list(ids),)
+        )
+
+    def law_names(self) -> Dict[str, Any]:
+        return self.db.execute_query(
+            f"SELECT DISTINCT ch2.keyword1 {_CHUNK_SCOPE_SQL} AND ch2.keyword1 IS NOT NULL"
+        )
+
+    def iter_texts(self) -> Iterable[str]:
+        for row in self.db.iter_query(f"SELECT ch2.text {_CHUNK_SCOPE_SQL}"):
+            yield row["text"]
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """SQLite FTS5 BM25 검색 (읽기 전용, 스레드마다 커넥션 하나)
+
+    한국어는 조사가 단어 뒤에 붙으므로 각 키워드를 접두어 검색("사항"* → 사항, 사항의, 사항은)하고
+    키워드들은 OR로 묶습니다. (ParadeDB 검색어의 기본 동작과 같음)
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"SQLite 검색 파일이 없습니다: {path}")
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def build_match_query(keywords: List[str]) -> str:
+        """키워드들을 FTS5 MATCH 검색어로 바꿉니다. (따옴표 처리, 접두어 검색, OR 결합)"""
+        terms = []
+        for keyword in keywords:
+            for term in keyword.split():
+                terms.append('"' + term.replace('"', '""') + '"*')
+        return " OR ".join(terms)
+
+    def search(
+        self,
+        keywords: List[str],
+        law_name: Optional[str] = None,
+        k: int = 40,
+        include_content: bool = False,
+    ) -> Dict[str, Any]:
+        match_query = self.build_match_query(keywords)
+        if not match_query:
+            return {"results": []}
+
+        columns = "c.id, c.keyword1, c.text" if include_content else "c.id, c.keyword1"
+        sql_query = f"""SELECT {columns}, -bm25(chunk_fts) AS similarity
+            FROM chunk_fts JOIN chunk c ON c.id = chunk_fts.rowid
+            WHERE chunk_fts MATCH ?"""
+        params = [match_query]
+        if law_name is not None:
+            sql_query += " AND c.keyword1 = ?"
+            params.append(law_name)
+        sql_query += " ORDER BY bm25(chunk_fts) LIMIT ?"
+        params.append(k)
+
+        try:
+            rows = self._connection().execute(sql_query, params).fetchall()
+            return {"results": [dict(row) for row in rows]}
+        except Exception as e:
+            print(f"SQLite 검색 오류: {e}")
+            return {"error": f"SQLite 검색 오류: {str(e)}"}
+
+    def get_texts(self, ids: List[int]) -> Dict[str, Any]:
+        if not ids:
+            return {"results": []}
+        placeholders = ", ".join("?" for _ in ids)
+        try:
+            rows = self._connection().execute(
+                f"SELECT id, text FROM chunk WHERE id IN ({placeholders})", list(ids)
+            ).fetchall()
+            return {"results": [dict(row) for row in rows]}
+        except Exception as e:
+            print(f"SQLite 검색 오류: {e}")
+            return {"error": f"SQLite 검색 오류: {str(e)}"}
+
+    def law_names(self) -> Dict[str, Any]:
+        try:
+            rows = self._connection().execute(
+                "SELECT DISTINCT keyword1 FROM chunk WHERE keyword1 IS NOT NULL"
+            ).fetchall()
+            return {"results": [dict(row) for row in rows]}
+        except Exception as e:
+            print(f"SQLite 검색 오류: {e}")
+            return {"error": f"SQLite 검색 오류: {str(e)}"}
+
+    def iter_texts(self) -> Iterable[str]:
+        for row in self._connection().execute("SELECT text FROM chunk"):
+            yield row["text"]
+
+    @staticmethod
+    def build(path: str, chunks: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """{"id", "keyword1", "text"} 청크들로 SQLite 검색 파일을 만들고 청크 수를 반환합니다.
+
+        keyword1은 LawSearcher가 비교하는 형식(공백 없는 법률명)이어야 합니다.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        connection = sqlite3.connect(path)
+        try:
+            connection.executescript(
+                """
+                CREATE TABLE chunk (id INTEGER PRIMARY KEY, keyword1 TEXT, text TEXT NOT NULL);
+                CREATE INDEX chunk_keyword1 ON chunk (keyword1);
+                CREATE VIRTUAL TABLE chunk_fts USING fts5(
+                    text, content='chunk', content_rowid='id', tokenize='unicode61'
+                );
+                """
+            )
+            count = 0
+            batch = []
+            for chunk in chunks:
+                batch.append((chunk["id"], chunk.get("keyword1"), chunk["text"]))
+                if len(batch) >= batch_size:
+                    connection.executemany("INSERT INTO chunk VALUES (?, ?, ?)", batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                connection.executemany("INSERT INTO chunk VALUES (?, ?, ?)", batch)
+                count += len(batch)
+            connection.execute("INSERT INTO chunk_fts(chunk_fts) VALUES ('rebuild')")
+            connection.commit()
+            connection.execute("VACUUM")
+            return count
+        finally:
+            connection.close()
+
+
+def iter_postgres_chunks(batch_size: int = 1000) -> Iterable[Dict[str, Any]]:
+    """ParadeDB 백엔드와 같은 검색 범위의 청크를 서버 사이드 커서로 읽습니다."""
+    return db_manager.iter_query(
+        f"SELECT ch2.id, ch2.keyword1, ch2.text {_CHUNK_SCOPE_SQL}",
+        batch_size=batch_size,
+    )
+
+
+def iter_jsonl_chunks(path: str) -> Iterable[Dict[str, Any]]:
+    """{"id", "keyword1", "text"} 형식의 JSONL 파일에서 청크를 읽습니다."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def create_search_backend(backend_type: str = None) -> SearchBackend:
+    """환경변수(SEARCH_BACKEND, SEARCH_SQLITE_PATH)에 따라 검색 백엔드를 만듭니다."""
+    backend_type = (backend_type or os.getenv("SEARCH_BACKEND", "paradedb")).lower()
+    if backend_type == "paradedb":
+        return ParadeDBSearchBackend()
+    if backend_type == "sqlite":
+        return SQLiteFTSSearchBackend(os.getenv("SEARCH_SQLITE_PATH", "laws.db"))
+    raise ValueError(f"Unknown search backend: {backend_type}")
+
+
+# 전역 인스턴스 생성 (LawSearcher 기본 백엔드)
+search_backend = create_search_backend()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="법령 검색 백엔드 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="SQLite 검색 파일 만들기")
+    export_parser.add_argument("path", help="만들 SQLite 파일 경로")
+    export_parser.add_argument("--jsonl", help="청크 JSONL 파일 (없으면 PostgreSQL에서 읽음)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        chunks = iter_jsonl_chunks(args.jsonl) if args.jsonl else iter_postgres_chunks()
+        count = SQLiteFTSSearchBackend.build(args.path, chunks)
+        print(f"🔍 SQLite 검색 파일 생성--> {args.path} ({count}개 청크)")
+
+
+if __name__ == "__main__":
+    main()
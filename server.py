@@ -0,0 +1,435 @@
+"""HTTP 서비스 진입점
+
+SimpleToolCaller 대화(일반/스트리밍)와 find_relevant_laws를 HTTP로 제공합니다.
+LLM 커넥션 풀, 백그라운드 이벤트 루프, DB 커넥션 풀은 모든 요청이 함께 사용합니다.
+
+- 동시에 처리하는 요청은 최대 SERVER_MAX_CONCURRENCY 개이고, 나머지는 최대
+  SERVER_MAX_QUEUE 개까지 대기합니다. 대기열까지 가득 차면 바로 429를 반환합니다.
+- 요청마다 제한 시간(기본값: SERVER_REQUEST_TIMEOUT 초, 본문의 "timeout"으로 더 짧게 지정 가능)이
+  있으며, 대기 시간도 여기에 포함됩니다. 시간이 지나면 504를 반환합니다.
+
+엔드포인트:
+- POST /v1/chat                {"messages": [...], "with_tools": true, "stream": false, "timeout": 60}
+- POST /v1/find_relevant_laws  {"user_question": "...", "max_search_count": 30, "timeout": 60}
+- GET  /health
+
+stream=true이면 text/event-stream으로 "data: {"content": "..."}" 이벤트를 보내고
+"data: [DONE]"으로 끝냅니다.
+
+사용 예시:
+python server.py --port 8000 --max-concurrency 16
+curl -X POST localhost:8000/v1/chat -d '{"messages": [{"role": "user", "content": "서울 날씨 알려줘"}]}'
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+from dotenv import load_dotenv
+
+from db_utils import db_manager
+from llm_cache import llm_cache
+from util_tool_call import SimpleToolCaller, TokenStream, run_sync, warmup_llm_client
+from util_law_search import afind_relevant_laws
+
+# .env 파일 로드
+load_dotenv()
+
+# 요청 본문 최대 크기 (바이트)
+MAX_BODY_BYTES = 1024 * 1024
+
+# 대화 메시지에 올 수 있는 role
+MESSAGE_ROLES = ("system", "user", "assistant", "tool")
+
+
+class ServerBusyError(Exception):
+    """처리 중인 요청과 대기 중인 요청이 모두 가득 찬 경우 발생하는 예외"""
+
+
+class AdmissionController:
+    """동시 처리 요청 수와 대기 요청 수를 제한합니다.
+
+    acquire()는 자리가 나면 True, 제한 시간 안에 자리가 나지 않으면 False를 반환하고,
+    대기열까지 가득 차 있으면 ServerBusyError를 발생시킵니다.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+
+    def acquire(self, timeout: float) -> bool:
+        with self._condition:
+            if self.active < self.max_concurrency:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise ServerBusyError("요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+            self.waiting += 1
+            try:
+                acquired = self._condition.wait_for(
+                    lambda: self.active < self.max_concurrency, timeout
+                )
+                if not acquired:
+                    self.timed_out += 1
+                    return False
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self.completed += 1
+            self._condition.notify()
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+class LLMServiceHandler(BaseHTTPRequestHandler):
+    """요청 하나를 처리하는 핸들러 (연결마다 스레드 하나)"""
+
+    protocol_version = "HTTP/1.1"
+    server: "LLMHTTPServer"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict = None) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("요청 본문이 너무 큽니다.")
+        if length == 0:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+        return body
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": f"알 수 없는 경로: {self.path}"})
+            return
+        self._send_json(
+            200,
+            {
+                "status": "ok",
+                "requests": self.server.admission.stats(),
+                "db_pool": db_manager._pool.stats() if db_manager._pool else None,
+                "llm_cache": llm_cache.stats() if llm_cache.enabled else None,
+            },
+        )
+
+    def _parse_timeout(self, body: Dict[str, Any]) -> float:
+        """본문의 "timeout"(초)과 서버 제한 시간 중 짧은 것을 반환합니다. (잘못된 값이면 ValueError)"""
+        timeout = self.server.request_timeout
+        if body.get("timeout") is None:
+            return timeout
+        value = body["timeout"]
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError("timeout은 숫자여야 합니다.")
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError("timeout은 숫자여야 합니다.")
+        if not math.isfinite(value) or value <= 0:
+            raise ValueError("timeout은 0보다 큰 숫자여야 합니다.")
+        return min(value, timeout)
+
+    def _parse_messages(self, messages: Any) -> List[Dict]:
+        """대화 메시지 목록의 형식을 확인합니다. (잘못된 값이면 ValueError)"""
+        if not messages or not isinstance(messages, list):
+            raise ValueError("messages 항목이 필요합니다.")
+        for index, message in enumerate(messages):
+            if not isinstance(message, dict):
+                raise ValueError(f"messages[{index}] 항목은 객체여야 합니다.")
+            if message.get("role") not in MESSAGE_ROLES:
+                raise ValueError(
+                    f"messages[{index}].role은 {', '.join(MESSAGE_ROLES)} 중 하나여야 합니다."
+                )
+            content = message.get("content")
+            # 도구를 호출한 assistant 메시지는 content가 null일 수 있음
+            if not isinstance(content, str) and not (
+                content is None
+                and message["role"] == "assistant"
+                and message.get("tool_calls")
+            ):
+                raise ValueError(f"messages[{index}].content는 문자열이어야 합니다.")
+        return messages
+
+    def _parse_bool(self, body: Dict[str, Any], key: str, default: bool) -> bool:
+        """본문의 불리언 항목을 반환합니다. (잘못된 값이면 ValueError)"""
+        value = body.get(key, default)
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} 값은 true 또는 false여야 합니다.")
+        return value
+
+    def _parse_chat_request(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "messages": self._parse_messages(body.get("messages")),
+            "with_tools": self._parse_bool(body, "with_tools", True),
+            "stream": self._parse_bool(body, "stream", False),
+        }
+
+    def _parse_find_relevant_laws_request(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        user_question = body.get("user_question")
+        if not user_question or not isinstance(user_question, str):
+            raise ValueError("user_question 항목이 필요합니다.")
+        max_search_count = body.get("max_search_count", 30)
+        if (
+            isinstance(max_search_count, bool)
+            or not isinstance(max_search_count, int)
+            or max_search_count <= 0
+        ):
+            raise ValueError("max_search_count는 0보다 큰 정수여야 합니다.")
+        return {"user_question": user_question, "max_search_count": max_search_count}
+
+    def do_POST(self) -> None:
+        routes = {
+            "/v1/chat": (self._parse_chat_request, self._handle_chat),
+            "/v1/find_relevant_laws": (
+                self._parse_find_relevant_laws_request,
+                self._handle_find_relevant_laws,
+            ),
+        }
+        if self.path not in routes:
+            self._send_json(404, {"error": f"알 수 없는 경로: {self.path}"})
+            return
+        parse_request, handler = routes[self.path]
+
+        # 형식이 잘못된 요청은 자리를 차지하기 전에 400으로 돌려보냄
+        try:
+            body = self._read_body()
+            if not isinstance(body, dict):
+                raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+            request = parse_request(body)
+            # 대기 시간을 포함한 요청 제한 시간
+            timeout = self._parse_timeout(body)
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"잘못된 요청: {e}"})
+            return
+        deadline = time.monotonic() + timeout
+
+        try:
+            acquired = self.server.admission.acquire(timeout)
+        except ServerBusyError as e:
+            self._send_json(429, {"error": str(e)}, {"Retry-After": "1"})
+            return
+        if not acquired:
+            self._send_json(504, {"error": f"대기 중 제한 시간({timeout}초)이 지났습니다."})
+            return
+
+        try:
+            handler(request, deadline)
+        finally:
+            self.server.admission.release()
+
+    def _run_with_deadline(self, coro, deadline: float) -> Any:
+        """코루틴을 공용 이벤트 루프에서 실행하고, 제한 시간이 지나면 취소합니다."""
+        return run_sync(asyncio.wait_for(coro, max(0.0, deadline - time.monotonic())))
+
+    def _handle_chat(self, request: Dict[str, Any], deadline: float) -> None:
+        messages = request["messages"]
+        with_tools = request["with_tools"]
+
+        if request["stream"]:
+            self._stream_chat(messages, with_tools, deadline)
+            return
+
+        try:
+            answer = self._run_with_deadline(
+                self.server.async_caller.achat(messages, with_tools), deadline
+            )
+        except asyncio.TimeoutError:
+            self._send_json(504, {"error": "요청 제한 시간이 지났습니다."})
+            return
+        except Exception as e:
+            print(f"대화 처리 오류: {e}")
+            self._send_json(502, {"error": str(e)})
+            return
+        self._send_json(200, {"answer": answer})
+
+    def _stream_chat(self, messages: list, with_tools: bool, deadline: float) -> None:
+        """답변 토큰을 SSE 이벤트로 보냅니다. 제한 시간이 지나면 오류 이벤트를 보내고 끝냅니다.
+
+        대화(도구 실행 포함)는 공용 이벤트 루프에서 asyncio.wait_for로 제한 시간을 걸고 실행하며,
+        클라이언트가 연결을 끊으면 대화를 취소합니다.
+        """
+        stream = TokenStream(
+            lambda on_token: asyncio.wait_for(
+                self.server.async_caller.achat_stream(messages, on_token, with_tools),
+                max(0.0, deadline - time.monotonic()),
+            )
+        )
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def send_event(data: str) -> None:
+                self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            error = None
+            try:
+                for token in stream:
+                    send_event(json.dumps({"content": token}, ensure_ascii=False))
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except asyncio.TimeoutError:
+                error = "요청 제한 시간이 지났습니다."
+            except concurrent.futures.CancelledError:
+                error = "요청이 취소되었습니다."
+            except Exception as e:
+                print(f"대화 처리 오류: {e}")
+                error = str(e)
+            if error:
+                send_event(json.dumps({"error": error}, ensure_ascii=False))
+            send_event("[DONE]")
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 연결을 끊은 경우
+            return
+        finally:
+            stream.close()
+
+    def _handle_find_relevant_laws(
+        self, request: Dict[str, Any], deadline: float
+    ) -> None:
+        try:
+            result = self._run_with_deadline(
+                afind_relevant_laws(
+                    request["user_question"], request["max_search_count"]
+                ),
+                deadline,
+            )
+        except asyncio.TimeoutError:
+            self._send_json(504, {"error": "요청 제한 시간이 지났습니다."})
+            return
+        except Exception as e:
+            print(f"법령 검색 처리 오류: {e}")
+            self._send_json(502, {"error": str(e)})
+            return
+        self._send_json(200, {"result": result})
+
+
+class LLMHTTPServer(ThreadingHTTPServer):
+    """요청들이 SimpleToolCaller, LLM/DB 커넥션 풀을 공유하는 HTTP 서버
+
+    환경변수:
+    - SERVER_HOST: 바인드 주소 (기본값: 127.0.0.1)
+    - SERVER_PORT: 포트 (기본값: 8000)
+    - SERVER_MAX_CONCURRENCY: 동시에 처리하는 요청 수 (기본값: 8)
+    - SERVER_MAX_QUEUE: 자리를 기다릴 수 있는 요청 수 (기본값: 32)
+    - SERVER_REQUEST_TIMEOUT: 요청 제한 시간(초) (기본값: 120)
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        request_timeout: float = None,
+        verbose: bool = False,
+    ):
+        from main import TOOLS, ASYNC_TOOL_FUNCTIONS
+
+        host = host or os.getenv("SERVER_HOST", "127.0.0.1")
+        port = port if port is not None else int(os.getenv("SERVER_PORT", "8000"))
+        self.admission = AdmissionController(
+            max_concurrency or int(os.getenv("SERVER_MAX_CONCURRENCY", "8")),
+            max_queue if max_queue is not None else int(os.getenv("SERVER_MAX_QUEUE", "32")),
+        )
+        self.request_timeout = request_timeout or float(
+            os.getenv("SERVER_REQUEST_TIMEOUT", "120")
+        )
+        self.verbose = verbose
+
+        # 대화와 법령 검색은 비동기 API(공용 이벤트 루프)를 사용
+        self.async_caller = SimpleToolCaller(TOOLS, ASYNC_TOOL_FUNCTIONS)
+
+        super().__init__((host, port), LLMServiceHandler)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="LLM 도구 호출 HTTP 서버")
+    parser.add_argument("--host", help="바인드 주소 (기본값: SERVER_HOST 또는 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="포트 (기본값: SERVER_PORT 또는 8000)")
+    parser.add_argument("--max-concurrency", type=int, help="동시에 처리하는 요청 수")
+    parser.add_argument("--max-queue", type=int, help="대기할 수 있는 요청 수")
+    parser.add_argument("--request-timeout", type=float, help="요청 제한 시간(초)")
+    parser.add_argument("--verbose", action="store_true", help="접속 로그 출력")
+    args = parser.parse_args(argv)
+
+    server = LLMHTTPServer(
+        host=args.host,
+        port=args.port,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        request_timeout=args.request_timeout,
+        verbose=args.verbose,
+    )
+
+    # LLM 서버 커넥션 미리 열어두기 (선택)
+    if os.getenv("LLM_WARMUP") == "True":
+        warmup_llm_client(
+            server.async_caller.base_url,
+            server.async_caller.api_key,
+            connections=int(os.getenv("LLM_WARMUP_CONNECTIONS", "1")),
+        )
+
+    host, port = server.server_address[:2]
+    print(f"🚀 서버 시작--> http://{host}:{port} {server.admission.stats()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+
+class Span:
+    """하나의 작업 구간 (시작/종료 시각, 부모 구간, 속성, 오류)"""
+
+    recording = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = None
+        self.attributes: Dict[str, Any] = {}
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_usage(self, usage: Dict[str, int]) -> None:
+        """LLM 응답의 usage 필드(토큰 수)를 속성으로 기록합니다."""
+        if not usage:
+            return
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            self.set_attribute(f"llm.{key}", usage.get(key))
+
+    def set_error(self, message: str) -> None:
+        """처리된 오류(오류 dict 반환 등)를 구간에 기록합니다."""
+        self.error = message
+
+    @property
+    def duration_ms(self) -> float:
+        end_time_ns = self.end_time_ns or time.time_ns()
+        return (end_time_ns - self.start_time_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time_ns / 1_000_000_000,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """추적을 사용하지 않을 때 돌려주는 아무 일도 하지 않는 구간"""
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+    def record_usage(self, usage: Dict[str, int]) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesSpanExporter:
+    """끝난 구간을 한 줄에 하나씩 JSON으로 파일에 추가합니다.
+
+    export()는 줄을 대기열에 넣기만 하고, 백그라운드 스레드가 한 번 열어 둔 파일에 모아서 씁니다.
+    (이벤트 루프에서 구간이 끝날 때마다 파일을 열고 쓰지 않음) 프로세스가 끝날 때 남은 줄을 모두 씁니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def format(self, span: Span) -> str:
+        """구간을 파일에 쓸 한 줄로 만듭니다."""
+        return json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write_lines, name="trace-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+        self._queue.put(self.format(span))
+
+    def _write_lines(self) -> None:
+        """대기열의 줄을 파일에 씁니다. (None을 받으면 끝냄)"""
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                lines = [self._queue.get()]
+                # 그사이 쌓인 줄은 한 번에 씀
+                while True:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = None in lines
+                f.writelines(line + "\n" for line in lines if line is not None)
+                f.flush()
+                for _ in lines:
+                    self._queue.task_done()
+                if closing:
+                    return
+
+    def flush(self) -> None:
+        """지금까지 내보낸 구간이 모두 파일에 쓰일 때까지 기다립니다."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """남은 줄을 모두 쓰고 백그라운드 스레드를 끝냅니다."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """속성 값을 OTLP/JSON AnyValue 형식으로 바꿉니다."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPJsonFileExporter(JsonLinesSpanExporter):
+    """끝난 구간을 OTLP/JSON(ExportTraceServiceRequest) 형식으로 한 줄씩 파일에 추가합니다.
+
+    OpenTelemetry Collector의 otlpjsonfile receiver 등으로 그대로 읽을 수 있습니다.
+    """
+
+    def __init__(self, path: str, service_name: str = "llm_tool_calling_practice"):
+        super().__init__(path)
+        self.service_name = service_name
+
+    def format(self, span: Span) -> str:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [otlp_span]}],
+                }
+            ]
+        }
+        return json.dumps(request, ensure_ascii=False)
+
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span():
+    """현재 진행 중인 구간을 반환합니다. (없거나 추적을 사용하지 않으면 아무 일도 하지 않는 구간)"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+class Tracer:
+    """contextvars로 부모-자식 관계를 이어가는 간단한 구간 추적기
+
+    asyncio 태스크, run_sync, 도구 스레드 풀은 모두 컨텍스트를 복사해 넘기므로
+    그 안에서 연 구간도 호출한 쪽 구간의 자식으로 기록됩니다.
+
+    환경변수:
+    - TRACE_EXPORTER: "jsonl" 또는 "otlp" (기본값: 추적 사용 안 함)
+    - TRACE_FILE: 구간을 기록할 파일 경로 (기본값: traces.jsonl)
+
+    사용 예시:
+    with tracer.span("search_laws", query=query) as span:
+        results = ...
+        span.set_attribute("db.row_count", len(results))
+    """
+
+    def __init__(self, exporter=None):
+        if exporter is None:
+            exporter_type = os.getenv("TRACE_EXPORTER", "").lower()
+            trace_file = os.getenv("TRACE_FILE", "traces.jsonl")
+            if exporter_type == "jsonl":
+                exporter = JsonLinesSpanExporter(trace_file)
+            elif exporter_type == "otlp":
+                exporter = OTLPJsonFileExporter(trace_file)
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, **attributes):
+        """현재 구간의 자식 구간을 시작합니다. 현재 구간으로 설정하지는 않으며 end_span()으로 닫아야 합니다.
+
+        제너레이터처럼 with 블록으로 감싸기 어려운 작업에 사용합니다.
+        """
+        if self.exporter is None:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_id=parent.span_id if parent else None,
+        )
+        span.set_attributes(**attributes)
+        return span
+
+    def end_span(self, span) -> None:
+        """구간을 닫고 내보냅니다."""
+        if not span.recording:
+            return
+        span.end_time_ns = time.time_ns()
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            print(f"추적 기록 오류: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """구간을 열고 with 블록이 끝나면 닫아서 내보냅니다. 예외는 오류로 기록한 뒤 그대로 전달합니다."""
+        if self.exporter is None:
+            yield _NOOP_SPAN
+            return
+
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def traced(self, name: str = None) -> Callable:
+        """함수 호출 전체를 하나의 구간으로 기록하는 데코레이터 (동기/비동기 함수 모두 지원)
+
+        함수 안에서는 current_span()으로 속성을 추가할 수 있습니다.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__name__
+
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+# 전역 인스턴스 생성 (TRACE_EXPORTER를 지정했을 때만 기록)
+tracer = Tracer()
@@ -1,19 +1,230 @@
 import json
+import asyncio
 import requests
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Tuple
 import inspect
 import os
 import psycopg2
 import re
-from util_tool_call import SimpleToolCaller
-from prompts import generate_prompt
-from db_utils import db_manager
+import contextvars
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from util_tool_call import SimpleToolCaller, run_sync, LLM_STRUCTURED_OUTPUT
+from prompts import generate_prompt, BATCH_JUDGMENT_SCHEMAS
+from json_stream import JSONArrayItemStream
+from search_backends import SearchBackend, search_backend
+from law_name_index import law_name_index
+from keyword_extractor import (
+    keyword_extractor,
+    parse_keyword_result,
+    format_keyword_result,
+)
+from chunk_cache import chunk_cache
+from context_packer import (
+    pack_law_contexts,
+    build_token_batches,
+    truncate_to_tokens,
+    LAW_BATCH_MAX_TOKENS,
+)
+from chunk_prefilter import prefilter_law_chunks
+from tracing import tracer, current_span
+
+# LLM 배치 판단(충분성 검사, 추가 검색 필요성 확인)을 동시에 보낼 최대 개수
+LAW_BATCH_CONCURRENCY = int(os.getenv("LAW_BATCH_CONCURRENCY", "4"))
+
+# "True"이면 기본 검색의 충분성 검사와 추가 검색 필요성 판단을 batch_law_relevance 프롬프트 한 번으로 처리
+COMBINED_RELEVANCE_CHECK = os.getenv("COMBINED_RELEVANCE_CHECK") == "True"
+
+# 배치 판단을 JSON 스트리밍으로 받아 청크별 결과를 도착하는 대로 처리할지 여부
+# (LLM_STRUCTURED_OUTPUT이 "json_schema" 또는 "guided_json"인 경우)
+STRUCTURED_BATCH_JUDGMENT = LLM_STRUCTURED_OUTPUT in ("json_schema", "guided_json")
+
+# 충분성 검사가 실패한 청크의 판단 결과
+CHECK_ERROR_VERDICT = "검사 중 오류가 발생했습니다."
+
+# 프로세스 전체에서 동시에 실행할 수 있는 추가 검색 수
+ADDITIONAL_SEARCH_CONCURRENCY = int(os.getenv("ADDITIONAL_SEARCH_CONCURRENCY", "6"))
+
+# asyncio.Semaphore는 이벤트 루프에 묶이므로 루프별로 관리합니다
+_additional_search_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_additional_search_semaphore() -> asyncio.Semaphore:
+    """현재 이벤트 루프에서 추가 검색 동시 실행 수를 제한하는 공용 세마포어를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    semaphore = _additional_search_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(ADDITIONAL_SEARCH_CONCURRENCY)
+        _additional_search_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def gather_with_concurrency(limit: int, coros: List) -> List:
+    """동시에 실행되는 코루틴 수를 limit 개로 제한하여 실행하고, 입력 순서대로 결과를 반환합니다."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[run(coro) for coro in coros])
+
+
+@dataclass(slots=True)
+class LawChunk:
+    """법령 검색 파이프라인(검색 → 충분성 검사 → 결과 정리)에서 주고받는 청크 정보"""
+
+    id: int
+    text: str
+    law_name: str = ""  # chunk.keyword1
+    article: str = None  # 제N조, 별표N 등 (본문 첫 줄에서 추출)
+    score: float = None  # 검색 점수 (paradedb.score)
+    verdict: str = None  # 충분성 판단 결과
+
+
+def extract_article_reference(text: str) -> str:
+    """법령 본문 첫 줄에서 조항 표기(제N조, 제N조의M, 별표N, 별지N, 부칙)를 찾아 반환합니다."""
+    first_line = text.strip().split("\n")[0]
+    match = re.search(r"제\s*\d+\s*조(의\s*\d+)?|(별표|별지)\s*\d+(의\s*\d+)?|부칙", first_line)
+    return re.sub(r"\s+", "", match.group()) if match else None
+
+
+class RequestContext:
+    """요청 하나(find_relevant_laws 호출 트리) 동안 공유하는 상태
+
+    - 법령명/키워드 추출 결과 캐시: 같은 질의 문자열에 대한 추출은 한 번만 LLM에 요청하며,
+      동시에 들어온 같은 요청은 진행 중인 호출의 결과를 함께 기다립니다.
+    - 이미 다룬 청크 id: 기본 검색과 추가 검색에서 같은 청크가 다시 나와도
+      조회, 충분성 검사, 결과 포함은 한 번만 합니다. 검색 시점에 청크를 맡아 두고(claim),
+      판단을 마치지 못한 청크(사전 필터 제외, 검사 오류, 중단)는 다시 내놓아(release)
+      같은 요청의 다른 검색이 다룰 수 있게 합니다.
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.seen_chunk_ids = set()
+        self.skipped_chunks = 0
+        self.pruned_chunks = 0
+
+    async def get_or_compute(
+        self, prompt_type: str, query: str, compute: Callable
+    ) -> str:
+        """캐시된 결과가 있으면 반환하고, 없으면 compute()를 실행해 저장합니다."""
+        key = (prompt_type, query)
+        future = self._results.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(compute())
+            self._results[key] = future
+        else:
+            self.hits += 1
+
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # 실패한 결과는 캐시하지 않음
+            if self._results.get(key) is future:
+                del self._results[key]
+            raise
+
+    def claim_chunks(self, ids: List[int]) -> List[int]:
+        """아직 다루지 않은 청크 id만 골라 반환하고, 다룬 것으로 표시합니다."""
+        new_ids = []
+        for id in ids:
+            if id in self.seen_chunk_ids:
+                self.skipped_chunks += 1
+            else:
+                self.seen_chunk_ids.add(id)
+                new_ids.append(id)
+        return new_ids
+
+    def release_chunks(self, ids) -> None:
+        """판단을 마치지 못한 청크 id를 다루지 않은 것으로 되돌립니다."""
+        self.seen_chunk_ids.difference_update(ids)
+
+    def stats(self) -> Dict[str, int]:
+        """추출 캐시 적중/미스 횟수, 중복으로 건너뛴 청크 수, 사전 필터로 제외한 청크 수를 반환합니다."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_chunks": self.skipped_chunks,
+            "pruned_chunks": self.pruned_chunks,
+        }
+
+
+_request_context = contextvars.ContextVar("request_context", default=None)
+
+
+@contextmanager
+def request_scope():
+    """with 블록 안의 법령 검색들이 하나의 RequestContext를 공유하도록 합니다.
+
+    사용 예시:
+    with request_scope() as context:
+        answer = await afind_relevant_laws(question)
+    print(context.stats())
+    """
+    context = RequestContext()
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+async def _aextract(prompt_type: str, query: str) -> str:
+    """추출 프롬프트(law_name_extraction, keyword_extraction)를 LLM에 요청합니다."""
+
+    async def compute() -> str:
+        caller = SimpleToolCaller()
+        return await caller.achat(
+            generate_prompt(prompt_type, query=query), with_tools=False
+        )
+
+    context = _request_context.get()
+    if context is None:
+        return await compute()
+    return await context.get_or_compute(prompt_type, query, compute)
+
+
+async def aextract_law_names(query: str) -> str:
+    """질문에 포함된 법령 이름과 조항 번호를 추출합니다.
+
+    법률명 사전(law_name_index)에서 먼저 찾고, 찾지 못한 경우에만 LLM으로 추출합니다. (요청 단위로 캐시)
+    """
+    if law_name_index.enabled:
+        if not law_name_index.loaded:
+            await asyncio.to_thread(law_name_index.load, search_backend)
+        matches = law_name_index.find(query)
+        if matches:
+            print("🔍 법률명 사전 매칭-->", matches)
+            return law_name_index.format_result(matches)
+    return await _aextract("law_name_extraction", query)
+
+
+async def aextract_keywords(query: str) -> str:
+    """질문에서 검색 키워드를 추출합니다.
+
+    KEYWORD_EXTRACTOR=local이면 로컬 추출기를 먼저 사용하고, 키워드를 찾지 못한 경우에만 LLM으로 추출합니다.
+    (요청 단위로 캐시)
+    """
+    if keyword_extractor.enabled:
+        if not keyword_extractor.loaded:
+            await asyncio.to_thread(keyword_extractor.load, search_backend)
+        keywords = keyword_extractor.extract(query)
+        if keywords:
+            return format_keyword_result(keywords)
+    return await _aextract("keyword_extraction", query)
 
 
 # 법령 검색 클래스
 class LawSearcher:
-    def __init__(self):
-        pass
+    def __init__(self, backend: SearchBackend = None):
+        # 검색 백엔드 (기본값: SEARCH_BACKEND 환경변수로 정한 전역 백엔드)
+        self.backend = backend or search_backend
 
     def extract_article_number(self, text):
         """법령의 조항 번호를 추출합니다."""
@@ -65,30 +276,36 @@ class LawSearcher:
         # print("🔍 RESULT LIST-->", result_list)
         return result_list
 
-    def search_laws(self, query: str, k: int = 40) -> Dict[str, Any]:
-        """질문에 관련된 법령들을 검색하여 chunk ID 리스트를 반환합니다."""
-        # SimpleToolCaller 인스턴스 생성
-        caller = SimpleToolCaller()
-
-        # 질문에 법령 이름이 포함된 경우 추출
-        law_name_result = caller.chat(
-            generate_prompt("law_name_extraction", query=query), with_tools=False
+    def search_laws(
+        self, query: str, k: int = 40, include_content: bool = False
+    ) -> Dict[str, Any]:
+        """질문에 관련된 법령들을 검색하여 chunk ID 리스트를 반환합니다.
+
+        include_content=True이면 각 결과에 법령 내용(text), 법령명(keyword1), 점수(similarity)를
+        함께 담아 반환하므로 get_law_content_by_id를 따로 호출할 필요가 없습니다.
+        """
+        return run_sync(self.asearch_laws(query, k, include_content))
+
+    @tracer.traced("search_laws")
+    async def asearch_laws(
+        self, query: str, k: int = 40, include_content: bool = False
+    ) -> Dict[str, Any]:
+        """search_laws의 비동기 버전입니다."""
+        current_span().set_attributes(query=query, k=k, include_content=include_content)
+        # 법령 이름 추출과 키워드 추출은 서로 독립적이므로 동시에 요청
+        law_name_result, keyword = await asyncio.gather(
+            # 질문에 법령 이름이 포함된 경우 추출
+            aextract_law_names(query),
+            # 질문에서 찾고자 하는 주요 키워드 추출
+            aextract_keywords(query),
         )
         # print("🔍 포함된 법령 이름-->", law_name_result)
         law_name_parsed = self.parse_law_results(law_name_result)
         print("🔍 법령 이름 추출 결과-->", law_name_parsed)
 
-        # 질문에서 찾고자 하는 주요 키워드 추출
-        keyword = caller.chat(
-            generate_prompt("keyword_extraction", query=query), with_tools=False
-        )
         # print("🔍 LLM이 찾은 키워드-->", keyword)
-        # 맨 앞에 키워드: 가 있으면 제거
-        if keyword.startswith("키워드:"):
-            keyword = keyword[len("키워드:") :]
-        # 결과를 리스트로 변환
-        keyword = keyword.split(",")
-        keyword = [keyword.strip() for keyword in keyword]
+        # 결과를 리스트로 변환 (맨 앞의 "키워드:" 제거)
+        keyword = parse_keyword_result(keyword)
         # 키워드 중 법률명 또는 "대통령령"이 포함된 경우 제거
         keyword = [
             keyword
@@ -100,243 +317,761 @@ class LawSearcher:
         # 법률명에서 공백 제거
         law_name_no_space = law_name_parsed[0]["법률명"].replace(" ", "")
 
-        # execute sql
-        if law_name_no_space == "해당없음":
-            sql_query = f"""SELECT ch2.id FROM document JOIN collection cl ON document.collection_id = cl.id JOIN chunk ch2 ON ch2.document_id = document.id WHERE cl.usage = 'rag' AND (cl.scenario->>'law_no_ordin' = 'Y')  AND (NOT document.collection_id = 4  AND document.document_meta->>'path' NOT ILIKE '/data/law/ordin/%') AND ((text @@@ '{" ".join(keyword)}')) ORDER BY paradedb.score(ch2.id) DESC LIMIT {k};"""
+        # 실제 검색은 검색 백엔드에 맡김 (법률명이 없으면 전체 법령에서 검색)
+        law_name = law_name_no_space if law_name_no_space != "해당없음" else None
+        current_span().set_attribute("search.backend", self.backend.name)
+        result = await asyncio.to_thread(
+            self.backend.search, keyword, law_name, k, include_content
+        )
+        current_span().set_attribute("db.row_count", len(result.get("results", [])))
+        # 사전 필터(prefilter_law_chunks)에서 쓰도록 검색 키워드도 함께 반환
+        if "error" not in result:
+            result["keywords"] = keyword
+        return result
+
+    def search_law_chunks(self, query: str, k: int = 40) -> Dict[str, Any]:
+        """질문에 관련된 법령들을 검색하여 LawChunk 목록(점수 순)으로 반환합니다."""
+        return run_sync(self.asearch_law_chunks(query, k))
+
+    async def asearch_law_chunks(self, query: str, k: int = 40) -> Dict[str, Any]:
+        """search_law_chunks의 비동기 버전입니다.
+
+        request_scope 안에서 호출되면 같은 요청에서 이미 다룬 청크는 내용을 조회하지 않고 제외합니다.
+        """
+        # 청크 캐시를 사용하지 않으면 법령 내용까지 한 번의 쿼리로 조회
+        law_results = await self.asearch_laws(
+            query, k, include_content=not chunk_cache.enabled
+        )
+        if "error" in law_results:
+            return law_results
+        rows = law_results["results"]
+
+        # 같은 요청에서 이미 다룬 청크 제외
+        context = _request_context.get()
+        if context is not None:
+            new_ids = set(context.claim_chunks([row["id"] for row in rows]))
+            rows = [row for row in rows if row["id"] in new_ids]
+
+        if chunk_cache.enabled:
+            # 캐시에 있는 내용은 그대로 쓰고 나머지만 한 번에 조회
+            try:
+                law_contents_result = await self.aget_law_contents_by_ids(
+                    [row["id"] for row in rows]
+                )
+            except BaseException:
+                if context is not None:
+                    context.release_chunks(row["id"] for row in rows)
+                raise
+            if "error" in law_contents_result:
+                if context is not None:
+                    context.release_chunks(row["id"] for row in rows)
+                return law_contents_result
+            text_by_id = {law["id"]: law["text"] for law in law_contents_result["results"]}
         else:
-            sql_query = f"""WITH t1 AS (SELECT ch2.id, ch2.keyword1, paradedb.score(ch2.id) AS similarity FROM document JOIN collection cl ON document.collection_id = cl.id JOIN chunk ch2 ON ch2.document_id = document.id WHERE cl.usage = 'rag' AND (cl.scenario->>'law_no_ordin' = 'Y')  AND (NOT document.collection_id = 4  AND document.document_meta->>'path' NOT ILIKE '/data/law/ordin/%') AND ((text @@@ '{" ".join(keyword)}')) OFFSET 0
-            ) SELECT id, similarity FROM t1 WHERE keyword1='{law_name_no_space}' ORDER BY similarity DESC LIMIT {k};"""
+            text_by_id = {row["id"]: row["text"] for row in rows}
 
-        return db_manager.execute_query(sql_query)
+        # 내용을 찾지 못한 청크는 다른 검색이 다시 다룰 수 있게 반환
+        if context is not None:
+            context.release_chunks(
+                row["id"] for row in rows if row["id"] not in text_by_id
+            )
+
+        # 점수 순서 유지
+        return {
+            "keywords": law_results.get("keywords", []),
+            "results": [
+                LawChunk(
+                    id=row["id"],
+                    text=text_by_id[row["id"]],
+                    law_name=row.get("keyword1") or "",
+                    article=extract_article_reference(text_by_id[row["id"]]),
+                    score=row.get("similarity"),
+                )
+                for row in rows
+                if row["id"] in text_by_id
+            ]
+        }
 
     def get_law_content_by_id(self, id: int) -> str:
         """chunk id에 해당하는 법령 내용을 반환합니다."""
-        sql_query = f"""SELECT text FROM chunk WHERE id = {id};"""
+        # 청크 캐시에 있으면 DB 조회 생략
+        if chunk_cache.enabled:
+            cached_text = chunk_cache.get(id)
+            if cached_text is not None:
+                return {"results": [cached_text]}
 
-        result = db_manager.execute_query_single(sql_query)
+        result = self.backend.get_texts([id])
         if "error" in result:
             return result
+        if not result["results"]:
+            return {"error": "결과가 없습니다."}
+        text = result["results"][0]["text"]
+        if chunk_cache.enabled:
+            chunk_cache.put(id, text)
+        return {"results": [text]}
+
+    async def aget_law_content_by_id(self, id: int) -> str:
+        """get_law_content_by_id의 비동기 버전입니다."""
+        return await asyncio.to_thread(self.get_law_content_by_id, id)
+
+    def get_law_contents_by_ids(self, ids: List[int]) -> Dict[str, Any]:
+        """여러 chunk id의 법령 내용을 한 번의 쿼리로 가져와 입력 순서(점수 순)대로 반환합니다.
+
+        사용 예시:
+        result = LawSearcher().get_law_contents_by_ids([3, 1, 2])
+        if "error" not in result:
+            for law in result["results"]:
+                print(law["id"], law["text"])
+        """
+        if not ids:
+            return {"results": []}
+
+        # 청크 캐시에 없는 id만 DB에서 조회
+        if chunk_cache.enabled:
+            text_by_id, missing_ids = chunk_cache.get_many(ids)
         else:
-            # print("🔍 RESULT-->", result)
-            return {"results": [result["result"]["text"]]}
+            text_by_id, missing_ids = {}, list(ids)
+
+        if missing_ids:
+            result = self.backend.get_texts(missing_ids)
+            if "error" in result:
+                return result
+
+            fetched = {row["id"]: row["text"] for row in result["results"]}
+            if chunk_cache.enabled:
+                chunk_cache.put_many(fetched)
+            text_by_id.update(fetched)
+
+        # 입력 순서 유지 (결과가 없는 id는 제외)
+        return {
+            "results": [
+                {"id": id, "text": text_by_id[id]} for id in ids if id in text_by_id
+            ]
+        }
+
+    async def aget_law_contents_by_ids(self, ids: List[int]) -> Dict[str, Any]:
+        """get_law_contents_by_ids의 비동기 버전입니다."""
+        return await asyncio.to_thread(self.get_law_contents_by_ids, ids)
 
 
 # 법령 내용 충분성 검사 함수 (LLM 기반)
+def parse_law_sufficiency_result(result: str, law_contents: List[str]) -> List[str]:
+    """batch_law_sufficiency 프롬프트의 응답을 청크별 판단 결과로 변환합니다."""
+    results = []
+    lines = result.strip().split("\n")
+
+    for i, line in enumerate(lines):
+        if f"{i+1}번 법령:" in line:
+            # "부분적 충분함"에도 "충분함"이 포함되므로 먼저 확인
+            if "부분적 충분함" in line:
+                results.append("부분적 충분함")
+            elif "충분함" in line:
+                results.append("충분함")
+            else:
+                results.append("부족함")
+        else:
+            # 파싱 실패 시 기본값
+            results.append("부족함")
+
+    # 결과 개수가 청크 개수와 맞지 않으면 기본값으로 채움
+    while len(results) < len(law_contents):
+        results.append("부족함")
+
+    return results[: len(law_contents)]
+
+
 def check_law_sufficiency(law_contents: List[str], user_question: str) -> List[str]:
     """LLM을 사용하여 여러 법령 내용이 사용자 질문에 답변하기에 충분한지 판단합니다."""
+    return run_sync(acheck_law_sufficiency(law_contents, user_question))
+
+
+@tracer.traced("check_law_sufficiency")
+async def acheck_law_sufficiency(
+    law_contents: List[str], user_question: str
+) -> List[str]:
+    """check_law_sufficiency의 비동기 버전입니다."""
+    span = current_span()
+    span.set_attribute("chunk_count", len(law_contents))
     try:
-        # SimpleToolCaller 인스턴스 생성
-        caller = SimpleToolCaller()
+        if STRUCTURED_BATCH_JUDGMENT:
+            # JSON 출력 모드로 청크별 판단을 받음
+            judgments = await _ajudge_batch_structured(
+                "batch_law_sufficiency", law_contents, user_question
+            )
+            sufficiency_results = [judgment["verdict"] for judgment in judgments]
+        else:
+            # SimpleToolCaller 인스턴스 생성
+            caller = SimpleToolCaller()
+
+            # LLM에게 각 청크별로 판단하도록 요청
+            result = await caller.achat(
+                generate_prompt(
+                    "batch_law_sufficiency",
+                    # 혼자서 배치 한도를 넘는 청크는 잘라서 넣음
+                    law_contents=[
+                        truncate_to_tokens(content, LAW_BATCH_MAX_TOKENS)
+                        for content in law_contents
+                    ],
+                    user_question=user_question,
+                ),
+                with_tools=False,
+            )
+            # print("🔍 BATCH LAW SUFFICIENCY RESULT-->", result)
 
-        # LLM에게 각 청크별로 판단하도록 요청
-        result = caller.chat(
-            generate_prompt(
-                "batch_law_sufficiency",
-                law_contents=law_contents,
-                user_question=user_question,
-            ),
-            with_tools=False,
+            # 결과 파싱
+            sufficiency_results = parse_law_sufficiency_result(result, law_contents)
+        span.set_attribute(
+            "sufficient_count",
+            sum(1 for verdict in sufficiency_results if "충분함" in verdict),
         )
-        # print("🔍 BATCH LAW SUFFICIENCY RESULT-->", result)
+        return sufficiency_results
 
-        # 결과 파싱
-        results = []
-        lines = result.strip().split("\n")
+    except Exception as e:
+        print(f"충분성 검사 오류: {e}")
+        span.set_error(str(e))
+        return [CHECK_ERROR_VERDICT] * len(law_contents)
 
-        for i, line in enumerate(lines):
-            if f"{i+1}번 법령:" in line:
-                if "충분함" in line:
-                    results.append("충분함")
-                elif "부분적 충분함" in line:
-                    results.append("부분적 충분함")
-                else:
-                    results.append("부족함")
-            else:
-                # 파싱 실패 시 기본값
-                results.append("부족함")
 
-        # 결과 개수가 청크 개수와 맞지 않으면 기본값으로 채움
-        while len(results) < len(law_contents):
-            results.append("부족함")
+def _classify_verdict(line: str) -> str:
+    """판단 결과 한 줄에서 충분성 판단을 꺼냅니다."""
+    # "부분적 충분함"에도 "충분함"이 포함되므로 먼저 확인
+    if "부분적 충분함" in line:
+        return "부분적 충분함"
+    if "충분함" in line:
+        return "충분함"
+    return "부족함"
 
-        return results[: len(law_contents)]
+
+def parse_law_relevance_result(
+    result: str, law_contents: List[str], current_law_name: str = ""
+) -> List[Dict[str, Any]]:
+    """batch_law_relevance 프롬프트의 응답을 청크별 판단 결과로 변환합니다.
+
+    각 항목은 parse_additional_search_result의 추가 검색 정보에 충분성 판단("verdict")을 더한 dict입니다.
+    "부족함"인 청크는 추가 검색을 요청했더라도 추가 검색하지 않습니다.
+    """
+    verdicts = ["부족함"] * len(law_contents)
+    for line in result.strip().split("\n"):
+        match = re.match(r"\s*(\d+)번 법령:(.*)", line)
+        if match and 1 <= int(match.group(1)) <= len(law_contents):
+            verdicts[int(match.group(1)) - 1] = _classify_verdict(match.group(2))
+
+    results = parse_additional_search_result(result, law_contents, current_law_name)
+    for verdict, follow_up in zip(verdicts, results):
+        follow_up["verdict"] = verdict
+        if verdict == "부족함":
+            follow_up["needs_additional_search"] = False
+    return results
+
+
+def check_law_relevance(
+    law_contents: List[str], user_question: str, current_law_name: str = ""
+) -> List[Dict[str, Any]]:
+    """여러 법령 내용의 충분성과 추가 검색 필요성을 LLM 호출 한 번으로 판단합니다."""
+    return run_sync(acheck_law_relevance(law_contents, user_question, current_law_name))
+
+
+@tracer.traced("check_law_relevance")
+async def acheck_law_relevance(
+    law_contents: List[str],
+    user_question: str,
+    current_law_name: str = "",
+    on_result: Callable[[int, Dict[str, Any]], None] = None,
+) -> List[Dict[str, Any]]:
+    """check_law_relevance의 비동기 버전입니다.
+
+    on_result(청크 번호, 판단 결과)는 청크별 판단이 나오는 대로 호출됩니다.
+    (STRUCTURED_BATCH_JUDGMENT이면 스트리밍 중에, 아니면 응답 파싱 직후)
+    """
+    span = current_span()
+    span.set_attribute("chunk_count", len(law_contents))
+    try:
+        if STRUCTURED_BATCH_JUDGMENT:
+            relevance_results = await _ajudge_batch_structured(
+                "batch_law_relevance",
+                law_contents,
+                user_question,
+                current_law_name,
+                on_result,
+            )
+        else:
+            caller = SimpleToolCaller()
+
+            # LLM에게 각 청크별로 충분성과 추가 검색 필요성을 함께 판단하도록 요청
+            result = await caller.achat(
+                generate_prompt(
+                    "batch_law_relevance",
+                    # 혼자서 배치 한도를 넘는 청크는 잘라서 넣음
+                    law_contents=[
+                        truncate_to_tokens(content, LAW_BATCH_MAX_TOKENS)
+                        for content in law_contents
+                    ],
+                    user_question=user_question,
+                ),
+                with_tools=False,
+            )
+
+            relevance_results = parse_law_relevance_result(
+                result, law_contents, current_law_name
+            )
+            if on_result:
+                for index, relevance_result in enumerate(relevance_results):
+                    on_result(index, relevance_result)
+        span.set_attributes(
+            sufficient_count=sum(
+                1 for r in relevance_results if "충분함" in r["verdict"]
+            ),
+            needs_additional_search_count=sum(
+                1 for r in relevance_results if r["needs_additional_search"]
+            ),
+        )
+        return relevance_results
 
     except Exception as e:
-        print(f"충분성 검사 오류: {e}")
-        return ["검사 중 오류가 발생했습니다."] * len(law_contents)
+        print(f"법령 관련성 판단 오류: {e}")
+        span.set_error(str(e))
+        return [
+            {
+                "verdict": CHECK_ERROR_VERDICT,
+                "needs_additional_search": False,
+                "error": f"판단 중 오류가 발생했습니다: {str(e)}",
+            }
+            for _ in law_contents
+        ]
 
 
 def search_and_analyze_laws(
-    query: str, user_question: str, batch_size: int = 10
+    query: str,
+    user_question: str,
+    batch_size: int = None,
+    max_concurrency: int = None,
+    with_follow_up: bool = False,
 ) -> Dict[str, Any]:
     """질문에 관련된 법령을 검색하고 충분성을 검사하여 관련된 법령들을 반환합니다."""
+    return run_sync(
+        asearch_and_analyze_laws(
+            query, user_question, batch_size, max_concurrency, with_follow_up
+        )
+    )
+
+
+@tracer.traced("search_and_analyze_laws")
+async def asearch_and_analyze_laws(
+    query: str,
+    user_question: str,
+    batch_size: int = None,
+    max_concurrency: int = None,
+    with_follow_up: bool = False,
+    on_follow_up: Callable[[LawChunk, Dict[str, Any]], None] = None,
+) -> Dict[str, Any]:
+    """search_and_analyze_laws의 비동기 버전입니다.
+
+    충분성 검사 배치는 추정 토큰 수 기준으로 나누며(배치당 최대 batch_size개, 기본값: LAW_BATCH_MAX_ITEMS),
+    최대 max_concurrency개(기본값: LAW_BATCH_CONCURRENCY)까지 동시에 요청하고,
+    결과는 검색 순서대로 합칩니다. "results"는 충분성 판단(verdict)이 채워진 LawChunk 목록입니다.
+
+    with_follow_up=True이면 batch_law_relevance 프롬프트로 추가 검색 필요성까지 함께 판단하고,
+    "follow_ups"에 관련 청크별 (LawChunk, 추가 검색 정보) 목록을 담아 반환합니다.
+    이때 on_follow_up(LawChunk, 추가 검색 정보)을 주면 관련 청크의 판단이 나오는 대로 호출하므로
+    나머지 배치를 기다리지 않고 추가 검색을 시작할 수 있습니다.
+
+    request_scope 안에서는 검색으로 맡은 청크 중 판단을 마치지 못한 것(사전 필터 제외,
+    검사 오류, 오류나 취소로 중단)을 같은 요청의 다른 검색이 다시 다룰 수 있게 반환합니다.
+    """
     relevant_laws = []
+    context = _request_context.get()
+    unjudged_ids = set()
 
     try:
         # 법령 검색
-        law_result_ids = LawSearcher().search_laws(query)
+        law_chunks_result = await LawSearcher().asearch_law_chunks(query)
 
-        if "error" in law_result_ids:
-            print(f"법령 검색 오류: {law_result_ids['error']}")
-            return {"error": law_result_ids["error"], "results": relevant_laws}
+        if "error" in law_chunks_result:
+            print(f"법령 검색 오류: {law_chunks_result['error']}")
+            return {"error": law_chunks_result["error"], "results": relevant_laws}
 
-        if not law_result_ids["results"]:
+        law_chunks = law_chunks_result["results"]
+        if not law_chunks:
             print("검색 결과가 없습니다.")
             return {"error": None, "results": relevant_laws}
+        unjudged_ids = {law_chunk.id for law_chunk in law_chunks}
+
+        # 검색 키워드와 거의 관계없는 청크는 충분성 검사 전에 제외
+        law_chunks, pruned_count = prefilter_law_chunks(
+            law_chunks, law_chunks_result.get("keywords", [])
+        )
+        current_span().set_attribute("prefilter.pruned_chunks", pruned_count)
+        if context is not None:
+            context.pruned_chunks += pruned_count
+        if pruned_count:
+            print(f"🔍 사전 필터--> {pruned_count}개 청크 제외, {len(law_chunks)}개 검사")
+
+        # 토큰 수 기준 배치 단위로 충분성 검사 수행 (배치들은 동시에 요청)
+        batches = build_token_batches(law_chunks, max_items=batch_size)
+        if with_follow_up:
+            # 추가 검색 대상 기본값(현재 법령명 + 시행령)에 쓸 법령명 (요청 단위로 캐시되어 있음)
+            law_name_parsed = LawSearcher().parse_law_results(
+                await aextract_law_names(user_question)
+            )
+            current_law_name = law_name_parsed[0]["법률명"] if law_name_parsed else ""
+
+            def follow_up_callback(batch: List[LawChunk]):
+                """배치 안의 청크 번호로 받은 판단 결과를 관련 청크에 대해서만 on_follow_up으로 넘깁니다."""
+                if on_follow_up is None:
+                    return None
+
+                def on_result(index: int, relevance_result: Dict[str, Any]) -> None:
+                    if "충분함" in relevance_result["verdict"]:
+                        on_follow_up(batch[index], relevance_result)
 
-        # 법령 내용을 배치 단위로 가져오기
-        law_contents = []
-        for law_result_id in law_result_ids["results"]:
-            law_content = LawSearcher().get_law_content_by_id(law_result_id["id"])
-            if "error" not in law_content:
-                law_contents.extend(law_content["results"])
+                return on_result
 
-        # 배치 단위로 충분성 검사 수행
-        for i in range(0, len(law_contents), batch_size):
-            batch = law_contents[i : i + batch_size]
+            checks = [
+                acheck_law_relevance(
+                    [law_chunk.text for law_chunk in batch],
+                    user_question,
+                    current_law_name,
+                    on_result=follow_up_callback(batch),
+                )
+                for batch in batches
+            ]
+        else:
+            checks = [
+                acheck_law_sufficiency(
+                    [law_chunk.text for law_chunk in batch], user_question
+                )
+                for batch in batches
+            ]
+        batch_sufficiency_results = await gather_with_concurrency(
+            max_concurrency or LAW_BATCH_CONCURRENCY, checks
+        )
 
-            # 배치 전체를 한번에 충분성 검사
-            sufficiency_results = check_law_sufficiency(batch, user_question)
+        follow_ups = []
+        for batch, sufficiency_results in zip(batches, batch_sufficiency_results):
             # print("🔍 SUFFICIENCY RESULTS-->", sufficiency_results)
 
             # 각 청크별 결과에 따라 relevant_laws에 추가
-            for j, (law_content, sufficiency_result) in enumerate(
-                zip(batch, sufficiency_results)
-            ):
-                if (
-                    "충분함" in sufficiency_result
-                    or "부분적 충분함" in sufficiency_result
-                ):
-                    print("🔍 발견한 내용-->", law_content.split("\n")[0])
-                    relevant_laws.append(law_content)
-
+            for law_chunk, sufficiency_result in zip(batch, sufficiency_results):
+                verdict = (
+                    sufficiency_result["verdict"] if with_follow_up else sufficiency_result
+                )
+                if verdict != CHECK_ERROR_VERDICT:
+                    unjudged_ids.discard(law_chunk.id)
+                if "충분함" in verdict or "부분적 충분함" in verdict:
+                    print("🔍 발견한 내용-->", law_chunk.text.split("\n")[0])
+                    law_chunk.verdict = verdict
+                    relevant_laws.append(law_chunk)
+                    if with_follow_up:
+                        follow_ups.append((law_chunk, sufficiency_result))
+
+        if with_follow_up:
+            return {"error": None, "results": relevant_laws, "follow_ups": follow_ups}
         return {"error": None, "results": relevant_laws}
 
     except Exception as e:
         print(f"법령 검색 및 분석 중 오류 발생: {e}")
         return {"error": str(e), "results": relevant_laws}
 
+    finally:
+        if context is not None and unjudged_ids:
+            context.release_chunks(unjudged_ids)
 
-def check_additional_search_needed(
-    law_contents: List[str], user_question: str, current_law_name: str = ""
+
+def parse_additional_search_result(
+    batch_result: str, law_contents: List[str], current_law_name: str = ""
 ) -> List[Dict[str, Any]]:
-    """여러 법령 내용을 분석하여 사용자 질문에 답하기 위해 추가 검색이 필요한지 판단합니다."""
-    try:
-        # SimpleToolCaller 인스턴스 생성
-        caller = SimpleToolCaller()
+    """batch_additional_search 프롬프트의 응답을 청크별 추가 검색 정보로 변환합니다."""
+    results = []
 
-        # # 여러 청크를 구분자로 연결
-        # combined_content = "\n\n---\n\n".join(law_contents)
+    lines = batch_result.strip().split("\n")
+    current_law_index = -1
+    current_search_target = ""
+    current_search_keywords = ""
+    current_search_reason = ""
 
-        # result = caller.chat(
-        #     generate_prompt(
-        #         "additional_search",
-        #         law_content=combined_content,
-        #         user_question=user_question,
-        #     ),
-        #     with_tools=False,
-        # )
+    for line in lines:
+        # 새로운 법령 시작 확인
+        for i in range(len(law_contents)):
+            if f"{i+1}번 법령:" in line:
+                # 이전 법령의 결과 저장
+                if current_law_index >= 0:
+                    if "추가 검색 필요" in lines[current_law_index]:
+                        results.append(
+                            {
+                                "needs_additional_search": True,
+                                "search_target": current_search_target
+                                or (
+                                    current_law_name + " 시행령"
+                                    if current_law_name
+                                    else ""
+                                ),
+                                "search_keywords": current_search_keywords,
+                                "search_reason": current_search_reason
+                                or "법령 내용에서 추가 검색이 필요함",
+                                "full_result": lines[current_law_index],
+                            }
+                        )
+                    else:
+                        results.append(
+                            {
+                                "needs_additional_search": False,
+                                "full_result": lines[current_law_index],
+                            }
+                        )
+
+                # 새로운 법령 시작
+                current_law_index = len(results)
+                current_search_target = ""
+                current_search_keywords = ""
+                current_search_reason = ""
+                break
+
+        # 검색 대상, 키워드, 이유 파싱
+        if "검색 대상:" in line:
+            current_search_target = line.split("검색 대상:")[1].strip()
+        elif "검색 키워드:" in line:
+            current_search_keywords = line.split("검색 키워드:")[1].strip()
+        elif "검색 이유:" in line:
+            current_search_reason = line.split("검색 이유:")[1].strip()
+
+    # 마지막 법령의 결과 저장
+    if current_law_index >= 0 and current_law_index < len(lines):
+        if "추가 검색 필요" in lines[current_law_index]:
+            results.append(
+                {
+                    "needs_additional_search": True,
+                    "search_target": current_search_target
+                    or (current_law_name + " 시행령" if current_law_name else ""),
+                    "search_keywords": current_search_keywords,
+                    "search_reason": current_search_reason
+                    or "법령 내용에서 추가 검색이 필요함",
+                    "full_result": lines[current_law_index],
+                }
+            )
+        else:
+            results.append(
+                {
+                    "needs_additional_search": False,
+                    "full_result": lines[current_law_index],
+                }
+            )
 
-        # 결과 파싱 - 각 청크별로 추가 검색 필요성 판단
-        results = []
+    # 결과 개수가 청크 개수와 맞지 않으면 기본값으로 채움
+    while len(results) < len(law_contents):
+        results.append(
+            {
+                "needs_additional_search": False,
+                "full_result": "기본값",
+            }
+        )
 
-        # LLM에게 각 청크별로 판단하도록 요청
-        batch_result = caller.chat(
-            generate_prompt(
-                "batch_additional_search",
-                law_contents=law_contents,
-                user_question=user_question,
-            ),
-            with_tools=False,
+    return results[: len(law_contents)]
+
+
+def _default_batch_judgment(prompt_type: str) -> Dict[str, Any]:
+    """응답에서 빠진 청크에 쓸 기본 판단 결과를 만듭니다. (줄 단위 파서의 기본값과 같음)"""
+    if prompt_type == "batch_law_sufficiency":
+        return {"verdict": "부족함"}
+    judgment = {"needs_additional_search": False, "full_result": "기본값"}
+    if prompt_type == "batch_law_relevance":
+        judgment["verdict"] = "부족함"
+    return judgment
+
+
+def parse_batch_judgment_item(
+    prompt_type: str, item: Any, current_law_name: str = ""
+) -> Tuple[int, Dict[str, Any]]:
+    """JSON 출력 모드 응답의 항목 하나를 (0부터 시작하는 청크 번호, 판단 결과)로 변환합니다.
+
+    판단 결과는 줄 단위 파서의 청크별 결과와 같은 형식입니다. (batch_law_sufficiency는
+    {"verdict": ...}) 번호를 알 수 없는 항목이면 (-1, None)을 반환합니다.
+    """
+    try:
+        index = int(item["index"]) - 1
+    except (TypeError, KeyError, ValueError):
+        return -1, None
+
+    judgment = {}
+    if prompt_type in ("batch_law_sufficiency", "batch_law_relevance"):
+        judgment["verdict"] = _classify_verdict(str(item.get("verdict", "")))
+    if prompt_type == "batch_law_sufficiency":
+        return index, judgment
+
+    # "부족함"인 청크는 추가 검색을 요청했더라도 추가 검색하지 않음
+    needs_additional_search = (
+        item.get("needs_additional_search") is True
+        and judgment.get("verdict") != "부족함"
+    )
+    judgment["needs_additional_search"] = needs_additional_search
+    if needs_additional_search:
+        judgment["search_target"] = item.get("search_target") or (
+            current_law_name + " 시행령" if current_law_name else ""
+        )
+        judgment["search_keywords"] = item.get("search_keywords") or ""
+        judgment["search_reason"] = (
+            item.get("search_reason") or "법령 내용에서 추가 검색이 필요함"
         )
+    judgment["full_result"] = json.dumps(item, ensure_ascii=False)
+    return index, judgment
 
-        # 결과 파싱
-        lines = batch_result.strip().split("\n")
-        current_law_index = -1
-        current_search_target = ""
-        current_search_keywords = ""
-        current_search_reason = ""
-
-        for line in lines:
-            # 새로운 법령 시작 확인
-            for i in range(len(law_contents)):
-                if f"{i+1}번 법령:" in line:
-                    # 이전 법령의 결과 저장
-                    if current_law_index >= 0:
-                        if "추가 검색 필요" in lines[current_law_index]:
-                            results.append(
-                                {
-                                    "needs_additional_search": True,
-                                    "search_target": current_search_target
-                                    or (
-                                        current_law_name + " 시행령"
-                                        if current_law_name
-                                        else ""
-                                    ),
-                                    "search_keywords": current_search_keywords,
-                                    "search_reason": current_search_reason
-                                    or "법령 내용에서 추가 검색이 필요함",
-                                    "full_result": lines[current_law_index],
-                                }
-                            )
-                        else:
-                            results.append(
-                                {
-                                    "needs_additional_search": False,
-                                    "full_result": lines[current_law_index],
-                                }
-                            )
-
-                    # 새로운 법령 시작
-                    current_law_index = len(results)
-                    current_search_target = ""
-                    current_search_keywords = ""
-                    current_search_reason = ""
-                    break
 
-            # 검색 대상, 키워드, 이유 파싱
-            if "검색 대상:" in line:
-                current_search_target = line.split("검색 대상:")[1].strip()
-            elif "검색 키워드:" in line:
-                current_search_keywords = line.split("검색 키워드:")[1].strip()
-            elif "검색 이유:" in line:
-                current_search_reason = line.split("검색 이유:")[1].strip()
-
-        # 마지막 법령의 결과 저장
-        if current_law_index >= 0 and current_law_index < len(lines):
-            if "추가 검색 필요" in lines[current_law_index]:
-                results.append(
-                    {
-                        "needs_additional_search": True,
-                        "search_target": current_search_target
-                        or (current_law_name + " 시행령" if current_law_name else ""),
-                        "search_keywords": current_search_keywords,
-                        "search_reason": current_search_reason
-                        or "법령 내용에서 추가 검색이 필요함",
-                        "full_result": lines[current_law_index],
-                    }
-                )
-            else:
-                results.append(
-                    {
-                        "needs_additional_search": False,
-                        "full_result": lines[current_law_index],
-                    }
-                )
+def _parse_batch_judgment_text(
+    prompt_type: str, result: str, law_contents: List[str], current_law_name: str = ""
+) -> List[Dict[str, Any]]:
+    """JSON이 아닌 자유 형식 응답을 줄 단위 파서로 해석합니다."""
+    if prompt_type == "batch_law_sufficiency":
+        return [
+            {"verdict": verdict}
+            for verdict in parse_law_sufficiency_result(result, law_contents)
+        ]
+    if prompt_type == "batch_law_relevance":
+        return parse_law_relevance_result(result, law_contents, current_law_name)
+    return parse_additional_search_result(result, law_contents, current_law_name)
 
-        # 결과 개수가 청크 개수와 맞지 않으면 기본값으로 채움
-        while len(results) < len(law_contents):
-            results.append(
-                {
-                    "needs_additional_search": False,
-                    "full_result": "기본값",
-                }
+
+async def _ajudge_batch_structured(
+    prompt_type: str,
+    law_contents: List[str],
+    user_question: str,
+    current_law_name: str = "",
+    on_result: Callable[[int, Dict[str, Any]], None] = None,
+) -> List[Dict[str, Any]]:
+    """배치 판단을 JSON 출력 모드로 요청하고 스트리밍 응답을 증분 파싱합니다.
+
+    청크별 판단이 완성되는 대로 on_result(청크 번호, 판단 결과)를 호출하므로, 나머지 청크의
+    판단이 생성되는 동안 먼저 도착한 청크의 후속 작업(추가 검색)을 시작할 수 있습니다.
+    JSON 항목을 하나도 얻지 못하면(구조화된 출력을 지원하지 않는 서버 등) 응답 전체를
+    줄 단위 파서로 해석합니다. 반환값은 청크 순서대로 정렬된 판단 결과 목록입니다.
+    """
+    caller = SimpleToolCaller()
+    item_stream = JSONArrayItemStream("results")
+    judgments = [None] * len(law_contents)
+
+    def accept(index: int, judgment: Dict[str, Any]) -> None:
+        if 0 <= index < len(judgments) and judgments[index] is None:
+            judgments[index] = judgment
+            if on_result:
+                on_result(index, judgment)
+
+    def on_token(token: str) -> None:
+        for item in item_stream.feed(token):
+            if isinstance(item, dict):
+                accept(*parse_batch_judgment_item(prompt_type, item, current_law_name))
+
+    response = await caller.astream_llm(
+        generate_prompt(
+            prompt_type,
+            # 혼자서 배치 한도를 넘는 청크는 잘라서 넣음
+            law_contents=[
+                truncate_to_tokens(content, LAW_BATCH_MAX_TOKENS)
+                for content in law_contents
+            ],
+            user_question=user_question,
+            json_output=True,
+        ),
+        on_token,
+        json_schema=BATCH_JUDGMENT_SCHEMAS[prompt_type],
+    )
+
+    current_span().set_attribute("structured_items", item_stream.items)
+    if item_stream.items == 0:
+        print(f"⚠️ {prompt_type} 응답이 JSON 형식이 아니어서 줄 단위로 해석합니다.")
+        content = response["choices"][0]["message"]["content"] or ""
+        for index, judgment in enumerate(
+            _parse_batch_judgment_text(
+                prompt_type, content, law_contents, current_law_name
             )
+        ):
+            accept(index, judgment)
+
+    # 응답에서 빠진 청크는 기본값으로 채움
+    for index, judgment in enumerate(judgments):
+        if judgment is None:
+            accept(index, _default_batch_judgment(prompt_type))
+    return judgments
 
-        return results[: len(law_contents)]
+
+def check_additional_search_needed(
+    law_contents: List[str], user_question: str, current_law_name: str = ""
+) -> List[Dict[str, Any]]:
+    """여러 법령 내용을 분석하여 사용자 질문에 답하기 위해 추가 검색이 필요한지 판단합니다."""
+    return run_sync(
+        acheck_additional_search_needed(law_contents, user_question, current_law_name)
+    )
+
+
+@tracer.traced("check_additional_search_needed")
+async def acheck_additional_search_needed(
+    law_contents: List[str],
+    user_question: str,
+    current_law_name: str = "",
+    on_result: Callable[[int, Dict[str, Any]], None] = None,
+) -> List[Dict[str, Any]]:
+    """check_additional_search_needed의 비동기 버전입니다.
+
+    on_result(청크 번호, 추가 검색 정보)는 청크별 판단이 나오는 대로 호출됩니다.
+    (STRUCTURED_BATCH_JUDGMENT이면 스트리밍 중에, 아니면 응답 파싱 직후)
+    """
+    span = current_span()
+    span.set_attribute("chunk_count", len(law_contents))
+    try:
+        if STRUCTURED_BATCH_JUDGMENT:
+            # JSON 출력 모드로 받으며 청크별 결과가 도착하는 대로 on_result 호출
+            additional_search_results = await _ajudge_batch_structured(
+                "batch_additional_search",
+                law_contents,
+                user_question,
+                current_law_name,
+                on_result,
+            )
+        else:
+            # SimpleToolCaller 인스턴스 생성
+            caller = SimpleToolCaller()
+
+            # # 여러 청크를 구분자로 연결
+            # combined_content = "\n\n---\n\n".join(law_contents)
+
+            # result = caller.chat(
+            #     generate_prompt(
+            #         "additional_search",
+            #         law_content=combined_content,
+            #         user_question=user_question,
+            #     ),
+            #     with_tools=False,
+            # )
+
+            # LLM에게 각 청크별로 판단하도록 요청
+            batch_result = await caller.achat(
+                generate_prompt(
+                    "batch_additional_search",
+                    # 혼자서 배치 한도를 넘는 청크는 잘라서 넣음
+                    law_contents=[
+                        truncate_to_tokens(content, LAW_BATCH_MAX_TOKENS)
+                        for content in law_contents
+                    ],
+                    user_question=user_question,
+                ),
+                with_tools=False,
+            )
+
+            # 결과 파싱 - 각 청크별로 추가 검색 필요성 판단
+            additional_search_results = parse_additional_search_result(
+                batch_result, law_contents, current_law_name
+            )
+            if on_result:
+                for index, additional_search_result in enumerate(
+                    additional_search_results
+                ):
+                    on_result(index, additional_search_result)
+        span.set_attribute(
+            "needs_additional_search_count",
+            sum(1 for r in additional_search_results if r["needs_additional_search"]),
+        )
+        return additional_search_results
 
     except Exception as e:
         print(f"추가 검색 필요성 판단 오류: {e}")
+        span.set_error(str(e))
         return [
             {
                 "needs_additional_search": False,
@@ -387,107 +1122,222 @@ def collect_additional_search_requirements(
                 )
 
 
+async def asearch_additional_requirement(
+    req: Dict, user_question: str
+) -> Dict[str, Any]:
+    """추가 검색 요구사항 하나를 검색하고 분석합니다. (ADDITIONAL_SEARCH_CONCURRENCY로 동시 실행 수 제한)"""
+    additional_query = f"{req['search_target']} {req['search_keywords']}"
+    async with get_additional_search_semaphore():
+        return await asearch_and_analyze_laws(additional_query, user_question)
+
+
 def perform_batch_additional_searches(
     requirements_list: List[Dict], user_question: str
 ) -> List[Dict]:
     """여러 추가 검색을 일괄적으로 수행합니다."""
+    return run_sync(aperform_batch_additional_searches(requirements_list, user_question))
+
+
+@tracer.traced("perform_batch_additional_searches")
+async def aperform_batch_additional_searches(
+    requirements_list: List[Dict],
+    user_question: str,
+    started: Dict[str, asyncio.Task] = None,
+) -> List[Dict]:
+    """perform_batch_additional_searches의 비동기 버전입니다.
+
+    모든 추가 검색을 동시에 시작하되, 프로세스 전체에서 동시에 실행되는 추가 검색 수는
+    ADDITIONAL_SEARCH_CONCURRENCY 개로 제한합니다. 일부 검색이 실패해도 나머지 결과와
+    실패한 검색이 그때까지 찾은 결과는 유지합니다.
+
+    started에는 search_key별로 이미 시작한 추가 검색 작업(asearch_additional_requirement)을
+    넘길 수 있으며, 해당 요구사항은 새로 검색하지 않고 그 결과를 기다립니다.
+    """
     results = []
+    started = started or {}
+    current_span().set_attributes(
+        requirement_count=len(requirements_list),
+        started_count=sum(1 for req in requirements_list if req["search_key"] in started),
+    )
 
     # print(f"🔍 PERFORMING BATCH SEARCHES FOR {len(requirements_list)} REQUIREMENTS")
 
-    # 배치 단위로 추가 검색 수행
-    batch_size = 10  # 배치 크기를 10으로 통일
-    for i in range(0, len(requirements_list), batch_size):
-        batch_requirements = requirements_list[i : i + batch_size]
+    additional_search_result_list = await asyncio.gather(
+        *[
+            started.get(req["search_key"])
+            or asearch_additional_requirement(req, user_question)
+            for req in requirements_list
+        ],
+        return_exceptions=True,
+    )
+
+    # 요구사항 순서대로 결과 정리
+    for req, additional_search_result_data in zip(
+        requirements_list, additional_search_result_list
+    ):
+        # print("🔍 ADDITIONAL SEARCH RESULT DATA-->", additional_search_result_data)
+        # 먼저 시작했다가 취소된 작업은 CancelledError(BaseException)로 돌아옴
+        if isinstance(additional_search_result_data, asyncio.CancelledError):
+            additional_search_result_data = {
+                "error": "추가 검색이 취소되었습니다.",
+                "results": [],
+            }
+        elif isinstance(additional_search_result_data, BaseException):
+            additional_search_result_data = {
+                "error": str(additional_search_result_data),
+                "results": [],
+            }
 
-        for req in batch_requirements:
-            additional_query = f"{req["search_target"]} {req["search_keywords"]}"
-            additional_search_result_data = search_and_analyze_laws(
-                additional_query, user_question, batch_size=10
-            )
-            # print("🔍 ADDITIONAL SEARCH RESULT DATA-->", additional_search_result_data)
+        if additional_search_result_data["error"] is not None:
+            print(f"🔍 BATCH SEARCH FAILED: {additional_search_result_data['error']}")
+            if not additional_search_result_data["results"]:
+                continue
 
-            if additional_search_result_data["error"] is None:
-                results.append(
-                    {
-                        "search_target": req["search_target"],
-                        "search_keywords": req["search_keywords"],
-                        # "search_reason": req["search_reason"],
-                        # "original_laws": req["original_laws"],
-                        "additional_law_content": additional_search_result_data[
-                            "results"
-                        ],
-                    }
-                )
-            else:
-                print(
-                    f"🔍 BATCH SEARCH FAILED: {additional_search_result_data['error']}"
-                )
+        results.append(
+            {
+                "search_target": req["search_target"],
+                "search_keywords": req["search_keywords"],
+                # "search_reason": req["search_reason"],
+                # "original_laws": req["original_laws"],
+                "additional_law_content": additional_search_result_data["results"],
+            }
+        )
 
+    current_span().set_attribute(
+        "chunk_count", sum(len(r["additional_law_content"]) for r in results)
+    )
     return results
 
 
 def find_relevant_laws(user_question: str, max_search_count: int = 30) -> str:
     """주어진 질문과 관련된 법령을 찾고 충분성을 검사하여 관련된 법령을 추려냅니다."""
+    return run_sync(afind_relevant_laws(user_question, max_search_count))
+
+
+@tracer.traced("find_relevant_laws")
+async def afind_relevant_laws(user_question: str, max_search_count: int = 30) -> str:
+    """find_relevant_laws의 비동기 버전입니다.
+
+    호출 트리 전체가 하나의 RequestContext를 공유하므로 같은 질의에 대한
+    법령명/키워드 추출은 한 번만 LLM에 요청하고, 같은 청크는 한 번만 조회·검사·포함합니다.
+    """
+    # 바깥에서 이미 request_scope를 열었다면 그대로 공유
+    if _request_context.get() is not None:
+        return await _afind_relevant_laws(user_question, max_search_count)
+
+    with request_scope() as context:
+        result = await _afind_relevant_laws(user_question, max_search_count)
+        print("🔍 요청 단위 캐시-->", context.stats())
+        return result
+
+
+async def _afind_relevant_laws(user_question: str, max_search_count: int = 30) -> str:
     additional_search_requirements = []  # 추가 검색 요구사항을 모으는 리스트
     additional_search_results = []
+    # 판단이 나오는 대로 먼저 시작한 추가 검색 (search_key -> 작업)
+    started_searches = {}
+    started_requirements = []
+    # 먼저 시작한 추가 검색도 판단 중인 LLM 호출이 아니라 이 요청의 추적 구간 아래에서 실행
+    search_context = contextvars.copy_context()
+
+    def on_follow_up(law_chunk: LawChunk, additional_search_result: Dict[str, Any]):
+        """새 추가 검색 요구사항이 나오면 나머지 판단을 기다리지 않고 바로 검색을 시작합니다."""
+        requirement_count = len(started_requirements)
+        collect_additional_search_requirements(
+            law_chunk.text, additional_search_result, started_requirements
+        )
+        for req in started_requirements[requirement_count:]:
+            print("🔍 추가 검색 시작-->", req["search_target"], req["search_keywords"])
+            started_searches[req["search_key"]] = asyncio.create_task(
+                asearch_additional_requirement(req, user_question),
+                context=search_context.copy(),
+            )
 
     try:
-        # 현재 법령명 추출
-        messages_law_name = generate_prompt("law_name_extraction", query=user_question)
-        caller = SimpleToolCaller()
-        law_name_result = caller.chat(messages_law_name, with_tools=False)
+        # 현재 법령명 추출과 기본 검색을 동시에 수행
+        # (기본 검색도 같은 질문으로 법령명을 추출하므로 LLM 호출은 한 번만 일어남)
+        law_name_result, relevant_laws = await asyncio.gather(
+            aextract_law_names(user_question),
+            # search_and_analyze_laws 함수를 활용하여 기본 검색 수행
+            # (COMBINED_RELEVANCE_CHECK이면 추가 검색 필요성도 같은 LLM 호출에서 판단)
+            asearch_and_analyze_laws(
+                user_question,
+                user_question,
+                with_follow_up=COMBINED_RELEVANCE_CHECK,
+                on_follow_up=on_follow_up,
+            ),
+        )
         law_name_parsed = LawSearcher().parse_law_results(law_name_result)
         current_law_name = law_name_parsed[0]["법률명"] if law_name_parsed else ""
+        # print("🔍 RELEVANT LAWS 1-->", [o.text[:40] for o in relevant_laws["results"]])
 
-        # search_and_analyze_laws 함수를 활용하여 기본 검색 수행
-        relevant_laws = search_and_analyze_laws(user_question, user_question)
-        # print("🔍 RELEVANT LAWS 1-->", [o[:40] for o in relevant_laws["results"]])
-
-        # 배치 단위로 추가 검색 필요성 확인
-        batch_size = 10
-        for i in range(0, len(relevant_laws["results"]), batch_size):
-            batch = relevant_laws["results"][i : i + batch_size]
-
+        if COMBINED_RELEVANCE_CHECK:
+            # 충분성 검사와 함께 판단한 추가 검색 정보 사용
+            chunk_follow_ups = relevant_laws.get("follow_ups", [])
+        else:
+            # 토큰 수 기준 배치 단위로 추가 검색 필요성 확인 (배치들은 동시에 요청)
+            batches = build_token_batches(relevant_laws["results"])
             print(
-                f"🔍 추가 검색 필요성 확인 (총 {len(relevant_laws['results']) // batch_size + 1}개 배치 중 {i//batch_size + 1}번째)-->",
-                len(batch),
+                f"🔍 추가 검색 필요성 확인 (총 {len(batches)}개 배치)-->",
+                len(relevant_laws["results"]),
                 "개 텍스트 청크",
             )
-
-            # 배치 전체를 한번에 추가 검색 필요성 확인
-            additional_search_results = check_additional_search_needed(
-                batch, user_question, current_law_name
+            batch_additional_search_results = await gather_with_concurrency(
+                LAW_BATCH_CONCURRENCY,
+                [
+                    acheck_additional_search_needed(
+                        [law_chunk.text for law_chunk in batch],
+                        user_question,
+                        current_law_name,
+                        on_result=lambda index, result, batch=batch: on_follow_up(
+                            batch[index], result
+                        ),
+                    )
+                    for batch in batches
+                ],
             )
-
-            # 각 청크별 결과에 따라 요구사항 수집
-            for j, (law_content, additional_search_result) in enumerate(
-                zip(batch, additional_search_results)
-            ):
-                collect_additional_search_requirements(
-                    law_content,
-                    additional_search_result,
-                    additional_search_requirements,
+            chunk_follow_ups = [
+                (law_chunk, additional_search_result)
+                for batch, additional_search_results in zip(
+                    batches, batch_additional_search_results
                 )
+                for law_chunk, additional_search_result in zip(
+                    batch, additional_search_results
+                )
+            ]
+
+        # 각 청크별 결과에 따라 요구사항 수집 (판단이 도착한 순서와 관계없이 청크 순서대로)
+        for law_chunk, additional_search_result in chunk_follow_ups:
+            collect_additional_search_requirements(
+                law_chunk.text,
+                additional_search_result,
+                additional_search_requirements,
+            )
+
+        # 판단 오류 등으로 최종 요구사항에 들지 못한 추가 검색은 중단
+        required_keys = {req["search_key"] for req in additional_search_requirements}
+        for search_key, task in started_searches.items():
+            if search_key not in required_keys:
+                task.cancel()
 
-        # print("🔍 RELEVANT LAWS 2-->", [o[:40] for o in relevant_laws["results"]])
+        # print("🔍 RELEVANT LAWS 2-->", [o.text[:40] for o in relevant_laws["results"]])
         print("🔍 추가 검색할 대상")
         for req in additional_search_requirements:
             print("-->", req["search_target"], req["search_keywords"])
 
         # 2단계: 수집된 추가 검색 요구사항들을 일괄 처리
         if additional_search_requirements:
-            additional_search_results = perform_batch_additional_searches(
-                additional_search_requirements, user_question
+            additional_search_results = await aperform_batch_additional_searches(
+                additional_search_requirements, user_question, started_searches
             )
         # print("🔍 ADDITIONAL SEARCH RESULTS-->", additional_search_results)
 
-        # 결과 정리 - 모든 법령 내용을 하나로 합침
-        all_law_contents = []
+        # 결과 정리 - 모든 법령 청크를 하나로 모음
+        all_law_chunks = []
 
         # 기본 검색 결과 추가
         if relevant_laws["results"]:
-            all_law_contents.extend(relevant_laws["results"])
+            all_law_chunks.extend(relevant_laws["results"])
 
         # 추가 검색 결과 추가
         if additional_search_results:
@@ -496,11 +1346,22 @@ def find_relevant_laws(user_question: str, max_search_count: int = 30) -> str:
                     "additional_law_content" in result
                     and result["additional_law_content"]
                 ):
-                    all_law_contents.extend(result["additional_law_content"])
+                    all_law_chunks.extend(result["additional_law_content"])
+
+        # 중복을 제거하고 토큰 예산 안에서 우선순위가 높은 법령부터 포함
+        packed_law_chunks, pack_report = pack_law_contexts(all_law_chunks)
+        print(
+            f"🔍 법령 내용 정리--> {pack_report['kept']}개 포함, {len(pack_report['dropped'])}개 제외 "
+            f"(약 {pack_report['used_tokens']}/{pack_report['budget']} 토큰)"
+        )
+        for dropped in pack_report["dropped"]:
+            print("--> 제외:", dropped["reason"], dropped["preview"])
 
         # 모든 법령 내용을 하나의 문자열로 결합
-        if all_law_contents:
-            combined_result = "\n\n".join(all_law_contents)
+        if packed_law_chunks:
+            combined_result = "\n\n".join(
+                law_chunk.text for law_chunk in packed_law_chunks
+            )
             return combined_result
         else:
             return "⚠️ 관련 법령을 찾지 못했습니다."
@@ -508,3 +1369,9 @@ def find_relevant_laws(user_question: str, max_search_count: int = 30) -> str:
     except Exception as e:
         print(f"법령 검색 중 오류 발생: {e}")
         return f"법령 검색 중 오류가 발생했습니다: {str(e)}"
+    finally:
+        # 먼저 시작했지만 결과를 쓰지 않게 된 추가 검색은 중단
+        # (제한 시간 등으로 요청이 취소되어 CancelledError가 전달될 때도 남기지 않음)
+        for task in started_searches.values():
+            if not task.done():
+                task.cancel()
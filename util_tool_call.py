@@ -1,19 +1,403 @@
 import json
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import threading
+import weakref
+import httpx
 import requests
-from typing import List, Dict, Any, Callable
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Coroutine, Iterator
 import inspect
 import os
+import queue
 from dotenv import load_dotenv
-from prompts import generate_prompt
+from prompts import generate_prompt, detect_prompt_type
+from llm_cache import LLMResponseCache, llm_cache
+from tracing import tracer
 
 # .env 파일 로드
 load_dotenv()
 
+# 배치 판단 프롬프트의 구조화된(JSON) 출력 모드
+# - "json_schema": OpenAI 호환 response_format={"type": "json_schema", ...}로 요청
+# - "guided_json": vLLM의 guided_json 파라미터로 요청
+# - 그 외(기본값): 사용 안 함 (자유 형식 답변을 줄 단위로 파싱)
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "")
+
+
+class LLMClient:
+    """requests 기반 프로세스 공용 HTTP 클라이언트 (keep-alive 커넥션 풀)
+
+    같은 세션을 공유하므로 호출마다 TCP/TLS 핸드셰이크를 다시 하지 않습니다.
+    SimpleToolCaller는 동기 API도 공용 이벤트 루프의 AsyncLLMClient로 호출합니다.
+
+    환경변수:
+    - LLM_POOL_SIZE: 호스트당 유지할 최대 커넥션 수 (기본값: 20)
+    - LLM_CONNECT_TIMEOUT: 연결 타임아웃(초) (기본값: 10)
+    - LLM_READ_TIMEOUT: 응답 대기 타임아웃(초) (기본값: 300)
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+    ):
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", "20"))
+        self.connect_timeout = connect_timeout or float(
+            os.getenv("LLM_CONNECT_TIMEOUT", "10")
+        )
+        self.read_timeout = read_timeout or float(os.getenv("LLM_READ_TIMEOUT", "300"))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(
+        self, url: str, headers: Dict, json: Dict, stream: bool = False
+    ) -> requests.Response:
+        """커넥션 풀을 사용하여 POST 요청을 보냅니다. (stream=True이면 본문을 나눠서 읽음)"""
+        return self.session.post(
+            url,
+            headers=headers,
+            json=json,
+            stream=stream,
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
+
+    def warmup(self, base_url: str, api_key: str, connections: int = 1) -> bool:
+        """서버 시작 시 커넥션을 미리 열어 첫 호출의 핸드셰이크 비용을 없앱니다.
+
+        사용 예시:
+        llm_client.warmup(caller.base_url, caller.api_key, connections=4)
+        """
+        headers = {"Authorization": f"Bearer {api_key}"}
+        connections = max(1, min(connections, self.pool_size))
+
+        def ping(_):
+            try:
+                response = self.session.get(
+                    f"{base_url}/models",
+                    headers=headers,
+                    timeout=(self.connect_timeout, self.connect_timeout),
+                )
+                return response.status_code == 200
+            except Exception as e:
+                print(f"LLM 커넥션 워밍업 오류: {e}")
+                return False
+
+        # 동시에 요청해야 풀에 여러 개의 커넥션이 만들어집니다
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            return all(executor.map(ping, range(connections)))
+
+    def close(self) -> None:
+        """풀에 열려 있는 커넥션을 모두 닫습니다."""
+        self.session.close()
+
+
+# 전역 인스턴스 생성 (모든 SimpleToolCaller가 공유)
+llm_client = LLMClient()
+
+
+class AsyncLLMClient:
+    """asyncio 기반 LLM HTTP 클라이언트 (이벤트 루프마다 하나씩 생성)
+
+    LLMClient와 같은 환경변수(LLM_POOL_SIZE, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)를 사용합니다.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+    ):
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", "20"))
+        self.connect_timeout = connect_timeout or float(
+            os.getenv("LLM_CONNECT_TIMEOUT", "10")
+        )
+        self.read_timeout = read_timeout or float(os.getenv("LLM_READ_TIMEOUT", "300"))
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+        )
+
+    async def post(self, url: str, headers: Dict, json: Dict) -> httpx.Response:
+        """커넥션 풀을 사용하여 POST 요청을 보냅니다."""
+        return await self.client.post(url, headers=headers, json=json)
+
+    def stream(self, url: str, headers: Dict, json: Dict):
+        """커넥션 풀을 사용하여 POST 요청을 보내고 본문을 나눠서 읽습니다. (async with로 사용)"""
+        return self.client.stream("POST", url, headers=headers, json=json)
+
+    async def warmup(self, base_url: str, api_key: str, connections: int = 1) -> bool:
+        """커넥션을 미리 열어 첫 호출의 핸드셰이크 비용을 없앱니다. (이 클라이언트의 이벤트 루프에서 실행)"""
+        headers = {"Authorization": f"Bearer {api_key}"}
+        connections = max(1, min(connections, self.pool_size))
+
+        async def ping() -> bool:
+            try:
+                response = await self.client.get(
+                    f"{base_url}/models", headers=headers, timeout=self.connect_timeout
+                )
+                return response.status_code == 200
+            except Exception as e:
+                print(f"LLM 커넥션 워밍업 오류: {e}")
+                return False
+
+        # 동시에 요청해야 풀에 여러 개의 커넥션이 만들어집니다
+        return all(await asyncio.gather(*[ping() for _ in range(connections)]))
+
+    async def aclose(self) -> None:
+        """풀에 열려 있는 커넥션을 모두 닫습니다."""
+        await self.client.aclose()
+
+
+# httpx 커넥션은 생성된 이벤트 루프에 묶이므로 루프별로 클라이언트를 관리합니다
+_async_llm_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """현재 실행 중인 이벤트 루프의 공용 AsyncLLMClient를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    client = _async_llm_clients.get(loop)
+    if client is None:
+        client = AsyncLLMClient()
+        _async_llm_clients[loop] = client
+    return client
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """동기 API가 사용하는 프로세스 공용 백그라운드 이벤트 루프를 반환합니다."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="llm-event-loop", daemon=True
+            ).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """코루틴을 공용 백그라운드 이벤트 루프에서 시작하고 결과를 담을 Future를 바로 반환합니다.
+
+    호출한 스레드의 contextvars가 그대로 전달되며, 반환한 Future를 cancel()하면
+    실행 중인 태스크도 취소됩니다.
+    """
+    loop = _get_background_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+    tasks = []
+
+    def on_done(task: asyncio.Task) -> None:
+        try:
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        except concurrent.futures.InvalidStateError:
+            # 호출한 쪽에서 이미 취소한 경우
+            pass
+
+    def start() -> None:
+        task = loop.create_task(coro, context=context)
+        tasks.append(task)
+        task.add_done_callback(on_done)
+        if future.cancelled():
+            task.cancel()
+
+    def cancel_tasks() -> None:
+        for task in tasks:
+            task.cancel()
+
+    def on_future_done(done_future: concurrent.futures.Future) -> None:
+        # 호출한 쪽에서 취소하면 실행 중인 태스크도 취소
+        if done_future.cancelled():
+            loop.call_soon_threadsafe(cancel_tasks)
+
+    future.add_done_callback(on_future_done)
+    loop.call_soon_threadsafe(start)
+    return future
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """코루틴을 공용 백그라운드 이벤트 루프에서 실행하고 결과를 기다립니다.
+
+    동기 함수(find_relevant_laws 등)를 비동기 구현의 얇은 래퍼로 만들 때 사용합니다.
+    호출한 스레드의 contextvars가 그대로 전달되며, 백그라운드 루프가 유지되므로
+    호출 사이에도 LLM 커넥션 풀이 재사용됩니다.
+    """
+    loop = _get_background_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError(
+            "백그라운드 이벤트 루프 안에서는 동기 API를 호출할 수 없습니다. 비동기 API를 await 하세요."
+        )
+    return submit(coro).result()
+
+
+def warmup_llm_client(base_url: str, api_key: str, connections: int = 1) -> bool:
+    """공용 백그라운드 이벤트 루프의 AsyncLLMClient 커넥션을 미리 엽니다.
+
+    SimpleToolCaller의 동기/비동기 API는 모두 이 클라이언트로 LLM을 호출합니다.
+
+    사용 예시:
+    warmup_llm_client(caller.base_url, caller.api_key, connections=4)
+    """
+
+    async def warmup() -> bool:
+        return await get_async_llm_client().warmup(base_url, api_key, connections)
+
+    return run_sync(warmup())
+
+
+# parse_sse_line이 스트림의 끝("data: [DONE]")을 알릴 때 반환하는 값
+SSE_DONE = object()
+
+
+def parse_sse_line(line) -> Any:
+    """SSE 한 줄이 "data:" 항목이면 JSON으로 변환해 반환합니다. (그 외에는 None, 끝이면 SSE_DONE)"""
+    if not line:
+        return None
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    if not line.startswith("data:"):
+        return None
+    payload = line[len("data:") :].strip()
+    if payload == "[DONE]":
+        return SSE_DONE
+    return json.loads(payload)
+
+
+def apply_tool_call_delta(tool_calls: Dict[int, Dict], delta: Dict) -> None:
+    """스트리밍 응답의 tool_calls 조각(delta)을 index별로 tool_calls에 이어 붙입니다."""
+    for tool_call_delta in delta.get("tool_calls") or []:
+        index = tool_call_delta.get("index", len(tool_calls))
+        tool_call = tool_calls.setdefault(
+            index,
+            {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+        )
+        if tool_call_delta.get("id"):
+            tool_call["id"] = tool_call_delta["id"]
+        if tool_call_delta.get("type"):
+            tool_call["type"] = tool_call_delta["type"]
+        function_delta = tool_call_delta.get("function") or {}
+        if function_delta.get("name"):
+            tool_call["function"]["name"] = function_delta["name"]
+        if function_delta.get("arguments"):
+            tool_call["function"]["arguments"] += function_delta["arguments"]
+
+
+def assemble_message(content_parts: List[str], tool_calls: Dict[int, Dict]) -> Dict:
+    """스트리밍으로 받은 content 조각과 tool_calls로 assistant 메시지를 조립합니다."""
+    message = {"role": "assistant", "content": "".join(content_parts) or None}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+    return message
+
+
+# TokenStream이 스트림의 끝을 알릴 때 대기열에 넣는 값
+_STREAM_END = object()
+
+
+class TokenStream:
+    """공용 백그라운드 이벤트 루프에서 실행하는 스트리밍 코루틴의 토큰을 동기 이터레이터로 내보냅니다.
+
+    start는 on_token 콜백을 받아 코루틴을 만드는 함수입니다. 코루틴은 바로 시작되고, 토큰은
+    대기열을 거쳐 이터레이터를 읽는 스레드로 전달됩니다. 끝까지 읽으면 코루틴의 반환값이
+    result에 담기며(코루틴의 예외는 그대로 전달), 도중에 close()하면 코루틴을 취소합니다.
+
+    사용 예시:
+    stream = TokenStream(lambda on_token: caller.achat_stream(messages, on_token))
+    for token in stream:
+        print(token, end="", flush=True)
+    """
+
+    def __init__(self, start: Callable[[Callable[[str], None]], Coroutine]):
+        self.content_parts = []
+        self.result = None
+        self._tokens = queue.Queue()
+        self.future = submit(start(self._tokens.put))
+        self.future.add_done_callback(lambda _: self._tokens.put(_STREAM_END))
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            while True:
+                token = self._tokens.get()
+                if token is _STREAM_END:
+                    break
+                self.content_parts.append(token)
+                yield token
+            self.result = self.future.result()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """아직 실행 중이면 코루틴을 취소합니다. (여러 번 호출해도 됨)"""
+        self.future.cancel()
+
+
+class StreamedCompletion(TokenStream):
+    """스트리밍 LLM 응답의 content 토큰을 내보내고, 전체 assistant 메시지를 조립합니다.
+
+    사용 예시:
+    stream = caller.call_llm(messages, stream=True)
+    for token in stream:
+        print(token, end="", flush=True)
+    print(stream.message)  # {"role": "assistant", "content": ..., "tool_calls": [...]}
+
+    call_llm 추적 구간은 astream_llm 안에서 열리므로 스트림을 끝까지 읽거나 닫을 때 닫힙니다.
+    """
+
+    @property
+    def message(self) -> Dict:
+        """조립한 assistant 메시지를 반환합니다. (끝까지 읽기 전에는 지금까지 받은 content만)"""
+        if self.result is not None:
+            return self.result["choices"][0]["message"]
+        return assemble_message(self.content_parts, {})
+
+
+# 한 턴의 여러 도구 호출을 동시에 실행하는 공용 스레드 풀 (TOOL_POOL_SIZE, 기본값: 8)
+tool_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOOL_POOL_SIZE", "8")), thread_name_prefix="tool"
+)
+
 
 class SimpleToolCaller:
-    def __init__(self, TOOLS: List[Dict] = None, TOOL_FUNCTIONS: Dict = None):
+    def __init__(
+        self,
+        TOOLS: List[Dict] = None,
+        TOOL_FUNCTIONS: Dict = None,
+        tool_timeouts: Dict[str, float] = None,
+        cache: LLMResponseCache = None,
+    ):
         self.TOOLS = TOOLS
         self.TOOL_FUNCTIONS = TOOL_FUNCTIONS
+        self.cache = cache or llm_cache
+        # 도구별 타임아웃(초), 지정하지 않은 도구는 TOOL_TIMEOUT(기본값: 300) 사용
+        self.tool_timeouts = tool_timeouts or {}
+        self.default_tool_timeout = float(os.getenv("TOOL_TIMEOUT", "300"))
         if os.getenv("USE_OPENAI") == "True":
             self.api_key = os.getenv("OPENAI_API_KEY")
             self.base_url = "https://api.openai.com/v1"
@@ -21,11 +405,20 @@ class SimpleToolCaller:
             self.model = "gpt-4o-mini-2024-07-18"
         else:
             self.api_key = "EMPTY"
-            self.base_url = "https://5c86-109-61-127-28.ngrok-free.app/v1"
-            self.model = "Qwen/Qwen3-32B-AWQ"
+            # LLM_BASE_URL/LLM_MODEL로 다른 OpenAI 호환 서버(예: benchmark.py의 mock 서버)를 지정할 수 있음
+            self.base_url = os.getenv(
+                "LLM_BASE_URL", "https://5c86-109-61-127-28.ngrok-free.app/v1"
+            )
+            self.model = os.getenv("LLM_MODEL", "Qwen/Qwen3-32B-AWQ")
 
-    def call_llm(self, messages: List[Dict], tools: List[Dict] = None) -> Dict:
-        """LLM API를 호출합니다."""
+    def _build_request(
+        self, messages: List[Dict], tools: List[Dict] = None, json_schema: Dict = None
+    ):
+        """LLM API 요청의 URL, 헤더, 본문을 만듭니다.
+
+        json_schema({"name": ..., "schema": ...})를 주면 LLM_STRUCTURED_OUTPUT 방식으로
+        응답을 해당 스키마의 JSON으로 제한합니다.
+        """
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -36,50 +429,300 @@ class SimpleToolCaller:
         if tools:
             data["tools"] = tools
 
-        response = requests.post(
-            f"{self.base_url}/chat/completions", headers=headers, json=data
+        if json_schema:
+            if LLM_STRUCTURED_OUTPUT == "guided_json":
+                data["guided_json"] = json_schema["schema"]
+            else:
+                data["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": json_schema,
+                }
+
+        return f"{self.base_url}/chat/completions", headers, data
+
+    def _get_cache_key(self, data: Dict):
+        """캐시 대상 프롬프트이면 (캐시 키, 프롬프트 종류)를, 아니면 (None, None)을 반환합니다."""
+        prompt_type = detect_prompt_type(data["messages"])
+        if not self.cache.is_enabled_for(prompt_type):
+            return None, None
+        cache_key = self.cache.make_key(
+            data["model"], data["messages"], data.get("tools"), data["temperature"]
         )
+        return cache_key, prompt_type
 
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API 호출 실패: {response.status_code} - {response.text}")
+    def _span_attributes(self, messages: List[Dict], stream: bool = False) -> Dict:
+        """call_llm 추적 구간에 기록할 속성을 만듭니다."""
+        return {
+            "llm.model": self.model,
+            "llm.prompt_type": detect_prompt_type(messages),
+            "llm.message_count": len(messages),
+            "llm.stream": stream,
+        }
+
+    def call_llm(
+        self, messages: List[Dict], tools: List[Dict] = None, stream: bool = False
+    ) -> Dict:
+        """acall_llm을 공용 백그라운드 이벤트 루프에서 실행하는 동기 래퍼입니다.
+
+        stream=True이면 응답을 기다리지 않고 astream_llm의 토큰을 내보내는 StreamedCompletion을
+        바로 반환합니다.
+        """
+        if stream:
+            return StreamedCompletion(
+                lambda on_token: self.astream_llm(messages, on_token, tools=tools)
+            )
+        return run_sync(self.acall_llm(messages, tools))
+
+    async def acall_llm(self, messages: List[Dict], tools: List[Dict] = None) -> Dict:
+        """LLM API를 비동기로 호출합니다. (캐시 대상 프롬프트는 캐시된 응답을 먼저 확인)"""
+        return await self._acomplete(messages, tools)
+
+    async def astream_llm(
+        self,
+        messages: List[Dict],
+        on_token: Callable[[str], None],
+        json_schema: Dict = None,
+        tools: List[Dict] = None,
+    ) -> Dict:
+        """LLM API를 스트리밍으로 비동기 호출하면서 content 토큰이 도착할 때마다 on_token을 호출합니다.
+
+        반환값은 acall_llm과 같은 형식의 전체 응답입니다. (tool_calls 조각도 조립) 캐시 대상 프롬프트는
+        캐시된 응답을 먼저 확인하며(캐시 적중 시 전체 내용을 on_token으로 한 번에 전달),
+        받은 응답을 조립해 캐시에 저장합니다.
+        """
+        return await self._acomplete(messages, tools, json_schema, on_token)
+
+    async def _acomplete(
+        self,
+        messages: List[Dict],
+        tools: List[Dict] = None,
+        json_schema: Dict = None,
+        on_token: Callable[[str], None] = None,
+    ) -> Dict:
+        """acall_llm/astream_llm의 공통 구현 (on_token을 주면 스트리밍으로 받음)"""
+        url, headers, data = self._build_request(
+            messages, tools, json_schema=json_schema
+        )
+        stream = on_token is not None
+
+        with tracer.span("call_llm", **self._span_attributes(messages, stream)) as span:
+            cache_key, prompt_type = self._get_cache_key(data)
+            if cache_key:
+                cached_response = await self.cache.aget(cache_key, prompt_type)
+                if cached_response is not None:
+                    span.set_attribute("llm.cache_hit", True)
+                    cached_content = cached_response["choices"][0]["message"]["content"]
+                    if stream and cached_content:
+                        on_token(cached_content)
+                    return cached_response
+
+            if stream:
+                result = await self._astream_response(url, headers, data, on_token, span)
+            else:
+                response = await get_async_llm_client().post(
+                    url, headers=headers, json=data
+                )
+                if response.status_code != 200:
+                    raise Exception(
+                        f"API 호출 실패: {response.status_code} - {response.text}"
+                    )
+                result = response.json()
+
+            span.record_usage(result.get("usage"))
+            if cache_key:
+                await self.cache.aset(cache_key, result, prompt_type)
+            return result
+
+    async def _astream_response(
+        self,
+        url: str,
+        headers: Dict,
+        data: Dict,
+        on_token: Callable[[str], None],
+        span,
+    ) -> Dict:
+        """SSE 응답을 읽어 토큰을 on_token으로 넘기고 acall_llm 형식의 전체 응답으로 조립합니다."""
+        data["stream"] = True
+        data["stream_options"] = {"include_usage": True}
+        content_parts = []
+        tool_calls = {}
+        finish_reason = None
+        usage = None
+        # 스트림을 끝까지 읽기 전에 취소되거나 끊기면 False로 남음
+        span.set_attribute("llm.stream_completed", False)
+
+        async with get_async_llm_client().stream(
+            url, headers=headers, json=data
+        ) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode("utf-8", "replace")
+                raise Exception(f"API 호출 실패: {response.status_code} - {error_text}")
+            async for line in response.aiter_lines():
+                chunk = parse_sse_line(line)
+                if chunk is SSE_DONE:
+                    break
+                if chunk is None:
+                    continue
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices") or []:
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+                    delta = choice.get("delta") or {}
+                    apply_tool_call_delta(tool_calls, delta)
+                    token = delta.get("content")
+                    if token:
+                        content_parts.append(token)
+                        on_token(token)
+
+        span.set_attributes(
+            **{"llm.finish_reason": finish_reason, "llm.stream_completed": True}
+        )
+        return {
+            "choices": [
+                {
+                    "index": 0,
+                    "message": assemble_message(content_parts, tool_calls),
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": usage,
+        }
 
     def execute_tool(self, tool_call: Dict) -> str:
-        """도구를 실행합니다."""
+        """aexecute_tool을 공용 백그라운드 이벤트 루프에서 실행하는 동기 래퍼입니다."""
+        return run_sync(self.aexecute_tool(tool_call))
+
+    async def aexecute_tool(self, tool_call: Dict, timeout: float = None) -> str:
+        """도구를 비동기로 실행합니다. 동기 도구 함수는 도구 스레드 풀에서 실행합니다.
+
+        timeout(초)이 지나면 asyncio.TimeoutError가 발생합니다. 동기 도구 함수는 스레드에서
+        실행을 시작한 때부터 재므로, 다른 도구들이 스레드를 모두 쓰고 있어 기다린 시간은 포함하지 않습니다.
+        """
         print("🔧 EXECUTE TOOL-->", tool_call["function"])
 
         function_name = tool_call["function"]["name"]
         arguments = json.loads(tool_call["function"]["arguments"])
 
-        if function_name in self.TOOL_FUNCTIONS:
-            func = self.TOOL_FUNCTIONS[function_name]
-            return func(**arguments)
-        else:
-            return f"알 수 없는 도구: {function_name}"
+        with tracer.span("execute_tool", **{"tool.name": function_name}) as span:
+            if function_name in self.TOOL_FUNCTIONS:
+                func = self.TOOL_FUNCTIONS[function_name]
+                if inspect.iscoroutinefunction(func):
+                    return await asyncio.wait_for(func(**arguments), timeout)
+                return await self._arun_in_tool_thread(
+                    functools.partial(func, **arguments), timeout
+                )
+            else:
+                span.set_error(f"알 수 없는 도구: {function_name}")
+                return f"알 수 없는 도구: {function_name}"
 
-    def chat(self, messages: List[Dict], with_tools: bool = True) -> str:
-        """도구를 사용하여 대화합니다."""
-        # 시스템 프롬프트로 시작하지 않으면 시스템 프롬프트를 추가합니다.
+    async def _arun_in_tool_thread(self, func: Callable, timeout: float = None) -> Any:
+        """동기 함수를 도구 스레드 풀에서 실행하고, 실행을 시작한 때부터 timeout(초)을 잽니다."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        started = loop.create_future()
+
+        def mark_started() -> None:
+            if not started.done():
+                started.set_result(None)
+
+        def run() -> Any:
+            loop.call_soon_threadsafe(mark_started)
+            return context.run(func)
+
+        result = loop.run_in_executor(tool_executor, run)
+        try:
+            # 스레드 풀에서 차례를 기다리는 시간은 타임아웃에 넣지 않음
+            await started
+            return await asyncio.wait_for(result, timeout)
+        finally:
+            # 아직 시작하지 않았으면 실행하지 않음 (이미 실행 중인 스레드는 강제로 중단되지 않음)
+            result.cancel()
+
+    def _get_tool_timeout(self, tool_call: Dict) -> float:
+        """도구 호출에 적용할 타임아웃(초)을 반환합니다."""
+        return self.tool_timeouts.get(
+            tool_call["function"]["name"], self.default_tool_timeout
+        )
+
+    def execute_tools(self, tool_calls: List[Dict]) -> List[str]:
+        """aexecute_tools를 공용 백그라운드 이벤트 루프에서 실행하는 동기 래퍼입니다."""
+        return run_sync(self.aexecute_tools(tool_calls))
+
+    async def aexecute_tools(self, tool_calls: List[Dict]) -> List[str]:
+        """한 턴의 도구 호출들을 동시에 실행하고 원래 순서대로 결과를 반환합니다.
+
+        타임아웃이 지나거나 오류가 난 도구는 그 내용을 결과 문자열로 돌려줍니다.
+        (타임아웃이 지난 동기 도구의 스레드는 강제로 중단되지 않습니다.)
+        """
+
+        async def run_one(tool_call: Dict) -> str:
+            function_name = tool_call["function"]["name"]
+            timeout = self._get_tool_timeout(tool_call)
+            try:
+                return await self.aexecute_tool(tool_call, timeout)
+            except asyncio.TimeoutError:
+                print(f"도구 실행 시간 초과: {function_name}")
+                return f"도구 실행 시간 초과: {function_name} ({timeout:g}초)"
+            except Exception as e:
+                print(f"도구 실행 오류: {e}")
+                return f"도구 실행 오류: {function_name} - {str(e)}"
+
+        return await asyncio.gather(*[run_one(tool_call) for tool_call in tool_calls])
+
+    def _prepare_messages(self, messages: List[Dict]) -> List[Dict]:
+        """시스템 프롬프트로 시작하지 않으면 시스템 프롬프트를 추가합니다."""
         if messages[0]["role"] != "system":
             system_messages = generate_prompt("system")
             messages = system_messages + messages
+        return messages
+
+    def chat(
+        self, messages: List[Dict], with_tools: bool = True, stream: bool = False
+    ) -> str:
+        """achat을 공용 백그라운드 이벤트 루프에서 실행하는 동기 래퍼입니다.
+
+        stream=True이면 답변 토큰을 생성되는 대로 내보내는 이터레이터를 반환합니다.
+        """
+        if stream:
+            return self.chat_stream(messages, with_tools)
+        return run_sync(self.achat(messages, with_tools))
+
+    def chat_stream(self, messages: List[Dict], with_tools: bool = True) -> TokenStream:
+        """achat_stream의 답변 토큰을 생성되는 대로 내보내는 동기 이터레이터를 반환합니다."""
+        return TokenStream(
+            lambda on_token: self.achat_stream(messages, on_token, with_tools)
+        )
 
-        # 첫 번째 LLM 호출
+    async def _achat(
+        self,
+        messages: List[Dict],
+        with_tools: bool,
+        complete: Callable[..., Coroutine],
+    ) -> str:
+        """achat/achat_stream의 공통 대화 흐름입니다.
+
+        complete(messages, tools=None)는 LLM을 호출해 acall_llm 형식의 응답을 반환하는 코루틴 함수입니다.
+        """
+        # 시스템 프롬프트로 시작하지 않으면 시스템 프롬프트를 추가합니다.
+        messages = self._prepare_messages(messages)
+
+        # 첫 번째 LLM 호출 (도구를 호출하지 않으면 이 응답이 곧 답변)
         if with_tools:
-            response = self.call_llm(messages, self.TOOLS)
+            response = await complete(messages, tools=self.TOOLS)
         else:
-            response = self.call_llm(messages)
+            response = await complete(messages)
         assistant_message = response["choices"][0]["message"]
         messages.append(assistant_message)
 
         # 도구 호출이 있는지 확인 (with_tools가 True인 경우에만)
         if with_tools and assistant_message.get("tool_calls"):
-            for tool_call in assistant_message["tool_calls"]:
-                # 도구 실행
-                tool_result = self.execute_tool(tool_call)
+            # 도구 실행 (여러 도구 호출은 동시에 실행)
+            tool_calls = assistant_message["tool_calls"]
+            tool_results = await self.aexecute_tools(tool_calls)
 
-                # 도구 결과를 메시지에 추가
+            # 도구 결과를 원래 호출 순서대로 메시지에 추가
+            for tool_call, tool_result in zip(tool_calls, tool_results):
                 messages.append(
                     {
                         "role": "tool",
@@ -89,7 +732,27 @@ class SimpleToolCaller:
                 )
 
             # 도구 결과를 받은 후 두 번째 LLM 호출
-            final_response = self.call_llm(messages)
+            final_response = await complete(messages)
             return final_response["choices"][0]["message"]["content"]
         else:
             return assistant_message["content"]
+
+    async def achat(self, messages: List[Dict], with_tools: bool = True) -> str:
+        """도구를 사용하여 비동기로 대화합니다."""
+        return await self._achat(messages, with_tools, self.acall_llm)
+
+    async def achat_stream(
+        self,
+        messages: List[Dict],
+        on_token: Callable[[str], None],
+        with_tools: bool = True,
+    ) -> str:
+        """도구를 사용하여 비동기로 대화하면서 답변 토큰이 도착할 때마다 on_token을 호출합니다.
+
+        도구 실행까지 포함한 전체가 하나의 코루틴이므로 asyncio.wait_for로 제한 시간을 걸 수 있습니다.
+        """
+
+        async def complete(messages: List[Dict], tools: List[Dict] = None) -> Dict:
+            return await self.astream_llm(messages, on_token, tools=tools)
+
+        return await self._achat(messages, with_tools, complete)